@@ -0,0 +1,33 @@
+"""Latency injection for offline benchmarks and load tests built on dspy's DummyLM."""
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+import dspy
+
+
+class DelayedEngine:
+    """Wraps a DummyLM engine so every completion first sleeps for `delay_s()` seconds."""
+
+    def __init__(self, engine: Any, delay_s: Callable[[], float]):
+        self._engine = engine
+        self._delay_s = delay_s
+
+    def complete(self, request: Any) -> Any:
+        time.sleep(self._delay_s())
+        return self._engine.complete(request)
+
+    def stream(self, request: Any) -> Any:
+        time.sleep(self._delay_s())
+        return self._engine.stream(request)
+
+    def close(self) -> None:
+        self._engine.close()
+
+
+def with_latency(lm: dspy.utils.DummyLM, delay_s: Callable[[], float]) -> dspy.utils.DummyLM:
+    """Make every completion of `lm` take `delay_s()` seconds (sampled per call); returns `lm`."""
+    # DummyLM serves completions through its engine; there is no public hook for latency
+    lm._engine_spec = DelayedEngine(lm._engine_spec, delay_s)
+    return lm
@@ -0,0 +1,8 @@
+"""Cheap token accounting shared by prompt-budgeting code (no tokenizer dependency)."""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the LM token count of `text` with the common ~4 characters per token rule."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
@@ -0,0 +1,110 @@
+"""Benchmark of the markdown splitter on synthetic markdown.
+
+Generates a reproducible notes-style document (nested headers, numbered and bulleted
+items with continuation lines, short and very long paragraphs) of the requested size and
+times `split_markdown_into_chunks` and `split_markdown_into_spans` on the whole string
+and `iter_markdown_chunks` on a file handle, reporting throughput and (from a separate run) peak traced memory.
+
+Usage:
+    uv run benchmarkdownsplitter                 # 100MB
+    uv run benchmarkdownsplitter --size-mb 10 --skip-list
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from knowledge_graph.markdown_splitter import iter_markdown_chunks, split_markdown_into_chunks, split_markdown_into_spans
+
+
+_WORDS = (
+    "linear agent issue triage project cycle roadmap team backlog priority label workflow "
+    "integration webhook api model prompt context review deploy customer feedback sync"
+).split()
+
+
+def _sentence(rng: random.Random, min_words: int = 6, max_words: int = 18) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + rng.choice([".", ".", "!", "?"])
+
+
+def _block(rng: random.Random) -> List[str]:
+    roll = rng.random()
+    if roll < 0.12:
+        level = rng.randint(1, 4)
+        return ["", "#" * level + " " + _sentence(rng, 2, 5).rstrip(".!?")]
+    if roll < 0.40:
+        marker = f"{rng.randint(1, 20)}." if rng.random() < 0.5 else rng.choice("-*+")
+        lines = [f"{marker} {_sentence(rng, 3, 16)}"]
+        if rng.random() < 0.3:
+            lines.append("   " + _sentence(rng))
+        return lines
+    if roll < 0.97:
+        return ["", _sentence(rng) + " " + _sentence(rng), *([_sentence(rng)] if rng.random() < 0.3 else [])]
+    return ["", " ".join(_sentence(rng) for _ in range(rng.randint(40, 80)))]
+
+
+def synthetic_markdown(size_bytes: int, seed: int = 0) -> str:
+    """A reproducible markdown document of roughly `size_bytes` characters."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    total = 0
+    while total < size_bytes:
+        for line in _block(rng):
+            lines.append(line)
+            total += len(line) + 1
+    return "\n".join(lines)
+
+
+def _measure(fn: Callable[[], int], trace_memory: bool) -> Tuple[int, float, Optional[float]]:
+    """(chunks, seconds, peak traced MB) of `fn`; memory is traced in a second, untimed run."""
+    start = time.perf_counter()
+    chunks = fn()
+    elapsed = time.perf_counter() - start
+    if not trace_memory:
+        return chunks, elapsed, None
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, elapsed, peak / 2**20
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the markdown splitter on synthetic markdown")
+    parser.add_argument("--size-mb", type=float, default=100.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-list", action="store_true", help="Only run the streaming splitter")
+    parser.add_argument("--strategy", choices=["headers_first", "packed"], default="headers_first")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slow) traced-memory run")
+    args = parser.parse_args(argv)
+
+    text = synthetic_markdown(int(args.size_mb * 2**20), args.seed)
+    size_mb = len(text) / 2**20
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.md"
+        path.write_text(text, encoding="utf-8")
+
+        def run_stream() -> int:
+            with path.open(encoding="utf-8") as f:
+                return sum(1 for _ in iter_markdown_chunks(f, args.strategy))
+
+        runs = [] if args.skip_list else [
+            ("split_markdown_into_chunks(str)", lambda: len(split_markdown_into_chunks(text, args.strategy))),
+            ("split_markdown_into_spans(str)", lambda: len(split_markdown_into_spans(text, args.strategy))),
+        ]
+        runs.append(("iter_markdown_chunks(file)", run_stream))
+        print(f"Synthetic markdown: {size_mb:.1f} MB, seed {args.seed}, strategy {args.strategy}")
+        print(f"{'Splitter':<34}{'Chunks':>10}{'Seconds':>10}{'MB/s':>10}{'Peak MB':>10}")
+        for name, fn in runs:
+            chunks, elapsed, peak_mb = _measure(fn, trace_memory=not args.no_memory)
+            peak = f"{peak_mb:.1f}" if peak_mb is not None else "-"
+            print(f"{name:<34}{chunks:>10}{elapsed:>10.2f}{size_mb / elapsed:>10.1f}{peak:>10}")
+
+
+if __name__ == "__main__":
+    main()
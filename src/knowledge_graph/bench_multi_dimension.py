@@ -0,0 +1,88 @@
+"""Offline benchmark: serial vs concurrent vs fused multi-dimension triplet extraction.
+
+Splits a markdown file into chunks and runs `extract_all_dimensions` in each mode against
+a mock LM that answers after a fixed latency (no real LM call is made). Reports LM calls,
+estimated prompt tokens and wall time per mode.
+
+Usage:
+    uv run benchmultidimension
+    uv run benchmultidimension --file notes.md --latency-ms 100 --max-chunks 20
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+import dspy
+
+from common.mock_lm import with_latency
+from common.tokens import estimate_tokens
+from knowledge_graph.markdown_splitter import TextChunk, split_markdown_into_chunks
+from knowledge_graph.prompts import MULTI_DIMENSION_PROMPTS
+from knowledge_graph.simple_build_kg_triplets_multi_dimension import (
+    extract_all_dimensions,
+)
+
+DEFAULT_FILE = "src/simplest/docs/images/notes-on-linear-and-ai-agents.postprocessed.md"
+MODES = ("serial", "concurrent", "fused")
+
+
+def mock_lm(latency_ms: float, chunks: Sequence[TextChunk], fused: bool) -> dspy.utils.DummyLM:
+    """DummyLM answering each chunk with triplets of its own.
+
+    Fused prompts get one triplet per dimension, per-dimension prompts one triplet, so the
+    existing-triplets context grows with every chunk as it would with a real LM.
+    """
+    answers = {}
+    for idx, chunk in enumerate(chunks):
+        if fused:
+            triplets = [
+                {"subject": f"Chunk{idx}", "predicate": "relates to", "object": f"{key.split('_')[0].title()}{idx}",
+                 "dimension": key}
+                for key in MULTI_DIMENSION_PROMPTS
+            ]
+        else:
+            triplets = [{"subject": f"Chunk{idx}", "predicate": "relates to", "object": f"Topic{idx}"}]
+        answers[chunk.content] = {"result": json.dumps({"triplets": triplets})}
+    # Keyed by the chunk text in the final user message; longest first so no chunk shadows another containing it
+    lm = dspy.utils.DummyLM(dict(sorted(answers.items(), key=lambda item: -len(item[0]))))
+    return with_latency(lm, lambda: latency_ms / 1000)
+
+
+def measure(text: str, latency_ms: float = 50.0, max_chunks: int | None = None) -> list[tuple[str, int, int, float]]:
+    """Return (mode, LM calls, estimated prompt tokens, wall seconds) for each mode."""
+    chunks = split_markdown_into_chunks(text)[:max_chunks]
+    rows = []
+    for mode in MODES:
+        lm = mock_lm(latency_ms, chunks, fused=mode == "fused")
+        start = time.perf_counter()
+        with dspy.context(lm=lm, adapter=dspy.ChatAdapter()):
+            extract_all_dimensions(chunks, mode)
+        wall_s = time.perf_counter() - start
+        tokens = sum(estimate_tokens(str(m["content"])) for entry in lm.history for m in entry["messages"])
+        rows.append((mode, len(lm.history), tokens, wall_s))
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare multi-dimension extraction modes against a mock LM")
+    parser.add_argument("--file", default=DEFAULT_FILE, help="Markdown file to split into chunks")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock LM latency per call")
+    parser.add_argument("--max-chunks", type=int, help="Only use the first N chunks")
+    args = parser.parse_args(argv)
+
+    text = Path(args.file).read_text(encoding="utf-8")
+    rows = measure(text, args.latency_ms, args.max_chunks)
+    _, serial_calls, serial_tokens, serial_wall = rows[0]
+    print(f"{'Mode':<12}{'LM calls':>10}{'Prompt tokens':>16}{'Wall (s)':>10}{'vs serial (calls/tokens/wall)':>32}")
+    for mode, calls, tokens, wall_s in rows:
+        ratios = f"{calls / serial_calls:.2f} / {tokens / serial_tokens:.2f} / {wall_s / serial_wall:.2f}"
+        print(f"{mode:<12}{calls:>10}{tokens:>16}{wall_s:>10.2f}{ratios:>32}")
+    print(f"\nChunks: {serial_calls // len(MULTI_DIMENSION_PROMPTS)}  dimensions: {len(MULTI_DIMENSION_PROMPTS)}  "
+          f"mock latency: {args.latency_ms}ms")
+
+
+if __name__ == "__main__":
+    main()
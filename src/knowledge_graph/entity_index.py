@@ -0,0 +1,88 @@
+"""Entity index for choosing which existing triplets to send as extraction context.
+
+Sending every previously extracted triplet with each chunk makes prompts grow with the
+document. `EntityIndex` maps normalized subject/object names to their triplets and, for
+a chunk, selects the triplets whose entities the chunk mentions, then their one-hop
+neighbours, until a token budget is spent.
+"""
+
+import json
+import re
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set
+
+from common.tokens import estimate_tokens
+
+if TYPE_CHECKING:
+    from knowledge_graph.simple_build_kg_triplets import Triplet
+
+
+DEFAULT_CONTEXT_TOKENS = 1500
+# Longest entity name (in words) matched against chunk text
+MAX_ENTITY_WORDS = 8
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_entity(name: str) -> str:
+    """Lowercase and reduce to space-separated alphanumeric words ('Linear, Inc.' -> 'linear inc')."""
+    return " ".join(_WORD.findall(name.lower()))
+
+
+def _triplet_key(triplet: "Triplet") -> tuple:
+    return (triplet.subject, triplet.predicate, triplet.object)
+
+
+def triplet_tokens(triplet: "Triplet") -> int:
+    """Estimated prompt tokens of one triplet as it is serialized into `existing_triplets`."""
+    return estimate_tokens(json.dumps(triplet.model_dump(), ensure_ascii=False))
+
+
+class EntityIndex:
+    """Normalized entity name -> triplets mentioning it as subject or object."""
+
+    def __init__(self, triplets: Iterable["Triplet"] = ()):
+        self._by_entity: Dict[str, Set["Triplet"]] = {}
+        self._max_words = 1
+        self.add(triplets)
+
+    def __len__(self) -> int:
+        return len({t for triplets in self._by_entity.values() for t in triplets})
+
+    def add(self, triplets: Iterable["Triplet"]) -> None:
+        for triplet in triplets:
+            for name in (triplet.subject, triplet.object):
+                entity = normalize_entity(name)
+                if entity:
+                    self._by_entity.setdefault(entity, set()).add(triplet)
+                    self._max_words = min(MAX_ENTITY_WORDS, max(self._max_words, entity.count(" ") + 1))
+
+    def mentioned_entities(self, text: str) -> List[str]:
+        """Indexed entities appearing in `text` as whole words, in order of first mention."""
+        words = _WORD.findall(text.lower())
+        found: Dict[str, None] = {}
+        for start in range(len(words)):
+            for size in range(1, min(self._max_words, len(words) - start) + 1):
+                phrase = " ".join(words[start:start + size])
+                if phrase in self._by_entity:
+                    found.setdefault(phrase, None)
+        return list(found)
+
+    def select(self, text: str, max_tokens: int = DEFAULT_CONTEXT_TOKENS) -> Set["Triplet"]:
+        """Triplets about entities in `text`, then their one-hop neighbours, within `max_tokens`."""
+        mentioned = self.mentioned_entities(text)
+        direct = sorted({t for e in mentioned for t in self._by_entity[e]}, key=_triplet_key)
+        neighbour_entities = {
+            normalize_entity(name) for t in direct for name in (t.subject, t.object)
+        } - set(mentioned)
+        related = sorted(
+            {t for e in neighbour_entities for t in self._by_entity.get(e, ())} - set(direct), key=_triplet_key
+        )
+        selected: Set["Triplet"] = set()
+        used = 0
+        for triplet in direct + related:
+            cost = triplet_tokens(triplet)
+            if used + cost > max_tokens:
+                break
+            selected.add(triplet)
+            used += cost
+        return selected
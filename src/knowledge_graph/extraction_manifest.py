@@ -0,0 +1,90 @@
+"""Manifest of per-chunk extraction results for incremental knowledge graph rebuilds.
+
+Each chunk's triplets are stored under the SHA-256 of the chunk's text, so rebuilding
+after an edit to the source document only calls the LM for chunks whose text is new or
+changed. Entries of chunks that no longer exist are dropped, which retracts any triplets
+only they produced. A fingerprint of the extraction setup (model and instructions) is kept
+with the entries; when it changes the whole manifest is discarded.
+
+Reused chunks keep the triplets they were extracted with, even if the context of earlier
+chunks has since changed.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+if TYPE_CHECKING:
+    from knowledge_graph.simple_build_kg_triplets import Triplet
+
+
+DEFAULT_MANIFEST_FILE = "knowledge_graph_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def extraction_fingerprint(*parts: str) -> str:
+    """Fingerprint of everything besides the chunk text that shapes extraction (model, instructions)."""
+    return content_hash("\x1f".join(parts))
+
+
+class ExtractionManifest:
+    """Chunk content hash -> triplets extracted from that chunk, persisted as JSON."""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_FILE, fingerprint: str = ""):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self._entries: Dict[str, List[List[str]]] = {}
+        if self.path.exists():
+            try:
+                payload = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                payload = {}
+            if payload.get("version") == MANIFEST_VERSION and payload.get("fingerprint") == fingerprint:
+                self._entries = payload.get("chunks", {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return content_hash(text) in self._entries
+
+    def lookup(self, text: str) -> Optional[Set["Triplet"]]:
+        """Triplets previously extracted from exactly this text, or None if it was never extracted."""
+        from knowledge_graph.simple_build_kg_triplets import Triplet
+
+        entry = self._entries.get(content_hash(text))
+        if entry is None:
+            return None
+        return {Triplet(subject=s, predicate=p, object=o) for s, p, o in entry}
+
+    def record(self, text: str, triplets: Iterable["Triplet"]) -> None:
+        self._entries[content_hash(text)] = sorted([t.subject, t.predicate, t.object] for t in triplets)
+
+    def retain(self, texts: Iterable[str]) -> Set["Triplet"]:
+        """Drop entries of chunks not in `texts`; return the triplets only those entries produced."""
+        from knowledge_graph.simple_build_kg_triplets import Triplet
+
+        keep = {content_hash(text) for text in texts}
+        dropped = {h: entry for h, entry in self._entries.items() if h not in keep}
+        for h in dropped:
+            del self._entries[h]
+        surviving = {tuple(t) for entry in self._entries.values() for t in entry}
+        return {
+            Triplet(subject=s, predicate=p, object=o)
+            for entry in dropped.values() for s, p, o in entry if (s, p, o) not in surviving
+        }
+
+    def save(self) -> None:
+        """Write the manifest atomically (a crash mid-write keeps the previous file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "fingerprint": self.fingerprint, "chunks": self._entries}
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -1,66 +1,357 @@
-from typing import List, Optional
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union, overload
 import re
 import pydantic
 
+from common.tokens import CHARS_PER_TOKEN
+
 
 class TextChunk(pydantic.BaseModel):
     """Represents a chunk of text extracted from markdown with metadata."""
     content: str = pydantic.Field(description="The actual text content of the chunk")
-    chunk_type: str = pydantic.Field(description="Type of chunk: 'header_section', 'numbered_item', 'bulleted_item', 'paragraph'")
+    chunk_type: str = pydantic.Field(description="Type of chunk: 'header_section', 'numbered_item', 'bulleted_item', 'paragraph', or 'mixed' for packed chunks")
     header_context: Optional[str] = pydantic.Field(default=None, description="Parent header if applicable")
     chunk_index: int = pydantic.Field(description="Order of chunk in document (0-based)")
 
 
-def _header_context_str(header_stack: List[str]) -> Optional[str]:
-    """Build header context string from stack parents, e.g. 'Section > Subsection'.
-    Uses header_stack[:-1] to exclude the current (deepest) header.
-    Returns None when there are fewer than 2 headers (no parent context).
+# One combined pattern classifies each right-stripped line. `indent` separates column-0
+# headers/items (section boundaries, list items at top level, continuation stops) from
+# indented ones, which only count as list items inside header sections.
+_LINE = re.compile(
+    r'^(?P<indent>\s*)(?:'
+    r'(?P<hashes>#{1,6})\s+.+'
+    r'|\d+\.\s+(?P<numbered>.+)'
+    r'|[-*+]\s+(?P<bulleted>.+)'
+    r')$'
+)
+
+_END, _BLANK, _TEXT, _HEADER, _NUMBERED, _BULLETED = range(6)
+_ITEM_TYPES = {_NUMBERED: "numbered_item", _BULLETED: "bulleted_item"}
+MIN_CHUNK_CHARS = 50
+MAX_PARAGRAPH_CHARS = 2000
+DEFAULT_TARGET_TOKENS = 500
+
+# How a chunk's content is rebuilt from its source lines (see `_render`)
+_RENDER_ITEM, _RENDER_PARAGRAPH, _RENDER_SECTION, _RENDER_PACKED = range(4)
+
+
+class _Lines:
+    """Single-pass line classifier with one line of lookahead.
+
+    `text` (right-stripped), `kind`, `indented` and `item` (list item text, the `#` run
+    of a header, or '' otherwise) describe the current line; `advance()` classifies the
+    next one. `start`/`end` are the line's character offsets in the concatenated input.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._next_start = 0
+        self.advance()
+
+    def advance(self) -> None:
+        raw = next(self._lines, None)
+        self.item = ''
+        self.indented = False
+        if raw is None:
+            self.text, self.kind = '', _END
+            self.start = self.end = self._next_start
+            return
+        newline = raw.endswith('\n')
+        self.start = self._next_start
+        self.end = self.start + len(raw) - newline
+        self._next_start = self.end + 1
+        self.text = raw.rstrip()
+        if not self.text:
+            self.kind = _BLANK
+            return
+        match = _LINE.match(self.text)
+        if match is None:
+            self.kind = _TEXT
+            return
+        self.indented = bool(match.group('indent'))
+        hashes, numbered, bulleted = match.group('hashes', 'numbered', 'bulleted')
+        if hashes:
+            # Indented header syntax is plain text
+            self.kind = _TEXT if self.indented else _HEADER
+            self.item = hashes
+        elif numbered is not None:
+            self.kind, self.item = _NUMBERED, numbered
+        else:
+            # `_LINE` only matches when one of its three alternatives did
+            assert bulleted is not None
+            self.kind, self.item = _BULLETED, bulleted
+
+    def stops_continuation(self) -> bool:
+        return self.kind in (_END, _BLANK, _HEADER) or (self.kind in _ITEM_TYPES and not self.indented)
+
+
+def _continuation_part(line: str) -> str:
+    """Indented continuation lines are stripped; others are kept as-is."""
+    return line.strip() if line[0] in ' \t' else line
+
+
+def _collect_continuation(lines: _Lines, end: int) -> tuple[str, int]:
+    """Merge the lines following an item or paragraph start until a blank line, header or column-0 item.
+
+    Returns the merged text and the end offset of the last merged line (`end` if none).
     """
-    if len(header_stack) < 2:
+    parts: List[str] = []
+    while not lines.stops_continuation():
+        parts.append(_continuation_part(lines.text))
+        end = lines.end
+        lines.advance()
+    return ' '.join(parts), end
+
+
+class _Draft(NamedTuple):
+    """A chunk as produced by the parser: its content plus where that content came from."""
+    content: str
+    chunk_type: str
+    header_context: Optional[str]
+    start: int
+    end: int
+    render: int
+    # For sentence-split pieces: the slice of the rendered span that is this chunk
+    piece: Optional[tuple[int, int]] = None
+
+
+def _draft(content: str, chunk_type: str, header_context: Optional[str], start: int, end: int, render: int) -> Optional[_Draft]:
+    """A draft for content of at least MIN_CHUNK_CHARS (stripped), else None."""
+    if len(content.strip()) < MIN_CHUNK_CHARS:
         return None
-    parts = [h.replace('#', '').strip() for h in header_stack[:-1]]
-    return ' > '.join(parts)
+    return _Draft(content, chunk_type, header_context, start, end, render)
 
 
-def _collect_continuation(lines: List[str], start: int, stop_patterns: List[re.Pattern]) -> tuple[str, int]:
-    """Scan from lines[start] onward, merging continuation lines into one text block.
-    
-    Stops at: empty line, any stop_pattern match, or end of lines.
-    If a line starts with whitespace it's treated as continuation (stripped).
-    Otherwise it's appended unmodified (heuristic for non-indented continuation).
-    Returns (combined_text, new_index_after_consuming_lines).
+def _iter_section_drafts(lines: _Lines, header_context: Optional[str]) -> Iterator[_Draft]:
+    """Chunks of a header section: its list items (indented or not), else the whole section.
+
+    Blank lines inside a section are ignored, so item continuations run across them. Section
+    text is only buffered until the first list item chunk is emitted, since after that the
+    section itself can no longer become a chunk.
+    """
+    buffered: Optional[List[str]] = []
+    section_start = section_end = lines.start
+    while lines.kind not in (_END, _HEADER):
+        if lines.kind == _BLANK:
+            lines.advance()
+            continue
+        if buffered is not None:
+            if not buffered:
+                section_start = lines.start
+            buffered.append(lines.text)
+            section_end = lines.end
+        if lines.kind not in _ITEM_TYPES:
+            lines.advance()
+            continue
+        chunk_type, item_content = _ITEM_TYPES[lines.kind], lines.item.strip()
+        item_start, item_end = lines.start, lines.end
+        parts: List[str] = []
+        lines.advance()
+        while lines.kind not in (_END, _HEADER) and not (lines.kind in _ITEM_TYPES and not lines.indented):
+            if lines.kind != _BLANK:
+                if buffered is not None:
+                    buffered.append(lines.text)
+                    section_end = lines.end
+                parts.append(_continuation_part(lines.text))
+                item_end = lines.end
+            lines.advance()
+        if parts:
+            item_content += ' ' + ' '.join(parts)
+        draft = _draft(item_content, chunk_type, header_context, item_start, item_end, _RENDER_ITEM)
+        if draft:
+            yield draft
+            buffered = None
+    if buffered:
+        draft = _draft('\n'.join(buffered), "header_section", header_context, section_start, section_end, _RENDER_SECTION)
+        if draft:
+            yield draft
+
+
+def _push_header(header_stack: List[tuple[int, str]], lines: _Lines) -> None:
+    """Replace headers at the current header's level or deeper with it.
+
+    Entries are (number of '#' in the header line, title); the counts strictly increase up
+    the stack, so popping from the top matches filtering the whole stack.
     """
-    content_parts: List[str] = []
-    i = start
-    while i < len(lines):
-        next_line = lines[i].rstrip()
-        if not next_line.strip():
-            break
-        if any(p.match(next_line) for p in stop_patterns):
-            break
-        if next_line.startswith(' ') or next_line.startswith('\t'):
-            content_parts.append(next_line.strip())
+    level = len(lines.item)
+    while header_stack and header_stack[-1][0] >= level:
+        header_stack.pop()
+    header_stack.append((lines.text.count('#'), lines.text.replace('#', '').strip()))
+
+
+def _sentence_pieces(text: str, max_chars: int) -> List[tuple[int, int]]:
+    """Offsets of ~max_chars pieces of `text`, cut after sentence-ending punctuation and stripped."""
+    # Simple sentence splitting (period followed by space or newline); the captured
+    # delimiters keep the pieces contiguous, so offsets are running sums
+    sentences = re.split(r'([.!?]\s+)', text)
+    combined_lengths = [len(sentences[i]) + len(sentences[i + 1]) for i in range(0, len(sentences) - 1, 2)]
+    combined_lengths.append(len(sentences[-1]))
+
+    pieces: List[tuple[int, int]] = []
+
+    def stripped(start: int, end: int) -> tuple[int, int]:
+        segment = text[start:end]
+        left = len(segment) - len(segment.lstrip())
+        return (start + left, max(start + left, start + len(segment.rstrip())))
+
+    start = length = 0
+    for sentence_length in combined_lengths:
+        if length + sentence_length > max_chars and length:
+            pieces.append(stripped(start, start + length))
+            start, length = start + length, sentence_length
+        else:
+            length += sentence_length
+    if text[start:start + length].strip():
+        pieces.append(stripped(start, start + length))
+    return pieces
+
+
+def _iter_pieces(content: str, chunk_type: str, header_context: Optional[str], start: int, end: int, render: int, max_chars: int) -> Iterator[_Draft]:
+    for piece_start, piece_end in _sentence_pieces(content, max_chars):
+        yield _Draft(content[piece_start:piece_end], chunk_type, header_context, start, end, render, (piece_start, piece_end))
+
+
+def _iter_headers_first_drafts(lines_: _Lines) -> Iterator[_Draft]:
+    header_stack: List[tuple[int, str]] = []
+    header_context: Optional[str] = None
+    while lines_.kind != _END:
+        kind, line, start = lines_.kind, lines_.text, lines_.start
+
+        if kind == _BLANK:
+            lines_.advance()
+            continue
+
+        if kind == _HEADER:
+            _push_header(header_stack, lines_)
+            header_context = ' > '.join(title for _, title in header_stack[:-1]) if len(header_stack) > 1 else None
+            lines_.advance()
+            yield from _iter_section_drafts(lines_, header_context)
+            continue
+
+        end = lines_.end
+        if kind in _ITEM_TYPES and not lines_.indented:
+            chunk_type, item_content = _ITEM_TYPES[kind], lines_.item.strip()
+            lines_.advance()
+            continuation, end = _collect_continuation(lines_, end)
+            if continuation:
+                item_content += ' ' + continuation
+            draft = _draft(item_content, chunk_type, header_context, start, end, _RENDER_ITEM)
+            if draft:
+                yield draft
+            continue
+
+        # Regular paragraph - collect until empty line or next special element
+        lines_.advance()
+        continuation, end = _collect_continuation(lines_, end)
+        paragraph_content = (line + ' ' + continuation if continuation else line).strip()
+        if len(paragraph_content) < MIN_CHUNK_CHARS:
+            continue
+        if len(paragraph_content) > MAX_PARAGRAPH_CHARS:
+            yield from _iter_pieces(paragraph_content, "paragraph", header_context, start, end, _RENDER_PARAGRAPH, MAX_PARAGRAPH_CHARS)
         else:
-            content_parts.append(next_line)
-        i += 1
-    return ' '.join(content_parts), i
-
-
-def _emit_chunk(chunks: List[TextChunk], content: str, chunk_type: str, header_context: Optional[str], current_index: int) -> int:
-    """Append a chunk if content >= 50 chars; return (possibly incremented) index."""
-    if len(content.strip()) >= 50:
-        chunks.append(TextChunk(
-            content=content,
-            chunk_type=chunk_type,
-            header_context=header_context,
-            chunk_index=current_index
-        ))
-        return current_index + 1
-    return current_index
-
-
-def split_markdown_into_chunks(text: str, strategy: str = "headers_first") -> List[TextChunk]:
-    # lizard forgives(cyclomatic_complexity)  # essential: 3 content types + header nesting
+            yield _Draft(paragraph_content, "paragraph", header_context, start, end, _RENDER_PARAGRAPH)
+
+
+def _iter_units(lines: _Lines) -> Iterator[tuple[str, str, Optional[str], int, int]]:
+    """Every list item and paragraph as (content, type, full header path, start, end), nothing dropped."""
+    header_stack: List[tuple[int, str]] = []
+    header_path: Optional[str] = None
+    while lines.kind != _END:
+        kind, line, start = lines.kind, lines.text, lines.start
+        if kind == _BLANK:
+            lines.advance()
+            continue
+        if kind == _HEADER:
+            _push_header(header_stack, lines)
+            header_path = ' > '.join(title for _, title in header_stack)
+            lines.advance()
+            continue
+        is_item = kind in _ITEM_TYPES and not lines.indented
+        content = lines.item.strip() if is_item else line.strip()
+        end = lines.end
+        lines.advance()
+        continuation, end = _collect_continuation(lines, end)
+        unit_type = _ITEM_TYPES[kind] if is_item else "paragraph"
+        yield (content + ' ' + continuation if continuation else content), unit_type, header_path, start, end
+
+
+def _iter_packed_drafts(lines: _Lines, target_tokens: int) -> Iterator[_Draft]:
+    """Greedily pack adjacent items/paragraphs with the same header path into chunks of ~target_tokens.
+
+    Units larger than the budget are split at sentence boundaries instead.
+    """
+    max_chars = target_tokens * CHARS_PER_TOKEN
+    pending: List[str] = []
+    pending_types: set[str] = set()
+    pending_context: Optional[str] = None
+    pending_chars = pending_start = pending_end = 0
+    for content, unit_type, header_path, start, end in _iter_units(lines):
+        if pending and (header_path != pending_context or pending_chars + 1 + len(content) > max_chars):
+            chunk_type = pending_types.pop() if len(pending_types) == 1 else "mixed"
+            yield _Draft('\n'.join(pending), chunk_type, pending_context, pending_start, pending_end, _RENDER_PACKED)
+            pending, pending_types, pending_chars = [], set(), 0
+        if len(content) > max_chars:
+            yield from _iter_pieces(content, unit_type, header_path, start, end, _RENDER_PACKED, max_chars)
+            continue
+        if not pending:
+            pending_start = start
+        pending.append(content)
+        pending_types.add(unit_type)
+        pending_context, pending_end = header_path, end
+        pending_chars += len(content) + (1 if pending_chars else 0)
+    if pending:
+        chunk_type = pending_types.pop() if len(pending_types) == 1 else "mixed"
+        yield _Draft('\n'.join(pending), chunk_type, pending_context, pending_start, pending_end, _RENDER_PACKED)
+
+
+def _iter_drafts(lines: Iterable[str], strategy: str, target_tokens: int) -> Iterator[_Draft]:
+    if strategy == "headers_first":
+        return _iter_headers_first_drafts(_Lines(lines))
+    if strategy == "packed":
+        return _iter_packed_drafts(_Lines(lines), target_tokens)
+    raise ValueError(f"Unknown splitting strategy: {strategy}")
+
+
+def _render(source: str, start: int, end: int, render: int, piece: Optional[tuple[int, int]]) -> str:
+    """Rebuild a chunk's content from its source lines, exactly as the parser built it."""
+    lines = _Lines(source[start:end].split('\n'))
+    if render == _RENDER_PACKED:
+        content = '\n'.join(unit[0] for unit in _iter_units(lines))
+    else:
+        texts: List[str] = []
+        first_item = lines.item
+        while lines.kind != _END:
+            if lines.kind != _BLANK:
+                texts.append(lines.text)
+            lines.advance()
+        if render == _RENDER_SECTION:
+            content = '\n'.join(texts)
+        else:
+            first = first_item.strip() if render == _RENDER_ITEM else texts[0]
+            content = ' '.join([first, *(_continuation_part(t) for t in texts[1:])])
+            if render == _RENDER_PARAGRAPH:
+                content = content.strip()
+    return content[piece[0]:piece[1]] if piece else content
+
+
+def iter_markdown_chunks(
+    lines: Iterable[str],
+    strategy: str = "headers_first",
+    target_tokens: int = DEFAULT_TARGET_TOKENS,
+) -> Iterator[TextChunk]:
+    """Streaming `split_markdown_into_chunks`: consume lines (e.g. an open file) and yield chunks lazily.
+
+    Every line is classified once, and at most one chunk's worth of lines is held in memory.
+    """
+    for chunk_index, draft in enumerate(_iter_drafts(lines, strategy, target_tokens)):
+        yield TextChunk(content=draft.content, chunk_type=draft.chunk_type, header_context=draft.header_context, chunk_index=chunk_index)
+
+
+def split_markdown_into_chunks(
+    text: str,
+    strategy: str = "headers_first",
+    target_tokens: int = DEFAULT_TARGET_TOKENS,
+) -> List[TextChunk]:
     """
     Split markdown text into logical chunks for better triplet extraction.
     
@@ -70,189 +361,134 @@ def split_markdown_into_chunks(text: str, strategy: str = "headers_first") -> Li
     - Numbered/bulleted items are split individually
     - Remaining text is split into paragraphs
     
+    Strategy: packed
+    - Adjacent items and paragraphs under the same header are merged up to `target_tokens`
+    - Larger items/paragraphs are split at sentence boundaries
+    - Nothing is dropped; header_context is the full header path, including the section's own header
+    
     Args:
         text: The markdown text to split
-        strategy: Splitting strategy (currently only "headers_first" is supported)
+        strategy: Splitting strategy, "headers_first" or "packed"
+        target_tokens: Approximate chunk size for the "packed" strategy
     
     Returns:
         List of TextChunk objects with metadata
     """
-    chunks: List[TextChunk] = []
-    lines = text.split('\n')
-    
-    # Track current header context (stack for nested headers)
-    header_stack: List[str] = []
-    current_chunk_index = 0
-    
-    # Patterns for markdown elements
-    header_pattern = re.compile(r'^(#{1,6})\s+(.+)$')
-    numbered_item_pattern = re.compile(r'^\d+\.\s+(.+)$')
-    bulleted_item_pattern = re.compile(r'^[-*+]\s+(.+)$')
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].rstrip()
-        
-        # Skip empty lines
-        if not line.strip():
-            i += 1
-            continue
-        
-        # Check for headers (H1-H6)
-        header_match = header_pattern.match(line)
-        if header_match:
-            header_level = len(header_match.group(1))
-            
-            # Update header stack - remove headers at same or deeper level
-            header_stack = [h for h in header_stack if h.count('#') < header_level]
-            header_stack.append(line)
-            
-            # Collect content until next header or end
-            section_content: List[str] = []
-            i += 1
-            while i < len(lines):
-                next_line = lines[i].rstrip()
-                if header_pattern.match(next_line):
-                    break
-                if next_line.strip():
-                    section_content.append(next_line)
-                i += 1
-            
-            # Create chunk for header section if it has content
-            if section_content:
-                content = '\n'.join(section_content)
-                hctx = _header_context_str(header_stack)
-                
-                # Further split by lists if present
-                sub_chunks = _split_section_by_lists(content, hctx, current_chunk_index)
-                if sub_chunks:
-                    chunks.extend(sub_chunks)
-                    current_chunk_index += len(sub_chunks)
-                else:
-                    current_chunk_index = _emit_chunk(chunks, content, "header_section", hctx, current_chunk_index)
-            continue
-        
-        # Check for numbered list items (outside of header sections)
-        numbered_match = numbered_item_pattern.match(line)
-        if numbered_match:
-            item_content = numbered_match.group(1).strip()
-            continuation, i = _collect_continuation(lines, i + 1, [numbered_item_pattern, bulleted_item_pattern, header_pattern])
-            if continuation:
-                item_content += ' ' + continuation
-            hctx = _header_context_str(header_stack)
-            current_chunk_index = _emit_chunk(chunks, item_content, "numbered_item", hctx, current_chunk_index)
-            continue
-        
-        # Check for bulleted list items
-        bulleted_match = bulleted_item_pattern.match(line)
-        if bulleted_match:
-            item_content = bulleted_match.group(1).strip()
-            continuation, i = _collect_continuation(lines, i + 1, [numbered_item_pattern, bulleted_item_pattern, header_pattern])
-            if continuation:
-                item_content += ' ' + continuation
-            hctx = _header_context_str(header_stack)
-            current_chunk_index = _emit_chunk(chunks, item_content, "bulleted_item", hctx, current_chunk_index)
-            continue
-        
-        # Regular paragraph - collect until empty line or next special element
-        paragraph_lines: List[str] = [line]
-        continuation, i = _collect_continuation(lines, i + 1, [header_pattern, numbered_item_pattern, bulleted_item_pattern])
-        if continuation:
-            paragraph_lines.append(continuation)
-        
-        paragraph_content = ' '.join(paragraph_lines).strip()
-        hctx = _header_context_str(header_stack)
-        
-        if len(paragraph_content.strip()) >= 50:
-            if len(paragraph_content) > 2000:
-                sentence_chunks = _split_large_text_by_sentences(paragraph_content, hctx, current_chunk_index)
-                chunks.extend(sentence_chunks)
-                current_chunk_index += len(sentence_chunks)
-            else:
-                current_chunk_index = _emit_chunk(chunks, paragraph_content, "paragraph", hctx, current_chunk_index)
-    
-    return chunks
+    return list(iter_markdown_chunks(text.split('\n'), strategy, target_tokens))
 
 
-def _split_section_by_lists(content: str, header_context: Optional[str], start_index: int) -> List[TextChunk]:
-    """Split a section content by numbered or bulleted lists."""
-    chunks: List[TextChunk] = []
-    lines = content.split('\n')
-    
-    numbered_pattern = re.compile(r'^\d+\.\s+(.+)$')
-    bulleted_pattern = re.compile(r'^[-*+]\s+(.+)$')
-    
-    i = 0
-    chunk_index = start_index
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line:
-            i += 1
-            continue
-        
-        numbered_match = numbered_pattern.match(line)
-        bulleted_match = bulleted_pattern.match(line)
-        
-        if numbered_match:
-            item_content = numbered_match.group(1).strip()
-            continuation, i = _collect_continuation(lines, i + 1, [numbered_pattern, bulleted_pattern])
-            if continuation:
-                item_content += ' ' + continuation
-            chunk_index = _emit_chunk(chunks, item_content, "numbered_item", header_context, chunk_index)
-        elif bulleted_match:
-            item_content = bulleted_match.group(1).strip()
-            continuation, i = _collect_continuation(lines, i + 1, [numbered_pattern, bulleted_pattern])
-            if continuation:
-                item_content += ' ' + continuation
-            chunk_index = _emit_chunk(chunks, item_content, "bulleted_item", header_context, chunk_index)
-        else:
-            i += 1
-    
-    return chunks
+def _iter_source_lines(text: str) -> Iterator[str]:
+    """`text.split('\\n')` without materializing the list."""
+    start = 0
+    while (end := text.find('\n', start)) >= 0:
+        yield text[start:end]
+        start = end + 1
+    yield text[start:]
 
 
-def _split_large_text_by_sentences(text: str, header_context: Optional[str], start_index: int) -> List[TextChunk]:
-    """Split very large text chunks by sentences (approximately 2000 chars per chunk)."""
-    chunks: List[TextChunk] = []
-    
-    # Simple sentence splitting (period followed by space or newline)
-    sentences = re.split(r'([.!?]\s+)', text)
-    
-    # Recombine sentences with their punctuation
-    combined_sentences: List[str] = []
-    for i in range(0, len(sentences) - 1, 2):
-        if i + 1 < len(sentences):
-            combined_sentences.append(sentences[i] + sentences[i + 1])
-        else:
-            combined_sentences.append(sentences[i])
-    
-    if len(sentences) % 2 == 1:
-        combined_sentences.append(sentences[-1])
-    
-    current_chunk = ""
-    chunk_index = start_index
-    
-    for sentence in combined_sentences:
-        if len(current_chunk) + len(sentence) > 2000 and current_chunk:
-            chunks.append(TextChunk(
-                content=current_chunk.strip(),
-                chunk_type="paragraph",
-                header_context=header_context,
-                chunk_index=chunk_index
-            ))
-            chunk_index += 1
-            current_chunk = sentence
-        else:
-            current_chunk += sentence
-    
-    if current_chunk.strip():
-        chunks.append(TextChunk(
-            content=current_chunk.strip(),
-            chunk_type="paragraph",
-            header_context=header_context,
-            chunk_index=chunk_index
-        ))
-    
-    return chunks
+class ChunkView:
+    """Read-only `TextChunk`-like view of one chunk in a `ChunkSpans`; content is rebuilt on access."""
+
+    __slots__ = ("_spans", "chunk_index")
+
+    def __init__(self, spans: "ChunkSpans", chunk_index: int):
+        self._spans = spans
+        self.chunk_index = chunk_index
+
+    @property
+    def content(self) -> str:
+        return self._spans.content(self.chunk_index)
+
+    @property
+    def chunk_type(self) -> str:
+        return self._spans.chunk_types[self._spans.type_ids[self.chunk_index]]
+
+    @property
+    def header_context(self) -> Optional[str]:
+        return self._spans.header_contexts[self._spans.header_ids[self.chunk_index]]
+
+    def to_text_chunk(self) -> TextChunk:
+        return TextChunk(content=self.content, chunk_type=self.chunk_type, header_context=self.header_context, chunk_index=self.chunk_index)
+
+    def __repr__(self) -> str:
+        return f"ChunkView(chunk_index={self.chunk_index}, chunk_type={self.chunk_type!r}, header_context={self.header_context!r})"
+
 
+class ChunkSpans(Sequence[ChunkView]):
+    """Chunks of one source text stored as offset columns instead of content strings.
+
+    Per chunk: start/end offsets of its source lines, how to rebuild its content from them
+    (and, for sentence-split pieces, which slice of that), plus interned chunk type and
+    header context ids. Indexing returns a `ChunkView`.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.starts = array('q')
+        self.ends = array('q')
+        self.renders = array('b')
+        self.piece_starts = array('q')  # -1: the whole rendered span
+        self.piece_ends = array('q')
+        self.type_ids = array('b')
+        self.header_ids = array('l')
+        self.chunk_types: List[str] = []
+        self.header_contexts: List[Optional[str]] = []
+        self._type_index: Dict[str, int] = {}
+        self._header_index: Dict[Optional[str], int] = {}
+
+    def _append(self, draft: _Draft) -> None:
+        self.starts.append(draft.start)
+        self.ends.append(draft.end)
+        self.renders.append(draft.render)
+        self.piece_starts.append(draft.piece[0] if draft.piece else -1)
+        self.piece_ends.append(draft.piece[1] if draft.piece else -1)
+        if draft.chunk_type not in self._type_index:
+            self._type_index[draft.chunk_type] = len(self.chunk_types)
+            self.chunk_types.append(draft.chunk_type)
+        self.type_ids.append(self._type_index[draft.chunk_type])
+        if draft.header_context not in self._header_index:
+            self._header_index[draft.header_context] = len(self.header_contexts)
+            self.header_contexts.append(draft.header_context)
+        self.header_ids.append(self._header_index[draft.header_context])
+
+    def content(self, chunk_index: int) -> str:
+        piece = None if self.piece_starts[chunk_index] < 0 else (self.piece_starts[chunk_index], self.piece_ends[chunk_index])
+        return _render(self.source, self.starts[chunk_index], self.ends[chunk_index], self.renders[chunk_index], piece)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @overload
+    def __getitem__(self, index: int) -> ChunkView: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[ChunkView]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ChunkView, List[ChunkView]]:
+        if isinstance(index, slice):
+            return [ChunkView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return ChunkView(self, index)
+
+
+# Anything chunk consumers read: content, chunk_type, header_context, chunk_index
+ChunkLike = Union[TextChunk, ChunkView]
+
+
+def split_markdown_into_spans(
+    text: str,
+    strategy: str = "headers_first",
+    target_tokens: int = DEFAULT_TARGET_TOKENS,
+) -> ChunkSpans:
+    """Like `split_markdown_into_chunks`, but keeps only offsets into `text` per chunk.
+
+    Chunk contents are built transiently while splitting and rebuilt from `text` when a
+    view's `content` is read, so splitting a large corpus holds no copies of it.
+    """
+    spans = ChunkSpans(text)
+    for draft in _iter_drafts(_iter_source_lines(text), strategy, target_tokens):
+        spans._append(draft)
+    return spans
@@ -21,4 +21,16 @@ MULTI_DIMENSION_PROMPTS: Dict[str, str] = {
     "TECH_RELATIONS": TRIPLET_TECH_RELATIONS_INSTRUCTIONS,
     "COMPANY_RELATIONS": TRIPLET_COMPANY_RELATIONS_INSTRUCTIONS,
     "PEOPLE_RELATIONS": TRIPLET_PEOPLE_RELATIONS_INSTRUCTIONS,
-}
\ No newline at end of file
+}
+
+def build_fused_dimension_instructions(prompts: Dict[str, str]) -> str:
+    """Combine per-dimension instructions into one prompt that tags each triplet with its dimension."""
+    sections = "\n".join(f"Dimension {key}:\n{text.strip()}\n" for key, text in prompts.items())
+    return f"""
+Extract knowledge graph triplets (subject, predicate, object) for every dimension below in a single pass, and set each triplet's `dimension` to the key of the dimension it belongs to. A relationship that fits several dimensions may be listed once per dimension.
+If existing_triplets are provided, refer to them and avoid duplicates.
+
+{sections}"""
+
+
+TRIPLET_FUSED_DIMENSIONS_INSTRUCTIONS = build_fused_dimension_instructions(MULTI_DIMENSION_PROMPTS)
@@ -1,5 +1,10 @@
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import contextvars
 import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import dspy
 import pydantic
 import networkx as nx
@@ -8,7 +13,9 @@ from pyvis.network import Network
 
 from common.utils import get_lm_for_model_name, dspy_configure
 from common.constants import MODEL_NAME_GEMINI_3_5_FLASH
-from knowledge_graph.markdown_splitter import TextChunk, split_markdown_into_chunks
+from knowledge_graph.entity_index import DEFAULT_CONTEXT_TOKENS, EntityIndex
+from knowledge_graph.extraction_manifest import DEFAULT_MANIFEST_FILE, ExtractionManifest, extraction_fingerprint
+from knowledge_graph.markdown_splitter import DEFAULT_TARGET_TOKENS, ChunkLike, split_markdown_into_spans
 from knowledge_graph.prompts import TRIPLET_GENERAL_EXTRACTOR_INSTRUCTIONS
 
 
@@ -47,7 +54,93 @@ def extract_triplets_from_text(text: str, extractor: dspy.Module, existing_tripl
     return result.result.triplets
 
 
-def build_networkx_graph(triplets: set[Triplet]) -> nx.DiGraph:
+def iter_chunk_triplets(
+    chunks: Sequence[ChunkLike],
+    extractor: dspy.Module,
+    workers: int = 1,
+    context_tokens: Optional[int] = None,
+    seed_triplets: Iterable[Triplet] = (),
+) -> Iterator[Tuple[ChunkLike, set[Triplet]]]:
+    """Extract triplets chunk by chunk, yielding (chunk, triplets) in chunk order.
+
+    Chunks are processed in waves of `workers` concurrent calls. Every chunk of a wave gets
+    context from the triplets of earlier waves only, so results do not depend on which call
+    finishes first; with workers=1 this is the original serial extraction. With
+    `context_tokens`, each chunk gets just the triplets about entities it mentions (and their
+    neighbours) within that budget instead of everything extracted so far. `seed_triplets`
+    (e.g. from earlier, reused chunks) are available as context from the first chunk on.
+    """
+    seen: set[Triplet] = set(seed_triplets)
+    index = EntityIndex(seen if context_tokens is not None else ())
+    wave_size = max(1, workers)
+    with ThreadPoolExecutor(max_workers=wave_size) as executor:
+        for start in range(0, len(chunks), wave_size):
+            wave = chunks[start:start + wave_size]
+            if context_tokens is None:
+                contexts = [set(seen) for _ in wave]
+            else:
+                contexts = [index.select(chunk.content, context_tokens) for chunk in wave]
+            # copy_context carries dspy.context overrides (lm, adapter) into the worker threads
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    extract_triplets_from_text, chunk.content, extractor, context,
+                )
+                for chunk, context in zip(wave, contexts)
+            ]
+            results = [future.result() for future in futures]
+            for chunk, chunk_triplets in zip(wave, results):
+                seen.update(chunk_triplets)
+                if context_tokens is not None:
+                    index.add(chunk_triplets)
+                yield chunk, chunk_triplets
+
+
+def iter_incremental_chunk_triplets(
+    chunks: Sequence[ChunkLike],
+    extractor: dspy.Module,
+    manifest: ExtractionManifest,
+    workers: int = 1,
+    context_tokens: Optional[int] = None,
+) -> Iterator[Tuple[ChunkLike, set[Triplet], bool]]:
+    """Yield (chunk, triplets, reused) in chunk order, calling the LM only for chunks not in `manifest`.
+
+    Chunks whose text is already in the manifest are yielded with their stored triplets.
+    Each run of consecutive new or changed chunks is extracted with the triplets of all
+    earlier chunks as context, as in a full build, and recorded in the manifest as it completes.
+    """
+    seen: set[Triplet] = set()
+    stored_triplets = [manifest.lookup(chunk.content) for chunk in chunks]
+    start = 0
+    while start < len(chunks):
+        stored = stored_triplets[start]
+        if stored is not None:
+            seen.update(stored)
+            yield chunks[start], stored, True
+            start += 1
+            continue
+        end = start + 1
+        while end < len(chunks) and stored_triplets[end] is None:
+            end += 1
+        for chunk, chunk_triplets in iter_chunk_triplets(
+            chunks[start:end], extractor, workers=workers, context_tokens=context_tokens, seed_triplets=set(seen)
+        ):
+            manifest.record(chunk.content, chunk_triplets)
+            seen.update(chunk_triplets)
+            yield chunk, chunk_triplets, False
+        start = end
+
+
+def merge_triplets(per_chunk: Iterable[set[Triplet]]) -> List[Triplet]:
+    """Deduplicate per-chunk results into a reproducible order: by first chunk, then by (subject, predicate, object)."""
+    merged: dict[Triplet, None] = {}
+    for chunk_triplets in per_chunk:
+        for triplet in sorted(chunk_triplets, key=lambda t: (t.subject, t.predicate, t.object)):
+            merged.setdefault(triplet, None)
+    return list(merged)
+
+
+def build_networkx_graph(triplets: Iterable[Triplet]) -> nx.DiGraph:
     """Build a NetworkX directed graph from extracted triplets."""
     G = nx.DiGraph()
     
@@ -57,19 +150,80 @@ def build_networkx_graph(triplets: set[Triplet]) -> nx.DiGraph:
     return G
 
 
-def save_triplets_as_jsonl(triplets: set[Triplet], output_file: str = "knowledge_graph_triplets.jsonl"):
+def _triplet_json_line(triplet: Triplet) -> str:
+    return json.dumps({
+        "subject": triplet.subject,
+        "predicate": triplet.predicate,
+        "object": triplet.object
+    }, ensure_ascii=False)
+
+
+def save_triplets_as_jsonl(triplets: Iterable[Triplet], output_file: str = "knowledge_graph_triplets.jsonl"):
     """Save triplets as a JSONL file (one JSON object per line)."""
     with open(output_file, 'w', encoding='utf-8') as f:
         for triplet in triplets:
-            json_line = json.dumps({
-                "subject": triplet.subject,
-                "predicate": triplet.predicate,
-                "object": triplet.object
-            }, ensure_ascii=False)
-            f.write(json_line + '\n')
+            f.write(_triplet_json_line(triplet) + '\n')
     print(f"Triplets saved to {output_file}")
 
 
+class TripletJsonlWriter:
+    """Append-only JSONL writer: each triplet is written once, as soon as it is first seen.
+
+    Lines are flushed after every `write` and fsynced at most every `fsync_interval_s`
+    seconds (and on close), so an interrupted run keeps everything extracted so far
+    without rewriting the file per chunk. With `append=True` the triplets already in the
+    file count as written.
+    """
+
+    def __init__(self, output_file: str = "knowledge_graph_triplets.jsonl", fsync_interval_s: float = 5.0, append: bool = False):
+        from knowledge_graph.jsonl_to_html import load_triplets_from_jsonl
+
+        self.output_file = output_file
+        self.fsync_interval_s = fsync_interval_s
+        self.written: set = (
+            load_triplets_from_jsonl(output_file) if append and os.path.exists(output_file) else set()
+        )
+        self._file = open(output_file, 'a' if append else 'w', encoding='utf-8')
+        self._last_fsync = time.monotonic()
+
+    def write(self, triplets: Iterable[Triplet]) -> List[Triplet]:
+        """Append the triplets not written before; returns them in the order written."""
+        new = [t for t in triplets if t not in self.written]
+        if not new:
+            return new
+        self.written.update(new)
+        self._file.write(''.join(_triplet_json_line(t) + '\n' for t in new))
+        self._file.flush()
+        if time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+            self._fsync()
+        return new
+
+    def _fsync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+            self._fsync()
+            self._file.close()
+
+    def __enter__(self) -> "TripletJsonlWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def save_graph_checkpoint(triplets: Iterable[Triplet], output_file: str = "knowledge_graph.html"):
+    """Build the NetworkX graph from all triplets so far and render it as HTML."""
+    print("\nBuilding NetworkX graph...")
+    G = build_networkx_graph(triplets)
+    print(f"Graph created with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
+    print("\nSaving graph as HTML...")
+    save_graph_as_html(G, output_file)
+
+
 def save_graph_as_html(G: nx.DiGraph, output_file: str = "knowledge_graph.html"):
     """Save the NetworkX graph as an interactive HTML file using pyvis."""
     # Create a pyvis network
@@ -112,7 +266,23 @@ def save_graph_as_html(G: nx.DiGraph, output_file: str = "knowledge_graph.html")
     print("You can open it in your browser to view the interactive graph.")
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract knowledge graph triplets from a markdown file")
+    parser.add_argument("--workers", type=int, default=1, help="Chunks extracted concurrently (1 = serial, full context)")
+    parser.add_argument("--context-tokens", type=int, default=0,
+                        help="Token budget of existing triplets sent with each chunk, e.g. "
+                             f"{DEFAULT_CONTEXT_TOKENS} (default 0 = send all)")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="Also render the graph HTML every N chunks (0 = only at the end)")
+    parser.add_argument("--strategy", choices=["headers_first", "packed"], default="headers_first",
+                        help="headers_first: one chunk per item; packed: merge adjacent items per section up to --target-tokens")
+    parser.add_argument("--target-tokens", type=int, default=DEFAULT_TARGET_TOKENS, help="Chunk size for --strategy packed")
+    parser.add_argument("--manifest", nargs="?", const=DEFAULT_MANIFEST_FILE, default=None,
+                        help="Reuse per-chunk results from this file (default when given without a path: "
+                             f"{DEFAULT_MANIFEST_FILE}); only new or changed chunks are re-extracted")
+    parser.add_argument("--full-rebuild", action="store_true", help="With --manifest, re-extract every chunk")
+    args = parser.parse_args(argv)
+
     # Configure DSPy
     # dspy_configure(get_lm_for_ollama())
     dspy_configure(get_lm_for_model_name(MODEL_NAME_GEMINI_3_5_FLASH, "disable"))
@@ -132,7 +302,7 @@ def main():
     
     # Split markdown into chunks
     print("\nSplitting markdown into chunks...")
-    chunks: List[TextChunk] = split_markdown_into_chunks(text, strategy="headers_first")
+    chunks: Sequence[ChunkLike] = split_markdown_into_spans(text, strategy=args.strategy, target_tokens=args.target_tokens)
     print(f"Split into {len(chunks)} chunks:")
     for chunk in chunks:
         header_info = f" (under: {chunk.header_context})" if chunk.header_context else ""
@@ -141,39 +311,57 @@ def main():
     # Create extractor and extract triplets from each chunk for every prompt
     print(f"\n=== Extracting triplets for prompt 'GENERAL' using model: {dspy.settings.lm.model} ===")
     extractor = TripletExtractor()
-    all_triplets: set[Triplet] = set()
-    
-    for chunk in chunks:
-        print(f"\n  Processing chunk {chunk.chunk_index} ({chunk.chunk_type}, {len(chunk.content)} chars)...")
-        reused_triplets = all_triplets
-        if reused_triplets:
-            print(f"    → Using {len(reused_triplets)} existing triplets as context")
-        chunk_triplets = extract_triplets_from_text(
-            chunk.content,
-            extractor,
-            existing_triplets=reused_triplets
+    per_chunk: List[set[Triplet]] = []
+    context_tokens = args.context_tokens or None
+    manifest: Optional[ExtractionManifest] = None
+    results: Iterator[Tuple[ChunkLike, set[Triplet], bool]]
+    if args.manifest:
+        manifest = ExtractionManifest(
+            args.manifest, extraction_fingerprint(dspy.settings.lm.model, TRIPLET_GENERAL_EXTRACTOR_INSTRUCTIONS)
         )
-        print(f"    → Extracted {len(chunk_triplets)} triplets from this chunk")
-        all_triplets.update(chunk_triplets)
-        
-        print(f"\nTotal extracted {len(all_triplets)} triplets from {len(chunks)} chunks for prompt 'GENERAL':")
-        for i, triplet in enumerate(all_triplets, 1):
-            print(f"  {i}. ({triplet.subject}, {triplet.predicate}, {triplet.object})")
-        
-        # Save triplets as JSONL
-        print("\nSaving triplets as JSONL...")
-        jsonl_file = "knowledge_graph_triplets.jsonl"
-        save_triplets_as_jsonl(all_triplets, jsonl_file)
-        
-        # Build NetworkX graph
-        print("\nBuilding NetworkX graph...")
-        G = build_networkx_graph(all_triplets)
-        print(f"Graph created with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
-        
-        # Save graph as HTML
-        print("\nSaving graph as HTML...")
-        output_file = "knowledge_graph.html"
-        save_graph_as_html(G, output_file)
+        if args.full_rebuild:
+            manifest.retain([])
+        retracted = manifest.retain(chunk.content for chunk in chunks)
+        print(f"Manifest {manifest.path}: {len(manifest)} chunks reusable, {len(retracted)} triplets retracted")
+        results = iter_incremental_chunk_triplets(
+            chunks, extractor, manifest, workers=args.workers, context_tokens=context_tokens
+        )
+    else:
+        results = (
+            (chunk, chunk_triplets, False)
+            for chunk, chunk_triplets in iter_chunk_triplets(
+                chunks, extractor, workers=args.workers, context_tokens=context_tokens
+            )
+        )
+    extracted = 0
+    
+    # The JSONL is rewritten from scratch, so retracted triplets drop out of it; a manifest
+    # is saved even if the run is interrupted, keeping the chunks extracted so far
+    try:
+        with TripletJsonlWriter("knowledge_graph_triplets.jsonl") as writer:
+            for chunk, chunk_triplets, reused in results:
+                per_chunk.append(chunk_triplets)
+                new_triplets = writer.write(merge_triplets([chunk_triplets]))
+                if reused:
+                    continue
+                extracted += 1
+                print(f"\n  Chunk {chunk.chunk_index} ({chunk.chunk_type}, {len(chunk.content)} chars)...")
+                print(f"    → Extracted {len(chunk_triplets)} triplets from this chunk ({len(new_triplets)} new)")
+                for triplet in new_triplets:
+                    print(f"      + ({triplet.subject}, {triplet.predicate}, {triplet.object})")
+            
+                if args.checkpoint_every and extracted % args.checkpoint_every == 0 and len(per_chunk) < len(chunks):
+                    if manifest is not None:
+                        manifest.save()
+                    save_graph_checkpoint(merge_triplets(per_chunk), "knowledge_graph.html")
+    finally:
+        if manifest is not None:
+            manifest.save()
+    all_triplets = merge_triplets(per_chunk)
+    print(f"\nTotal {len(all_triplets)} triplets from {len(chunks)} chunks for prompt 'GENERAL' "
+          f"({extracted} chunks extracted, {len(chunks) - extracted} reused)")
+    print(f"Triplets saved to {writer.output_file}")
+    save_graph_checkpoint(all_triplets, "knowledge_graph.html")
 
 
 if __name__ == "__main__":
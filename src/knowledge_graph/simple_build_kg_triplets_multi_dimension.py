@@ -1,5 +1,9 @@
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
+import argparse
+import contextvars
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor
 import dspy
 import pydantic
 import networkx as nx
@@ -8,34 +12,109 @@ from pyvis.network import Network
 
 from common.utils import get_lm_for_model_name, dspy_configure
 from common.constants import MODEL_NAME_GEMINI_3_5_FLASH
-from knowledge_graph.markdown_splitter import TextChunk, split_markdown_into_chunks
-from knowledge_graph.prompts import MULTI_DIMENSION_PROMPTS
-
-
-# 1. Define the structured output with Pydantic
-class Triplet(pydantic.BaseModel):
+from knowledge_graph.markdown_splitter import DEFAULT_TARGET_TOKENS, TextChunk, split_markdown_into_chunks
+from knowledge_graph.prompts import MULTI_DIMENSION_PROMPTS, TRIPLET_FUSED_DIMENSIONS_INSTRUCTIONS
+from knowledge_graph.simple_build_kg_triplets import (
+    ExistingTriplets,
+    Triplet,
+    TripletExtractionSignature,
+    TripletJsonlWriter,
+    extract_triplets_from_text,
+    save_graph_checkpoint,
+)
+
+
+def normalize_dimension(tag: str) -> str:
+    """Map LM spellings of a dimension tag ('tech_relations', 'Tech Relations', 'TECH') to its MULTI_DIMENSION_PROMPTS key."""
+    key = re.sub(r"[^A-Z0-9]+", "_", tag.upper()).strip("_")
+    if key not in MULTI_DIMENSION_PROMPTS and f"{key}_RELATIONS" in MULTI_DIMENSION_PROMPTS:
+        return f"{key}_RELATIONS"
+    return key
+
+
+class DimensionTriplet(pydantic.BaseModel):
     model_config = {"frozen": True}
     subject: str = pydantic.Field(description="The subject entity of the triplet")
     predicate: str = pydantic.Field(description="The relationship/predicate connecting subject to object")
     object: str = pydantic.Field(description="The object entity of the triplet")
+    dimension: str = pydantic.Field(description=f"Dimension key, one of: {', '.join(MULTI_DIMENSION_PROMPTS)}")
+
+    @pydantic.field_validator("dimension", mode="before")
+    @classmethod
+    def _normalize_dimension(cls, value: str) -> str:
+        return normalize_dimension(value) if isinstance(value, str) else value
 
-class ExistingTriplets(pydantic.BaseModel):
-    existing_triplets: set[Triplet] = pydantic.Field(description="List of knowledge graph triplets")
 
-class TripletsResult(pydantic.BaseModel):
-    triplets: set[Triplet] = pydantic.Field(description="List of knowledge graph triplets")
+class FusedTripletsResult(pydantic.BaseModel):
+    triplets: set[DimensionTriplet] = pydantic.Field(description="List of dimension-tagged knowledge graph triplets")
 
 
-class TripletExtractionSignature(dspy.Signature):
+class FusedTripletExtractionSignature(dspy.Signature):
     text: str = dspy.InputField(desc="The source text to analyze for knowledge graph triplets")
     existing_triplets: ExistingTriplets = dspy.InputField(desc="Previously extracted triplets to relate to, or empty string if none", default="")
-    result: TripletsResult = dspy.OutputField(desc="A JSON object with a 'triplets' field containing a list of extracted triplets")
+    result: FusedTripletsResult = dspy.OutputField(desc="A JSON object with a 'triplets' field containing dimension-tagged triplets")
 
 
-def extract_triplets_from_text(text: str, extractor: dspy.Module, existing_triplets: Optional[set[Triplet]] = None) -> set[Triplet]:
-    """Extract triplets from text using the DSPy extractor, with optional context of existing triplets."""
-    result = extractor(text=text, existing_triplets=ExistingTriplets(existing_triplets=existing_triplets or set()))
-    return result.result.triplets
+# Called with (dimension, chunk, triplets extracted from the chunk for that dimension)
+ChunkCallback = Callable[[str, TextChunk, set[Triplet]], None]
+
+
+def extract_dimension(chunks: List[TextChunk], prompt_key: str, on_chunk: Optional[ChunkCallback] = None) -> set[Triplet]:
+    """Run one dimension's prompt over every chunk (one LM call per chunk)."""
+    extractor = dspy.Predict(TripletExtractionSignature.with_instructions(MULTI_DIMENSION_PROMPTS[prompt_key]))
+    all_triplets: set[Triplet] = set()
+    for chunk in chunks:
+        chunk_triplets = extract_triplets_from_text(chunk.content, extractor, existing_triplets=all_triplets)
+        all_triplets.update(chunk_triplets)
+        if on_chunk:
+            on_chunk(prompt_key, chunk, chunk_triplets)
+    return all_triplets
+
+
+def extract_fused(chunks: List[TextChunk], on_chunk: Optional[ChunkCallback] = None) -> Dict[str, set[Triplet]]:
+    """Extract every dimension with a single LM call per chunk.
+
+    Tags are normalized by `normalize_dimension`; tags that still match no dimension are dropped.
+    """
+    extractor = dspy.Predict(FusedTripletExtractionSignature.with_instructions(TRIPLET_FUSED_DIMENSIONS_INSTRUCTIONS))
+    by_dimension: Dict[str, set[Triplet]] = {key: set() for key in MULTI_DIMENSION_PROMPTS}
+    for chunk in chunks:
+        existing = set().union(*by_dimension.values())
+        result = extractor(text=chunk.content, existing_triplets=ExistingTriplets(existing_triplets=existing))
+        chunk_by_dimension: Dict[str, set[Triplet]] = {key: set() for key in MULTI_DIMENSION_PROMPTS}
+        for tagged in result.result.triplets:
+            if tagged.dimension in chunk_by_dimension:
+                chunk_by_dimension[tagged.dimension].add(
+                    Triplet(subject=tagged.subject, predicate=tagged.predicate, object=tagged.object)
+                )
+        for key, chunk_triplets in chunk_by_dimension.items():
+            by_dimension[key].update(chunk_triplets)
+            if on_chunk:
+                on_chunk(key, chunk, chunk_triplets)
+    return by_dimension
+
+
+def extract_all_dimensions(chunks: List[TextChunk], mode: str = "fused", on_chunk: Optional[ChunkCallback] = None) -> Dict[str, set[Triplet]]:
+    """Triplets per dimension key.
+
+    Modes: "serial" runs the dimensions one after another (the original behaviour),
+    "concurrent" runs them in parallel over the same chunks, and "fused" makes one call
+    per chunk for all dimensions.
+    """
+    if mode == "fused":
+        return extract_fused(chunks, on_chunk)
+    keys = list(MULTI_DIMENSION_PROMPTS)
+    if mode == "concurrent":
+        with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, extract_dimension, chunks, key, on_chunk)
+                for key in keys
+            ]
+            results = [future.result() for future in futures]
+        return dict(zip(keys, results))
+    if mode == "serial":
+        return {key: extract_dimension(chunks, key, on_chunk) for key in keys}
+    raise ValueError(f"Unknown extraction mode: {mode}")
 
 
 def build_networkx_graph(triplets: set[Triplet]) -> nx.DiGraph:
@@ -103,7 +182,17 @@ def save_graph_as_html(G: nx.DiGraph, output_file: str = "knowledge_graph.html")
     print("You can open it in your browser to view the interactive graph.")
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract knowledge graph triplets for each dimension prompt")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="Also render each dimension's graph HTML every N chunks (0 = only at the end)")
+    parser.add_argument("--mode", choices=["fused", "concurrent", "serial"], default="fused",
+                        help="fused: one call per chunk for all dimensions; concurrent/serial: one call per chunk and dimension")
+    parser.add_argument("--strategy", choices=["packed", "headers_first"], default="packed",
+                        help="packed: merge adjacent items per section up to --target-tokens; headers_first: one chunk per item")
+    parser.add_argument("--target-tokens", type=int, default=DEFAULT_TARGET_TOKENS, help="Chunk size for --strategy packed")
+    args = parser.parse_args(argv)
+
     # Configure DSPy
     # dspy_configure(get_lm_for_ollama())
     dspy_configure(get_lm_for_model_name(MODEL_NAME_GEMINI_3_5_FLASH, "disable"))
@@ -123,49 +212,36 @@ def main():
     
     # Split markdown into chunks
     print("\nSplitting markdown into chunks...")
-    chunks: List[TextChunk] = split_markdown_into_chunks(text, strategy="headers_first")
+    chunks: List[TextChunk] = split_markdown_into_chunks(text, strategy=args.strategy, target_tokens=args.target_tokens)
     print(f"Split into {len(chunks)} chunks:")
     for chunk in chunks:
         header_info = f" (under: {chunk.header_context})" if chunk.header_context else ""
         print(f"  Chunk {chunk.chunk_index}: {chunk.chunk_type} ({len(chunk.content)} chars){header_info}")
     
-    # Create extractor and extract triplets from each chunk for the selected prompts
-    for prompt_key, prompt_text in MULTI_DIMENSION_PROMPTS.items():
-        print(f"\n=== Extracting triplets for prompt '{prompt_key}' using model: {dspy.settings.lm.model} ===")
-        extractor = dspy.Predict(TripletExtractionSignature.with_instructions(prompt_text))
-        all_triplets: set[Triplet] = set()
-        
-        for chunk in chunks:
-            print(f"\n  Processing chunk {chunk.chunk_index} ({chunk.chunk_type}, {len(chunk.content)} chars)...")
-            reused_triplets = all_triplets
-            if reused_triplets:
-                print(f"    → Using {len(reused_triplets)} existing triplets as context")
-            chunk_triplets = extract_triplets_from_text(
-                chunk.content,
-                extractor,
-                existing_triplets=reused_triplets
-            )
-            print(f"    → Extracted {len(chunk_triplets)} triplets from this chunk")
-            all_triplets.update(chunk_triplets)
-        
-            print(f"\nTotal extracted {len(all_triplets)} triplets from {len(chunks)} chunks for prompt '{prompt_key}':")
-            for i, triplet in enumerate(all_triplets, 1):
-                print(f"  {i}. ({triplet.subject}, {triplet.predicate}, {triplet.object})")
-            
-            # Save triplets as JSONL
-            print("\nSaving triplets as JSONL...")
-            jsonl_file = f"knowledge_graph_multi_dimension_{prompt_key}.jsonl"
-            save_triplets_as_jsonl(all_triplets, jsonl_file)
-            
-            # Build NetworkX graph
-            print("\nBuilding NetworkX graph...")
-            G = build_networkx_graph(all_triplets)
-            print(f"Graph created with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
-            
-            # Save graph as HTML
-            print("\nSaving graph as HTML...")
-            output_file = f"knowledge_graph_multi_dimension_{prompt_key}.html"
-            save_graph_as_html(G, output_file)
+    # Extract triplets from each chunk for every dimension prompt
+    print(f"\n=== Extracting triplets for {', '.join(MULTI_DIMENSION_PROMPTS)} ({args.mode}) using model: {dspy.settings.lm.model} ===")
+    writers = {key: TripletJsonlWriter(f"knowledge_graph_multi_dimension_{key}.jsonl") for key in MULTI_DIMENSION_PROMPTS}
+    so_far: Dict[str, set[Triplet]] = {key: set() for key in MULTI_DIMENSION_PROMPTS}
+    done: Dict[str, int] = {key: 0 for key in MULTI_DIMENSION_PROMPTS}
+
+    def on_chunk(prompt_key: str, chunk: TextChunk, chunk_triplets: set[Triplet]) -> None:
+        so_far[prompt_key].update(chunk_triplets)
+        done[prompt_key] += 1
+        new_triplets = writers[prompt_key].write(sorted(chunk_triplets, key=lambda t: (t.subject, t.predicate, t.object)))
+        print(f"  [{prompt_key}] chunk {chunk.chunk_index}: {len(chunk_triplets)} triplets ({len(new_triplets)} new)")
+        if args.checkpoint_every and done[prompt_key] % args.checkpoint_every == 0 and done[prompt_key] < len(chunks):
+            save_graph_checkpoint(so_far[prompt_key], f"knowledge_graph_multi_dimension_{prompt_key}.html")
+
+    try:
+        by_dimension = extract_all_dimensions(chunks, args.mode, on_chunk)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for prompt_key, all_triplets in by_dimension.items():
+        print(f"\nTotal extracted {len(all_triplets)} triplets from {len(chunks)} chunks for prompt '{prompt_key}'")
+        print(f"Triplets saved to {writers[prompt_key].output_file}")
+        save_graph_checkpoint(all_triplets, f"knowledge_graph_multi_dimension_{prompt_key}.html")
 
 
 if __name__ == "__main__":
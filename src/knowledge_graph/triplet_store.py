@@ -0,0 +1,283 @@
+"""Columnar triplet store with interned strings and a memory-mappable file format.
+
+A `set[Triplet]` costs several Python objects per triplet and the JSONL file has to be
+parsed line by line into them. `TripletStore` interns entity names (subjects and objects)
+and predicates to integer ids and keeps the triplets as three int32 NumPy arrays, in
+insertion order and without duplicates.
+
+`save` writes a single binary file that `load` memory-maps: the id columns and the string
+tables are read straight from the page cache, and names are decoded only when a triplet
+is materialized. Layout (little-endian, every section 8-byte aligned):
+
+    header      magic b"KGTRIPL1", then uint64 triplets, entities, entity bytes, predicates, predicate bytes
+    columns     int32 subjects[triplets], predicates[triplets], objects[triplets]
+    entities    int64 offsets[entities + 1], UTF-8 bytes
+    predicates  int64 offsets[predicates + 1], UTF-8 bytes
+
+`from_jsonl`/`to_jsonl` read and write the JSONL format of `save_triplets_as_jsonl` and
+`jsonl_to_html.load_triplets_from_jsonl` without building `Triplet` objects.
+
+Example CLI usage:
+    python src/knowledge_graph/triplet_store.py --input knowledge_graph_triplets.jsonl --output knowledge_graph.kgt
+    python src/knowledge_graph/triplet_store.py --input knowledge_graph.kgt --output knowledge_graph_triplets.jsonl
+"""
+
+import argparse
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from knowledge_graph.simple_build_kg_triplets import Triplet
+
+
+MAGIC = b"KGTRIPL1"
+_HEADER = np.dtype([("magic", "S8"), ("counts", "<u8", (5,))])
+_ID = np.dtype("<i4")
+_OFFSET = np.dtype("<i8")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _StringTable:
+    """Interned strings: id -> string from packed UTF-8 (possibly memory-mapped), string -> id on demand."""
+
+    def __init__(self, offsets: Optional[np.ndarray] = None, blob: Optional[np.ndarray] = None):
+        self._offsets = offsets
+        self._blob = blob
+        self._packed = 0 if offsets is None else len(offsets) - 1
+        self._strings: List[Optional[str]] = [None] * self._packed
+        self._ids: Optional[Dict[str, int]] = None if self._packed else {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __getitem__(self, idx: int) -> str:
+        value = self._strings[idx]
+        if value is None:
+            assert self._offsets is not None and self._blob is not None
+            start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+            value = self._strings[idx] = self._blob[start:end].tobytes().decode("utf-8")
+        return value
+
+    def _index(self) -> Dict[str, int]:
+        if self._ids is None:
+            self._ids = {self[i]: i for i in range(len(self))}
+        return self._ids
+
+    def get(self, value: str) -> Optional[int]:
+        return self._index().get(value)
+
+    def intern(self, value: str) -> int:
+        ids = self._index()
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(self._strings)
+            self._strings.append(value)
+        return idx
+
+    def pack(self) -> Tuple[np.ndarray, bytes]:
+        """(offsets, UTF-8 bytes) of every string in id order."""
+        encoded = [self[i].encode("utf-8") for i in range(len(self))]
+        offsets = np.zeros(len(encoded) + 1, dtype=_OFFSET)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return offsets, b"".join(encoded)
+
+
+class TripletStore:
+    """Deduplicated triplets as interned (subject, predicate, object) id columns."""
+
+    def __init__(self) -> None:
+        self.entities = _StringTable()
+        self.predicate_names = _StringTable()
+        self._columns: Tuple[np.ndarray, ...] = tuple(np.empty(0, dtype=_ID) for _ in range(3))
+        self._pending: List[Tuple[int, int, int]] = []
+        self._keys: Optional[set] = set()
+
+    @classmethod
+    def from_triplets(cls, triplets: Iterable["Triplet"]) -> "TripletStore":
+        store = cls()
+        store.add_triplets(triplets)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._columns[0]) + len(self._pending)
+
+    def __iter__(self) -> Iterator["Triplet"]:
+        return (self.triplet(i) for i in range(len(self)))
+
+    def __contains__(self, triplet: "Triplet") -> bool:
+        key = self._key(triplet.subject, triplet.predicate, triplet.object)
+        return key is not None and key in self._key_set()
+
+    @property
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """int32 (subject, predicate, object) id arrays; memory-mapped after `load` until triplets are added."""
+        if self._pending:
+            added = np.array(self._pending, dtype=_ID)
+            self._columns = tuple(np.concatenate([column, added[:, i]]) for i, column in enumerate(self._columns))
+            self._pending = []
+        subjects, predicates, objects = self._columns
+        return subjects, predicates, objects
+
+    @property
+    def subjects(self) -> np.ndarray:
+        return self.columns[0]
+
+    @property
+    def predicates(self) -> np.ndarray:
+        return self.columns[1]
+
+    @property
+    def objects(self) -> np.ndarray:
+        return self.columns[2]
+
+    def _iter_ids(self, block: int = 65536) -> Iterator[Tuple[int, int, int]]:
+        subjects, predicates, objects = self.columns
+        for start in range(0, len(subjects), block):
+            end = start + block
+            yield from zip(subjects[start:end].tolist(), predicates[start:end].tolist(), objects[start:end].tolist())
+
+    def _key(self, subject: str, predicate: str, obj: str) -> Optional[Tuple[int, int, int]]:
+        s, p, o = self.entities.get(subject), self.predicate_names.get(predicate), self.entities.get(obj)
+        return None if s is None or p is None or o is None else (s, p, o)
+
+    def _key_set(self) -> set:
+        if self._keys is None:
+            self._keys = set(self._iter_ids())
+        return self._keys
+
+    def add(self, subject: str, predicate: str, obj: str) -> bool:
+        """Add one triplet; False if it was already stored."""
+        key = (self.entities.intern(subject), self.predicate_names.intern(predicate), self.entities.intern(obj))
+        keys = self._key_set()
+        if key in keys:
+            return False
+        keys.add(key)
+        self._pending.append(key)
+        return True
+
+    def add_triplets(self, triplets: Iterable["Triplet"]) -> int:
+        """Add triplets in order; return how many were new."""
+        return sum(self.add(t.subject, t.predicate, t.object) for t in triplets)
+
+    def triplet(self, idx: int) -> "Triplet":
+        from knowledge_graph.simple_build_kg_triplets import Triplet
+
+        s, p, o = (int(column[idx]) for column in self.columns)
+        return Triplet(subject=self.entities[s], predicate=self.predicate_names[p], object=self.entities[o])
+
+    def to_triplets(self) -> set["Triplet"]:
+        return set(self)
+
+    def with_entity(self, name: str) -> np.ndarray:
+        """Indices of the triplets with `name` as subject or object."""
+        idx = self.entities.get(name)
+        if idx is None:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero((self.subjects == idx) | (self.objects == idx))
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the store in the memory-mappable binary format (see the module docstring)."""
+        path = Path(path)
+        columns = self.columns
+        entity_offsets, entity_blob = self.entities.pack()
+        predicate_offsets, predicate_blob = self.predicate_names.pack()
+        header = np.zeros(1, dtype=_HEADER)
+        header["magic"] = MAGIC
+        header["counts"] = [
+            len(columns[0]), len(entity_offsets) - 1, len(entity_blob), len(predicate_offsets) - 1, len(predicate_blob)
+        ]
+        sections = [
+            header.tobytes(),
+            *(column.astype(_ID, copy=False).tobytes() for column in columns),
+            entity_offsets.tobytes(), entity_blob,
+            predicate_offsets.tobytes(), predicate_blob,
+        ]
+        # Written aside and swapped in, so stores still mapping the old file are unaffected
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as f:
+            for section in sections:
+                f.write(section)
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TripletStore":
+        """Memory-map a saved store; columns and names are paged in as they are read."""
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = np.frombuffer(data, dtype=_HEADER, count=1)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"Not a triplet store file: {path}")
+        count, n_entities, entity_bytes, n_predicates, predicate_bytes = (int(c) for c in header["counts"])
+
+        offset = _align(_HEADER.itemsize)
+
+        def take(dtype: np.dtype, length: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=length, offset=offset)
+            offset = _align(offset + length * dtype.itemsize)
+            return array
+
+        store = cls()
+        store._columns = tuple(take(_ID, count) for _ in range(3))
+        store.entities = _StringTable(take(_OFFSET, n_entities + 1), take(np.dtype(np.uint8), entity_bytes))
+        store.predicate_names = _StringTable(take(_OFFSET, n_predicates + 1), take(np.dtype(np.uint8), predicate_bytes))
+        store._keys = None
+        return store
+
+    @classmethod
+    def from_jsonl(cls, jsonl_path: Union[str, Path], block: int = 65536) -> "TripletStore":
+        """Read a JSONL triplets file (one {subject, predicate, object} object per line)."""
+        path = Path(jsonl_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Triplets file not found: {path}")
+        store = cls()
+        with path.open("r", encoding="utf-8") as f:
+            while raw := list(islice(f, block)):
+                lines = [line for line in raw if line.strip()]
+                # One json.loads per block of lines instead of one per line
+                for data in json.loads("[" + ",".join(lines) + "]"):
+                    store.add(data["subject"], data["predicate"], data["object"])
+        return store
+
+    def to_jsonl(self, output_file: Union[str, Path]) -> Path:
+        """Write the triplets in store order, in the format of `save_triplets_as_jsonl`."""
+        path = Path(output_file)
+        # Each distinct name is JSON-encoded once, not once per triplet
+        entities = [json.dumps(self.entities[i], ensure_ascii=False) for i in range(len(self.entities))]
+        predicates = [json.dumps(self.predicate_names[i], ensure_ascii=False) for i in range(len(self.predicate_names))]
+        with path.open("w", encoding="utf-8") as f:
+            for s, p, o in self._iter_ids():
+                f.write(f'{{"subject": {entities[s]}, "predicate": {predicates[p]}, "object": {entities[o]}}}\n')
+        return path
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert triplets between JSONL and the binary triplet store")
+    parser.add_argument("--input", "-i", required=True, help="JSONL triplets file or .kgt store")
+    parser.add_argument("--output", "-o", required=True, help=".kgt store or JSONL triplets file")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    if Path(args.input).suffix == ".jsonl":
+        store = TripletStore.from_jsonl(args.input)
+        store.save(args.output)
+    else:
+        store = TripletStore.load(args.input)
+        store.to_jsonl(args.output)
+    print(f"Wrote {len(store)} triplets ({len(store.entities)} entities, "
+          f"{len(store.predicate_names)} predicates) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
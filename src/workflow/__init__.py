@@ -14,7 +14,23 @@ from workflow.signatures import (
     AdversarialChallengeSignature,
     OperationalReconciliationSignature,
 )
-from workflow.tools import search_code, read_code_slice, validate_d2_syntax
+from workflow.tools import (
+    search_code,
+    search_code_batch,
+    read_code_slice,
+    git_history,
+    validate_d2_syntax,
+    validate_d2_batch,
+)
+from workflow.retrieval import CodeIndex, CodeRetriever
+from workflow.multi_repo import RepositorySearch
+from workflow.minify import MinifiedContext, minify_code_context
+from workflow.checkpoint import StageCheckpointStore
+from workflow.policy import ExecutionPlan, ExecutionPolicy
+from workflow.trajectory import CompactingReAct, TrajectoryCompactor
+from workflow.memo import ToolMemo
+from workflow.verdict_cache import VerdictCache, VerdictProvenance
+from workflow.tracing import WorkflowTracer
 from workflow.flow import CodeGroundingWorkflow
 
 __all__ = [
@@ -29,7 +45,24 @@ __all__ = [
     "AdversarialChallengeSignature",
     "OperationalReconciliationSignature",
     "search_code",
+    "search_code_batch",
     "read_code_slice",
+    "git_history",
     "validate_d2_syntax",
+    "validate_d2_batch",
+    "CodeIndex",
+    "CodeRetriever",
+    "RepositorySearch",
+    "MinifiedContext",
+    "minify_code_context",
+    "StageCheckpointStore",
+    "ExecutionPlan",
+    "ExecutionPolicy",
+    "CompactingReAct",
+    "TrajectoryCompactor",
+    "ToolMemo",
+    "VerdictCache",
+    "VerdictProvenance",
+    "WorkflowTracer",
     "CodeGroundingWorkflow",
 ]
@@ -0,0 +1,93 @@
+"""Offline benchmark: prompt tokens per inquiry with full vs compact stage inputs.
+
+Formats the exact messages the JSONAdapter would send for each stage of the sample
+bidder-deletion inquiry (no LM call is made) and compares estimated prompt tokens.
+
+Usage:
+    uv run benchcompactinputs
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import dspy
+
+from common.tokens import estimate_tokens
+from workflow.compact import STAGE_EXCLUDED_FIELDS, render_compact
+from workflow.fixtures import sample_stage_outputs
+from workflow.fixtures import SAMPLE_CODE_CONTEXT, SAMPLE_CONTEXT, SAMPLE_QUESTION
+from workflow.signatures import (
+    AdversarialChallengeSignature,
+    CompactAdversarialChallengeSignature,
+    CompactOperationalReconciliationSignature,
+    OperationalReconciliationSignature,
+    PrimaryEvidenceDiscoverySignature,
+    StakeholderIngressSignature,
+)
+
+
+def prompt_tokens(signature: type[dspy.Signature], inputs: Dict[str, Any], chain_of_thought: bool = True) -> int:
+    """Estimate prompt tokens of the messages the JSONAdapter builds for one stage call."""
+    predictor = dspy.ChainOfThought(signature) if chain_of_thought else dspy.Predict(signature)
+    active_signature = predictor.predict.signature if chain_of_thought else predictor.signature
+    messages = dspy.JSONAdapter().format(active_signature, demos=[], inputs=inputs)
+    return sum(estimate_tokens(str(m["content"])) for m in messages)
+
+
+def measure(max_field_chars: int | None = None) -> List[Tuple[str, int, int]]:
+    """Return (stage, full_tokens, compact_tokens) rows for the sample inquiry."""
+    inquiry, baseline, ledger, _ = sample_stage_outputs()
+    models = {"inquiry": inquiry, "baseline": baseline, "ledger": ledger}
+
+    def compact(stage: str, *names: str) -> Dict[str, str]:
+        excluded = STAGE_EXCLUDED_FIELDS[stage]
+        return {
+            name: render_compact(models[name], exclude=excluded.get(name, frozenset()), max_field_chars=max_field_chars)
+            for name in names
+        }
+
+    ingress = prompt_tokens(
+        StakeholderIngressSignature,
+        {"raw_question": SAMPLE_QUESTION, "operational_context": SAMPLE_CONTEXT},
+        chain_of_thought=False,
+    )
+    discovery = prompt_tokens(PrimaryEvidenceDiscoverySignature, {"inquiry": inquiry, "code_context": SAMPLE_CODE_CONTEXT})
+    return [
+        ("1. ingress", ingress, ingress),
+        ("2. discovery", discovery, discovery),
+        (
+            "3. adversarial",
+            prompt_tokens(AdversarialChallengeSignature,
+                          {"inquiry": inquiry, "baseline": baseline, "code_context": SAMPLE_CODE_CONTEXT}),
+            prompt_tokens(CompactAdversarialChallengeSignature,
+                          {**compact("adversarial", "inquiry", "baseline"), "code_context": SAMPLE_CODE_CONTEXT}),
+        ),
+        (
+            "4. reconcile",
+            prompt_tokens(OperationalReconciliationSignature,
+                          {"inquiry": inquiry, "baseline": baseline, "ledger": ledger}),
+            prompt_tokens(CompactOperationalReconciliationSignature,
+                          compact("reconcile", "inquiry", "baseline", "ledger")),
+        ),
+    ]
+
+
+def _print_table(title: str, rows: List[Tuple[str, int, int]]) -> None:
+    print(f"\n{title}")
+    print(f"{'Stage':<16}{'Full':>8}{'Compact':>10}{'Saved':>8}")
+    for stage, full, compact in rows:
+        print(f"{stage:<16}{full:>8}{compact:>10}{full - compact:>8}")
+    total_full = sum(r[1] for r in rows)
+    total_compact = sum(r[2] for r in rows)
+    saved_pct = 100 * (total_full - total_compact) / total_full if total_full else 0.0
+    print(f"{'per inquiry':<16}{total_full:>8}{total_compact:>10}{total_full - total_compact:>8}  ({saved_pct:.1f}% fewer)")
+
+
+def main() -> None:
+    print("Estimated prompt tokens per inquiry (~4 chars/token, JSONAdapter formatting)")
+    _print_table("Compact inputs (empty fields and fields the stage already has dropped):", measure())
+    for max_chars in (200, 120):
+        _print_table(f"Compact inputs + long fields summarized at {max_chars} chars:", measure(max_field_chars=max_chars))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Local checkpoint store for the 4-stage Code Grounding workflow.
+
+Every stage output is persisted as JSON under `<directory>/<inquiry_id>/<stage>-<input_hash>.json`,
+together with the exact inputs that produced it. Because each stage's hash covers its
+upstream outputs, a rerun with the same inputs resumes after the last completed stage,
+and any recorded stage can be replayed for prompt iteration. The hash also covers a
+fingerprint of the stage's signatures and LM (`stage_fingerprint`), so editing a prompt
+or switching models never replays an output produced before the change.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from workflow.schemas import InquiryRecord, PrimaryBaseline, ProposalLedger, ReconciledVerdict
+
+
+STAGES = ("ingress", "discovery", "adversarial", "reconcile")
+
+# Stage inputs that are Pydantic models and must be rebuilt when replaying
+STAGE_INPUT_MODELS: Dict[str, Type[BaseModel]] = {
+    "inquiry": InquiryRecord,
+    "baseline": PrimaryBaseline,
+    "ledger": ProposalLedger,
+}
+
+STAGE_OUTPUT_MODELS: Dict[str, Type[BaseModel]] = {
+    "ingress": InquiryRecord,
+    "discovery": PrimaryBaseline,
+    "adversarial": ProposalLedger,
+    "reconcile": ReconciledVerdict,
+}
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _jsonable(value: Any) -> Any:
+    return value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+
+
+def stage_fingerprint(module: Any, lm: Any = None, adapter: Any = None) -> str:
+    """Fingerprint of everything besides its inputs that shapes a stage's output.
+
+    Covers each predictor's signature (instructions, fields and the JSON schema of
+    Pydantic-typed fields), the LM model name and the adapter class.
+    """
+    parts: List[str] = []
+    named_predictors = getattr(module, "named_predictors", None)
+    for name, predictor in named_predictors() if callable(named_predictors) else []:
+        signature = predictor.signature
+        parts.append(f"{name}:{signature!r}")
+        for field in signature.fields.values():
+            if isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+                parts.append(json.dumps(field.annotation.model_json_schema(), sort_keys=True))
+    parts.append(getattr(lm, "model", None) or "")
+    parts.append(type(adapter).__name__ if adapter is not None else "")
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class StageCheckpointStore:
+    """Filesystem store of stage outputs keyed by inquiry id and stage input hash."""
+
+    def __init__(self, directory: str = ".workflow_checkpoints"):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def input_hash(**inputs: Any) -> str:
+        """Stable hash over a stage's inputs (Pydantic models are hashed by their JSON dump)."""
+        payload = json.dumps({k: _jsonable(v) for k, v in inputs.items()}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _index_path(self, stage: str, input_hash: str) -> Path:
+        return self.directory / "_index" / f"{stage}-{input_hash}"
+
+    def save(
+        self,
+        stage: str,
+        input_hash: str,
+        inputs: Dict[str, Any],
+        output: BaseModel,
+        inquiry_id: Optional[str] = None,
+        module: str = "",
+        variant: str = "",
+    ) -> Path:
+        """Atomically persist a stage output alongside the inputs that produced it.
+
+        `module` and `variant` record which stage module produced the output so it can be
+        replayed on the same one. The inquiry id defaults to the output's own.
+        """
+        inquiry_id = inquiry_id or getattr(output, "inquiry_id", "unknown")
+        path = self.directory / inquiry_id / f"{stage}-{input_hash}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "stage": stage,
+            "input_hash": input_hash,
+            "inquiry_id": inquiry_id,
+            "module": module,
+            "variant": variant,
+            "saved_at": time.time(),
+            "inputs": {k: _jsonable(v) for k, v in inputs.items()},
+            "output": output.model_dump(mode="json"),
+        }
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+        # Lets a stage that runs before the inquiry id is known (ingress) find its checkpoint
+        index_path = self._index_path(stage, input_hash)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        index_path.write_text(inquiry_id, encoding="utf-8")
+        return path
+
+    def load(
+        self, stage: str, input_hash: str, model_cls: Type[ModelT], inquiry_id: Optional[str] = None
+    ) -> Optional[ModelT]:
+        """Return the stored output for these exact stage inputs, if any.
+
+        Looks only in the inquiry's own directory; without `inquiry_id` the inquiry is
+        resolved from the input hash index written by `save`.
+        """
+        if inquiry_id is None:
+            index_path = self._index_path(stage, input_hash)
+            if not index_path.exists():
+                return None
+            inquiry_id = index_path.read_text(encoding="utf-8").strip()
+        path = self.directory / inquiry_id / f"{stage}-{input_hash}.json"
+        if not path.exists():
+            return None
+        record = json.loads(path.read_text(encoding="utf-8"))
+        return model_cls.model_validate(record["output"])
+
+    def latest_record(self, inquiry_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        """Return the most recently saved raw record of `stage` for an inquiry."""
+        candidates: List[Path] = list((self.directory / inquiry_id).glob(f"{stage}-*.json"))
+        if not candidates:
+            return None
+        newest = max(candidates, key=lambda p: p.stat().st_mtime)
+        record: Dict[str, Any] = json.loads(newest.read_text(encoding="utf-8"))
+        return record
+
+    @staticmethod
+    def restore_inputs(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild the stage inputs of a record, re-validating Pydantic-typed fields.
+
+        Inputs recorded as strings (e.g. compact JSON renderings) are passed through unchanged.
+        """
+        return {
+            name: STAGE_INPUT_MODELS[name].model_validate(value)
+            if name in STAGE_INPUT_MODELS and isinstance(value, dict) else value
+            for name, value in record["inputs"].items()
+        }
@@ -0,0 +1,95 @@
+"""Compact rendering of Pydantic stage inputs for the later workflow stages.
+
+Stages 3 and 4 re-send the InquiryRecord, PrimaryBaseline and ProposalLedger produced
+upstream. In compact mode these are rendered as minified JSON that omits empty
+(empty-default) fields, drops fields the stage already receives in another form
+(`STAGE_EXCLUDED_FIELDS`), and optionally truncates very long strings, so the same
+content is tokenized fewer times per inquiry.
+Non-empty defaults (e.g. stakes_severity="medium") are kept: without the schema in the
+prompt the LM could not restore them.
+"""
+
+import json
+from typing import Any, Dict, FrozenSet, Optional, Type
+
+import dspy
+from pydantic import BaseModel
+
+
+# Stage -> input -> top-level fields left out of its compact rendering:
+# - inquiry_id everywhere but the inquiry itself, which carries it;
+# - Stage 3 reviews against code_context: the baseline's call tree and citations trace that
+#   same code (and diagram_d2 restates the tree), and the inquiry's stakeholder framing only
+#   matters to the Stage 4 verdict.
+STAGE_EXCLUDED_FIELDS: Dict[str, Dict[str, FrozenSet[str]]] = {
+    "adversarial": {
+        "inquiry": frozenset({"stakeholder", "operational_context"}),
+        "baseline": frozenset({"inquiry_id", "call_tree", "code_citations"}),
+    },
+    "reconcile": {
+        "baseline": frozenset({"inquiry_id"}),
+        "ledger": frozenset({"inquiry_id"}),
+    },
+}
+
+# Fields whose exact text later stages must check or rewrite, so they are never summarized
+SUMMARY_EXEMPT_FIELDS: FrozenSet[str] = frozenset({"diagram_d2", "reconciled_diagram_d2"})
+
+
+def _summarize(text: str, max_chars: Optional[int]) -> str:
+    """Keep the head of an over-long string and note how much was elided."""
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}… [+{len(text) - max_chars} chars]"
+
+
+def _prune(value: Any, max_chars: Optional[int]) -> Any:
+    """Recursively drop empty containers/strings and summarize long strings."""
+    if isinstance(value, dict):
+        pruned = {k: _prune(v, None if k in SUMMARY_EXEMPT_FIELDS else max_chars) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in ("", [], {}, None)}
+    if isinstance(value, list):
+        return [_prune(v, max_chars) for v in value]
+    if isinstance(value, str):
+        return _summarize(value, max_chars)
+    return value
+
+
+def compact_dump(
+    model: BaseModel,
+    exclude: FrozenSet[str] = frozenset(),
+    max_field_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Dump a model without empty values or the `exclude`d top-level fields."""
+    data = model.model_dump(mode="json", exclude=set(exclude))
+    pruned: Dict[str, Any] = _prune(data, max_field_chars)
+    return pruned
+
+
+def render_compact(
+    model: BaseModel,
+    exclude: FrozenSet[str] = frozenset(),
+    max_field_chars: Optional[int] = None,
+) -> str:
+    """Render a model as minified compact JSON for use as a signature input."""
+    return json.dumps(compact_dump(model, exclude, max_field_chars), ensure_ascii=False, separators=(",", ":"))
+
+
+def compact_signature(
+    signature: Type[dspy.Signature],
+    input_models: Dict[str, Type[BaseModel]],
+    excluded: Optional[Dict[str, FrozenSet[str]]] = None,
+) -> Type[dspy.Signature]:
+    """Derive a signature whose Pydantic-typed inputs are passed as compact JSON strings.
+
+    Fields listed in `excluded` are named in the input description so the LM knows they
+    were left out rather than empty.
+    """
+    compacted = signature
+    for name, model_cls in input_models.items():
+        original_desc = signature.input_fields[name].json_schema_extra.get("desc", "")
+        omitted = sorted((excluded or {}).get(name, frozenset()))
+        without = f" without {', '.join(omitted)}" if omitted else ""
+        desc = f"{original_desc} (compact {model_cls.__name__} JSON{without})"
+        compacted = compacted.with_updated_fields(name, type_=str, desc=desc)
+    return compacted
@@ -0,0 +1,139 @@
+"""Memoizing D2 diagram validator shared by the workflow tools.
+
+The d2 CLI has no persistent/server mode, so a "warm" compiler is emulated by
+memoizing results per normalized diagram hash (ReAct loops tend to re-validate
+near-identical diagrams), probing for the binary once, and compiling distinct
+diagrams of a batch concurrently.
+"""
+
+import hashlib
+import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_TIMEOUT_S = 3.0
+
+
+def normalize_d2(d2_code: str) -> str:
+    """Normalize insignificant whitespace so near-identical diagrams share a cache entry."""
+    return "\n".join(line.rstrip() for line in d2_code.strip().splitlines())
+
+
+def heuristic_d2_errors(d2_code: str) -> Optional[str]:
+    """Cheap structural checks that do not need the d2 compiler; returns a message or None."""
+    if not d2_code or not d2_code.strip():
+        return "Warning: Empty D2 diagram."
+
+    # Heuristic check for common syntax errors
+    open_braces = d2_code.count("{")
+    close_braces = d2_code.count("}")
+    if open_braces != close_braces:
+        return f"D2 Syntax Error: Unbalanced curly braces ({open_braces} open vs {close_braces} close)."
+
+    # Check for unescaped template placeholders (e.g. {node})
+    if re.search(r"\{[a-zA-Z_]+\}", d2_code):
+        return "D2 Syntax Error: Unescaped template placeholder detected (e.g. '{node}')."
+    return None
+
+
+class D2Validator:
+    """Validates D2 source with a hash-keyed LRU result cache and batch support."""
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE, timeout_s: float = DEFAULT_TIMEOUT_S, max_workers: int = 4):
+        self.cache_size = cache_size
+        self.timeout_s = timeout_s
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._d2_binary: Optional[str] = shutil.which("d2")
+
+    @staticmethod
+    def diagram_key(d2_code: str) -> str:
+        return hashlib.sha256(normalize_d2(d2_code).encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _store(self, key: str, result: str) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _compile(self, d2_code: str) -> Tuple[str, bool]:
+        """Run heuristics, then the d2 compiler when it is installed.
+
+        Returns (message, cacheable). A d2 run that times out or cannot start falls back to
+        the heuristic verdict, which is not cached so the next call compiles again.
+        """
+        heuristic_error = heuristic_d2_errors(d2_code)
+        if heuristic_error is not None:
+            return heuristic_error, True
+        if self._d2_binary is None:
+            return "D2 syntax check passed (heuristic validation).", True
+        try:
+            res = subprocess.run(
+                [self._d2_binary, "-", "/dev/null"],
+                input=d2_code,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout_s
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return "D2 syntax check passed (heuristic validation).", False
+        if res.returncode == 0:
+            return "Valid D2 syntax (verified with d2 compiler).", True
+        return f"D2 Compilation Warning: {res.stderr.strip()}", True
+
+    def validate(self, d2_code: str) -> str:
+        """Validate one diagram, reusing the cached result for an identical normalized diagram."""
+        key = self.diagram_key(d2_code)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        result, cacheable = self._compile(d2_code)
+        if cacheable:
+            self._store(key, result)
+        return result
+
+    def validate_many(self, diagrams: List[str]) -> List[str]:
+        """Validate several diagrams in one call; distinct uncached diagrams compile concurrently."""
+        keys = [self.diagram_key(d) for d in diagrams]
+        results: Dict[str, str] = {}
+        pending: Dict[str, str] = {}
+        for key, diagram in zip(keys, diagrams):
+            if key in results or key in pending:
+                continue
+            cached = self._cached(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                pending[key] = diagram
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                compiled = dict(zip(pending, executor.map(self._compile, pending.values())))
+            for key, (result, cacheable) in compiled.items():
+                if cacheable:
+                    self._store(key, result)
+                results[key] = result
+        return [results[key] for key in keys]
+
+
+DEFAULT_D2_VALIDATOR = D2Validator()
@@ -0,0 +1,145 @@
+"""Sample bidder-deletion inquiry and representative outputs for each of its stages.
+
+Used by the CLI demo and by offline benchmarks and harnesses that need realistic
+inputs and Pydantic payloads without calling an LM.
+"""
+
+from typing import Tuple
+
+from workflow.schemas import (
+    CallTree,
+    InquiryRecord,
+    PrimaryBaseline,
+    Proposal,
+    ProposalLedger,
+    ReconciledVerdict,
+)
+
+
+SAMPLE_QUESTION = "Does deleting a bidder in campaign manager automatically pause active Google Ads campaigns in shopping ad automation?"
+SAMPLE_CONTEXT = """
+Urgent incident investigation: Stakeholders observed that deleting a bidder record from the database
+did not immediately pause live bidding campaigns on Google Ads. Need verifiable code trace of the deletion event flow.
+"""
+
+SAMPLE_CODE_CONTEXT = """
+// BidderDeactivationListener.java
+@EventListener
+public void onBidderDeleted(BidderDeleteEvent event) {
+    Long bidderId = event.getBidderId();
+    // Soft delete: sets active = false
+    bidderRepository.markInactive(bidderId);
+    // NOTICE: Google Ads API campaign pause is handled via async cron exporter every 15 minutes,
+    // NOT via synchronous event listener!
+    log.info("Bidder {} marked inactive. Sync queue updated.", bidderId);
+}
+
+// GoogleAdsCampaignSyncJob.java
+@Scheduled(fixedRate = 900_000)
+public void syncPausedCampaigns() {
+    List<Bidder> inactiveBidders = bidderRepository.findAllByActiveFalseAndCampaignsPausedFalse();
+    for (Bidder bidder : inactiveBidders) {
+        googleAdsClient.pauseCampaignsForBidder(bidder.getExternalId());
+        bidder.setCampaignsPaused(true);
+    }
+}
+"""
+
+SAMPLE_DIAGRAM_D2 = """direction: right
+api: CampaignManager API
+listener: BidderDeactivationListener
+repo: BidderRepository {shape: cylinder}
+job: GoogleAdsCampaignSyncJob
+ads: Google Ads API {shape: cloud}
+
+api -> listener: BidderDeleteEvent
+listener -> repo: markInactive(bidderId)
+job -> repo: findAllByActiveFalseAndCampaignsPausedFalse() every 15 min
+job -> ads: pauseCampaignsForBidder(externalId)
+job -> repo: setCampaignsPaused(true)
+"""
+
+
+def sample_inquiry(inquiry_id: str = "INQ-001") -> InquiryRecord:
+    return InquiryRecord(
+        inquiry_id=inquiry_id,
+        stakeholder="Incident Commander",
+        raw_question=SAMPLE_QUESTION,
+        operational_context=SAMPLE_CONTEXT.strip(),
+        target_systems=["campaign-manager", "shopping-ad-automation", "google-ads-sync"],
+        stakes_severity="high",
+    )
+
+
+def sample_stage_outputs(inquiry_id: str = "INQ-001") -> Tuple[InquiryRecord, PrimaryBaseline, ProposalLedger, ReconciledVerdict]:
+    """Return one plausible output per stage for the sample bidder-deletion inquiry."""
+    inquiry = sample_inquiry(inquiry_id)
+    baseline = PrimaryBaseline(
+        inquiry_id=inquiry_id,
+        call_tree=CallTree(
+            entry_point="BidderDeactivationListener.onBidderDeleted(BidderDeleteEvent)",
+            intermediate_services=["BidderRepository", "GoogleAdsCampaignSyncJob"],
+            event_publishers=[],
+            leaf_mutations=[
+                "bidderRepository.markInactive(bidderId) sets active=false",
+                "googleAdsClient.pauseCampaignsForBidder(externalId)",
+                "bidder.setCampaignsPaused(true)",
+            ],
+        ),
+        git_intent_summary=(
+            "Soft delete was introduced to keep bidder history; campaign pausing was moved to a "
+            "scheduled exporter to batch Google Ads API calls and respect rate limits."
+        ),
+        code_citations=[
+            "BidderDeactivationListener.java:3",
+            "BidderDeactivationListener.java:6",
+            "BidderDeactivationListener.java:7",
+            "GoogleAdsCampaignSyncJob.java:2",
+            "GoogleAdsCampaignSyncJob.java:4",
+            "GoogleAdsCampaignSyncJob.java:6",
+        ],
+        baseline_summary=(
+            "Deleting a bidder only marks it inactive synchronously. Campaigns on Google Ads are paused "
+            "asynchronously by GoogleAdsCampaignSyncJob, which runs every 15 minutes, so live campaigns can "
+            "keep bidding for up to 15 minutes after deletion."
+        ),
+        diagram_d2=SAMPLE_DIAGRAM_D2,
+    )
+    ledger = ProposalLedger(
+        inquiry_id=inquiry_id,
+        proposals=[
+            Proposal(
+                proposal_id="PROP-001",
+                category="race-condition",
+                target_symbol="GoogleAdsCampaignSyncJob.syncPausedCampaigns",
+                failing_scenario="A bidder re-activated between markInactive and the next sync still gets paused.",
+                code_evidence="GoogleAdsCampaignSyncJob.java:3 reads inactive bidders without a version check",
+                suggested_revision="State that pausing is eventually consistent and re-check active before pausing.",
+            ),
+            Proposal(
+                proposal_id="PROP-002",
+                category="inactive-bypass",
+                target_symbol="googleAdsClient.pauseCampaignsForBidder",
+                failing_scenario="If the Google Ads call throws, campaignsPaused stays false and the bidder is retried forever.",
+                code_evidence="GoogleAdsCampaignSyncJob.java:5-6 has no error handling",
+                suggested_revision="Add residual risk: failed pauses are retried every 15 minutes without alerting.",
+            ),
+        ],
+    )
+    verdict = ReconciledVerdict(
+        inquiry_id=inquiry_id,
+        adopted_proposals=["PROP-001", "PROP-002"],
+        rejected_proposals=[],
+        certainty_score=4,
+        residual_risks=["Google Ads API failures silently delay pausing", "Up to 15 minutes of continued bidding"],
+        plain_language_verdict=(
+            "No. Deleting a bidder does not pause Google Ads campaigns immediately; a scheduled job pauses "
+            "them within roughly 15 minutes."
+        ),
+        actionable_decision_matrix=(
+            "1. Pause campaigns manually for urgent deletions. 2. Add alerting on sync failures. "
+            "3. Consider a synchronous pause call in the delete listener."
+        ),
+        reconciled_diagram_d2=SAMPLE_DIAGRAM_D2,
+    )
+    return inquiry, baseline, ledger, verdict
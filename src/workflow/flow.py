@@ -7,9 +7,25 @@ Orchestrates the 4-stage lifecycle:
 4. Operational Reconciliation (Calibrated stakeholder verdict)
 """
 
-from typing import List, Optional, Callable
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from typing import Any
+
 import dspy
+from pydantic import BaseModel
 
+from workflow.checkpoint import (
+    STAGE_OUTPUT_MODELS,
+    StageCheckpointStore,
+    stage_fingerprint,
+)
+from workflow.compact import STAGE_EXCLUDED_FIELDS, render_compact
+from workflow.memo import ToolMemo
+from workflow.minify import minify_code_context
+from workflow.multi_repo import RepositorySearch
+from workflow.policy import FULL_PIPELINE_POLICY, ExecutionPlan, ExecutionPolicy
+from workflow.retrieval import CodeRetriever, derive_search_terms
 from workflow.schemas import (
     InquiryRecord,
     PrimaryBaseline,
@@ -17,35 +33,123 @@ from workflow.schemas import (
     ReconciledVerdict,
 )
 from workflow.signatures import (
-    StakeholderIngressSignature,
-    PrimaryEvidenceDiscoverySignature,
     AdversarialChallengeSignature,
+    CompactAdversarialChallengeSignature,
+    CompactOperationalReconciliationSignature,
     OperationalReconciliationSignature,
+    PrimaryEvidenceDiscoverySignature,
+    StakeholderIngressSignature,
 )
-from workflow.tools import search_code, read_code_slice, validate_d2_syntax
+from workflow.tools import (
+    git_history,
+    read_code_slice,
+    search_code,
+    search_code_batch,
+    validate_d2_batch,
+    validate_d2_syntax,
+)
+from workflow.tracing import WorkflowTracer
+from workflow.trajectory import CompactingReAct, TrajectoryCompactor
+from workflow.verdict_cache import VerdictCache
+
+# Stage name -> (module attribute, output field of its prediction)
+STAGE_MODULES: dict[str, tuple[str, str]] = {
+    "ingress": ("ingress", "inquiry"),
+    "discovery": ("discovery", "baseline"),
+    "adversarial": ("adversarial_reviewer", "ledger"),
+    "reconcile": ("reconciler", "verdict"),
+}
+
+# Weight of the newest full-review duration in the running latency reference
+REVIEW_LATENCY_EMA_ALPHA = 0.3
+
+
+@contextmanager
+def _timed(timings: dict[str, float], stage: str, tracer: WorkflowTracer | None = None) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        if tracer is None:
+            yield
+        else:
+            with tracer.span(stage):
+                yield
+    finally:
+        timings[stage] = time.perf_counter() - start
 
 
 class CodeGroundingWorkflow(dspy.Module):
     """Declarative 4-stage DSPy module for verifiable code-grounded Q&A."""
 
-    def __init__(self, tools: Optional[List[Callable]] = None, use_react: bool = False):
+    def __init__(
+        self,
+        tools: list[Callable] | None = None,
+        use_react: bool = False,
+        retriever: CodeRetriever | None = None,
+        checkpoint_store: StageCheckpointStore | None = None,
+        compact_inputs: bool = False,
+        max_field_chars: int | None = None,
+        policy: ExecutionPolicy | None = None,
+        review_lm: dspy.LM | None = None,
+        trajectory_compactor: TrajectoryCompactor | None = None,
+        tool_memo: ToolMemo | None = None,
+        verdict_cache: VerdictCache | None = None,
+        tracer: WorkflowTracer | None = None,
+        repositories: list[str] | None = None,
+        minify_context: bool = False,
+    ):
         super().__init__()
         self.use_react = use_react
-        active_tools = tools if tools is not None else [search_code, read_code_slice, validate_d2_syntax]
+        # Fills an empty code_context with BM25-ranked slices under a token budget
+        self.retriever = retriever
+        # Persists each stage output so reruns resume after the last completed stage
+        self.checkpoint_store = checkpoint_store
+        # Stages 3/4 receive upstream models as compact JSON (see workflow.compact)
+        self.compact_inputs = compact_inputs
+        self.max_field_chars = max_field_chars
+        # Severity -> Stage 3 review mode; review_lm backs the 'cheap' mode
+        self.policy = policy if policy is not None else FULL_PIPELINE_POLICY
+        self.review_lm = review_lm
+        self._review_latency_reference: float | None = None
+        # Bounds the trajectory ReAct re-sends each iteration (use_react only)
+        self.trajectory_compactor = trajectory_compactor
+        # Strips comments/imports/unrelated method bodies from code_context, keeping line numbers
+        self.minify_context = minify_context
+        # Records stage, LM and tool spans (export with tracer.export_chrome_trace)
+        self.tracer = tracer
+        # Answers near-duplicate questions about the same code_context from earlier runs
+        self.verdict_cache = verdict_cache
+        # Shares tool results across the ReAct stages of one run (a fresh cache per forward)
+        self.tool_memo = tool_memo
+        active_tools = tools if tools is not None else [
+            search_code, search_code_batch, read_code_slice, git_history, validate_d2_syntax, validate_d2_batch
+        ]
+        # Cross-service search over every repository root in one tool call, ranked by the inquiry's systems
+        self.repository_search = RepositorySearch(repositories) if repositories else None
+        if self.repository_search is not None:
+            active_tools = [*active_tools, self.repository_search.as_tool()]
+        if tool_memo is not None:
+            active_tools = [tool_memo.wrap(tool) for tool in active_tools]
 
         # Stage 1: Ingress & Normalization
         self.ingress = dspy.Predict(StakeholderIngressSignature)
 
+        adversarial_signature = CompactAdversarialChallengeSignature if compact_inputs else AdversarialChallengeSignature
+        reconciliation_signature = (
+            CompactOperationalReconciliationSignature if compact_inputs else OperationalReconciliationSignature
+        )
+
         # Stage 2: Forward Evidence Discovery
         if self.use_react:
-            self.discovery = dspy.ReAct(PrimaryEvidenceDiscoverySignature, tools=active_tools)
-            self.adversarial_reviewer = dspy.ReAct(AdversarialChallengeSignature, tools=active_tools)
+            self.discovery = self._react(PrimaryEvidenceDiscoverySignature, active_tools)
+            self.adversarial_reviewer = self._react(adversarial_signature, active_tools)
         else:
             self.discovery = dspy.ChainOfThought(PrimaryEvidenceDiscoverySignature)
-            self.adversarial_reviewer = dspy.ChainOfThought(AdversarialChallengeSignature)
+            self.adversarial_reviewer = dspy.ChainOfThought(adversarial_signature)
+        # Stage 3 (shrunk): single-shot review without reasoning or tool loop
+        self.adversarial_reviewer_lite = dspy.Predict(adversarial_signature)
 
         # Stage 4: Reconciliation & Calibrated Verdict
-        self.reconciler = dspy.ChainOfThought(OperationalReconciliationSignature)
+        self.reconciler = dspy.ChainOfThought(reconciliation_signature)
 
     def forward(
         self,
@@ -54,41 +158,216 @@ class CodeGroundingWorkflow(dspy.Module):
         code_context: str = ""
     ) -> dspy.Prediction:
         """Execute the 4-stage pipeline sequentially."""
+        if self.tracer is None:
+            return self._execute(raw_question, operational_context, code_context)
+        with (
+            dspy.context(callbacks=[*dspy.settings.callbacks, self.tracer]),
+            self.tracer.span("workflow", category="workflow"),
+        ):
+            return self._execute(raw_question, operational_context, code_context)
+
+    def _execute(self, raw_question: str, operational_context: str, code_context: str) -> dspy.Prediction:
+        # Tool results and memo stats are scoped to this run, even when runs share the workflow
+        if self.tool_memo is None:
+            return self._run_pipeline(raw_question, operational_context, code_context)
+        with self.tool_memo.run():
+            return self._run_pipeline(raw_question, operational_context, code_context)
+
+    def _run_pipeline(self, raw_question: str, operational_context: str, code_context: str) -> dspy.Prediction:
+        timings: dict[str, float] = {}
 
         # 1. Ingress
-        ingress_pred = self.ingress(
-            raw_question=raw_question,
-            operational_context=operational_context
-        )
-        inquiry: InquiryRecord = ingress_pred.inquiry
+        with _timed(timings, "ingress", self.tracer):
+            inquiry: InquiryRecord = self._run_stage(
+                "ingress",
+                raw_question=raw_question,
+                operational_context=operational_context
+            )
+        plan = self.policy.plan_for(inquiry, cheap_model=getattr(self.review_lm, "model", None))
+
+        grounded_code_context = self._prepare_code_context(code_context, inquiry)
+        # Only runs grounded in a concrete code context are cached: live repository searches may change.
+        # The key needs ingress' target systems, so a hit saves stages 2-4.
+        verdict_cache = self.verdict_cache if grounded_code_context else None
+        if verdict_cache is not None:
+            cached = verdict_cache.lookup(
+                raw_question, operational_context, inquiry.target_systems, grounded_code_context
+            )
+            if self.tracer is not None:
+                self.tracer.annotate(verdict_cache_hit=cached is not None)
+            if cached is not None:
+                return dspy.Prediction(code_context=grounded_code_context, **dict(cached))
 
         # 2. Primary Evidence Discovery (Forward tracing)
-        effective_code_context = code_context if code_context else f"Repository search for inquiry {inquiry.inquiry_id}"
-        discovery_pred = self.discovery(
-            inquiry=inquiry,
-            code_context=effective_code_context
-        )
-        baseline: PrimaryBaseline = discovery_pred.baseline
+        effective_code_context = grounded_code_context or f"Repository search for inquiry {inquiry.inquiry_id}"
+        with self._inquiry_tools(inquiry):
+            with _timed(timings, "discovery", self.tracer):
+                baseline: PrimaryBaseline = self._run_stage(
+                    "discovery",
+                    inquiry_id=inquiry.inquiry_id,
+                    inquiry=inquiry,
+                    code_context=effective_code_context
+                )
 
-        # 3. Adversarial Challenge Review (Target-backward tracing)
-        adversarial_pred = self.adversarial_reviewer(
-            inquiry=inquiry,
-            baseline=baseline,
-            code_context=effective_code_context
-        )
-        ledger: ProposalLedger = adversarial_pred.ledger
+            # 3. Adversarial Challenge Review (Target-backward tracing), shaped by the severity plan
+            with _timed(timings, "adversarial", self.tracer):
+                ledger = self._review(plan, inquiry, baseline, effective_code_context)
 
         # 4. Operational Reconciliation & Calibrated Verdict
-        reconcile_pred = self.reconciler(
-            inquiry=inquiry,
-            baseline=baseline,
-            ledger=ledger
-        )
-        verdict: ReconciledVerdict = reconcile_pred.verdict
+        with _timed(timings, "reconcile", self.tracer):
+            verdict: ReconciledVerdict = self._run_stage(
+                "reconcile",
+                inquiry_id=inquiry.inquiry_id,
+                inquiry=self._stage_input("reconcile", "inquiry", inquiry),
+                baseline=self._stage_input("reconcile", "baseline", baseline),
+                ledger=self._stage_input("reconcile", "ledger", ledger)
+            )
+
+        self._record_review_latency(plan, timings)
+        if self.tool_memo is not None:
+            plan.tool_memo_stats = self.tool_memo.stats()
+
+        if verdict_cache is not None:
+            verdict_cache.store(
+                raw_question, operational_context, grounded_code_context, inquiry, baseline, ledger, verdict, plan
+            )
 
         return dspy.Prediction(
             inquiry=inquiry,
+            code_context=effective_code_context,
             baseline=baseline,
             ledger=ledger,
-            verdict=verdict
+            verdict=verdict,
+            plan=plan,
+            provenance=None
         )
+
+    def _inquiry_tools(self, inquiry: InquiryRecord):
+        """Bind the inquiry's target systems into the tools that rank by them."""
+        if self.repository_search is None:
+            return nullcontext()
+        return self.repository_search.for_inquiry(inquiry.target_systems)
+
+    def _react(self, signature: type[dspy.Signature], tools: list[Callable]) -> dspy.ReAct:
+        if self.trajectory_compactor is None:
+            return dspy.ReAct(signature, tools=tools)
+        return CompactingReAct(signature, tools=tools, compactor=self.trajectory_compactor)
+
+    def _review(
+        self,
+        plan: ExecutionPlan,
+        inquiry: InquiryRecord,
+        baseline: PrimaryBaseline,
+        code_context: str,
+    ) -> ProposalLedger:
+        """Run Stage 3 according to the plan's review mode."""
+        if plan.review_mode == "skip":
+            return ProposalLedger(inquiry_id=inquiry.inquiry_id, proposals=[])
+
+        stage_inputs: dict[str, Any] = {
+            "inquiry": self._stage_input("adversarial", "inquiry", inquiry),
+            "baseline": self._stage_input("adversarial", "baseline", baseline),
+            "code_context": code_context,
+        }
+        inquiry_id = inquiry.inquiry_id
+        if plan.review_mode == "shrink":
+            return self._run_stage("adversarial", module_attr="adversarial_reviewer_lite", variant="shrink",
+                                   inquiry_id=inquiry_id, **stage_inputs)
+        if plan.review_mode == "cheap":
+            with dspy.context(lm=self.review_lm):
+                return self._run_stage("adversarial", variant=f"cheap:{plan.review_model}",
+                                       inquiry_id=inquiry_id, **stage_inputs)
+        return self._run_stage("adversarial", inquiry_id=inquiry_id, **stage_inputs)
+
+    def _record_review_latency(self, plan: ExecutionPlan, timings: dict[str, float]) -> None:
+        """Store stage timings on the plan and estimate time saved against full reviews seen so far."""
+        plan.stage_timings_s = timings
+        review_s = timings["adversarial"]
+        if plan.review_mode == "full":
+            reference = self._review_latency_reference
+            self._review_latency_reference = review_s if reference is None else (
+                REVIEW_LATENCY_EMA_ALPHA * review_s + (1 - REVIEW_LATENCY_EMA_ALPHA) * reference
+            )
+            plan.estimated_latency_saved_s = 0.0
+        elif self._review_latency_reference is not None:
+            plan.estimated_latency_saved_s = max(0.0, self._review_latency_reference - review_s)
+
+    def _prepare_code_context(self, code_context: str, inquiry: InquiryRecord) -> str:
+        """Use the submitted code_context or retrieve one, minified when enabled ("" if there is none)."""
+        if not code_context and self.retriever is not None:
+            code_context = self.retriever.retrieve(inquiry)
+        if not code_context:
+            return ""
+        return self._minify_code_context(code_context, inquiry) if self.minify_context else code_context
+
+    def _minify_code_context(self, code_context: str, inquiry: InquiryRecord) -> str:
+        minified = minify_code_context(code_context, relevance_terms=derive_search_terms(inquiry))
+        if self.tracer is not None:
+            self.tracer.annotate(code_context_tokens=minified.original_tokens,
+                                 minified_code_context_tokens=minified.minified_tokens)
+        return minified.text
+
+    def _stage_input(self, stage: str, name: str, model: BaseModel) -> Any:
+        """Pass a model through unchanged, or as compact JSON when compact inputs are enabled."""
+        if not self.compact_inputs:
+            return model
+        exclude = STAGE_EXCLUDED_FIELDS[stage].get(name, frozenset())
+        return render_compact(model, exclude=exclude, max_field_chars=self.max_field_chars)
+
+    def _run_stage(
+        self,
+        stage: str,
+        module_attr: str | None = None,
+        variant: str = "",
+        inquiry_id: str | None = None,
+        **inputs: Any,
+    ) -> Any:
+        """Run one stage, short-circuiting on a stored checkpoint for identical inputs.
+
+        `module_attr` swaps in an alternative module for the stage; `variant` keeps its
+        checkpoints apart from those of the default module. The checkpoint hash also covers
+        the module's signatures and the active LM, so prompt or model changes re-run the stage.
+        """
+        module_attr = module_attr or STAGE_MODULES[stage][0]
+        store = self.checkpoint_store
+        if store is None:
+            return self._invoke_stage(stage, module_attr, inputs)
+
+        fingerprint = stage_fingerprint(getattr(self, module_attr), dspy.settings.lm, dspy.settings.adapter)
+        hashed = {**inputs, "fingerprint": fingerprint, **({"variant": variant} if variant else {})}
+        input_hash = store.input_hash(**hashed)
+        cached = store.load(stage, input_hash, STAGE_OUTPUT_MODELS[stage], inquiry_id=inquiry_id)
+        if self.tracer is not None:
+            self.tracer.annotate(checkpoint_hit=cached is not None)
+        if cached is not None:
+            return cached
+
+        output = self._invoke_stage(stage, module_attr, inputs)
+        if isinstance(output, BaseModel):
+            store.save(stage, input_hash, inputs, output, inquiry_id=inquiry_id, module=module_attr, variant=variant)
+        return output
+
+    def _invoke_stage(self, stage: str, module_attr: str, inputs: dict[str, Any]) -> Any:
+        return getattr(getattr(self, module_attr)(**inputs), STAGE_MODULES[stage][1])
+
+    def replay_stage(self, stage: str, inquiry_id: str) -> Any:
+        """Re-run a single stage on the inputs recorded in its latest checkpoint.
+
+        Intended for prompt iteration: the replayed output is returned, not persisted. The
+        stage runs on the module variant that produced the checkpoint (e.g. the shrunk or
+        cheap-LM review).
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("replay_stage requires a checkpoint_store")
+        record = self.checkpoint_store.latest_record(inquiry_id, stage)
+        if record is None:
+            raise FileNotFoundError(f"No '{stage}' checkpoint recorded for inquiry {inquiry_id}")
+        module_attr = record.get("module") or STAGE_MODULES[stage][0]
+        variant = record.get("variant", "")
+        inputs = self.checkpoint_store.restore_inputs(record)
+        if not variant.startswith("cheap:"):
+            return self._invoke_stage(stage, module_attr, inputs)
+        if self.review_lm is None:
+            raise ValueError(f"Checkpoint was produced by the '{variant}' review; replaying it requires review_lm")
+        with dspy.context(lm=self.review_lm):
+            return self._invoke_stage(stage, module_attr, inputs)
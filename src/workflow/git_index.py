@@ -0,0 +1,227 @@
+"""Cached git log and blame lookups backing the `git_history` tool.
+
+Blame is parsed once per (file, HEAD) and persisted as JSON, so repeated blame calls
+on a large file during an investigation are a dictionary lookup. Commit history is
+kept in a persistent log index that is extended incrementally with only the commits
+added since the last indexed HEAD.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+DEFAULT_CACHE_DIR = ".workflow_git_cache"
+# Commits read when the log index is first built; older history falls back to `git log -- <file>`
+LOG_INDEX_LIMIT = 5000
+GIT_TIMEOUT_S = 30
+
+_RECORD_SEP = "\x1e"
+_FIELD_SEP = "\x1f"
+
+
+class CommitInfo(BaseModel):
+    sha: str
+    author: str
+    date: str
+    subject: str
+    files: List[str] = []
+
+
+class BlameLine(BaseModel):
+    line: int
+    sha: str
+    author: str
+    date: str
+    summary: str
+    content: str
+
+
+def _git(repo: Path, *args: str) -> Optional[str]:
+    """Run git in `repo`; None when git is missing or the command fails."""
+    try:
+        res = subprocess.run(
+            ["git", "-C", str(repo), *args], capture_output=True, text=True, timeout=GIT_TIMEOUT_S
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return res.stdout if res.returncode == 0 else None
+
+
+def _parse_log(output: str) -> List[CommitInfo]:
+    commits: List[CommitInfo] = []
+    for record in output.split(_RECORD_SEP):
+        if not record.strip():
+            continue
+        header, _, file_block = record.partition("\n")
+        sha, author, date, subject = header.split(_FIELD_SEP, 3)
+        files = [f for f in file_block.splitlines() if f.strip()]
+        commits.append(CommitInfo(sha=sha, author=author, date=date, subject=subject, files=files))
+    return commits
+
+
+def _format_epoch(epoch: int) -> str:
+    return datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def _parse_blame_porcelain(output: str) -> List[BlameLine]:
+    """Parse `git blame --porcelain`; commit headers appear only on a commit's first line."""
+    commits: Dict[str, Dict[str, str]] = {}
+    lines: List[BlameLine] = []
+    current_sha = ""
+    final_line = 0
+    for raw in output.splitlines():
+        if raw.startswith("\t"):
+            meta = commits.get(current_sha, {})
+            lines.append(BlameLine(
+                line=final_line,
+                sha=current_sha,
+                author=meta.get("author", ""),
+                date=meta.get("date", ""),
+                summary=meta.get("summary", ""),
+                content=raw[1:],
+            ))
+            continue
+        parts = raw.split(" ")
+        if len(parts) >= 3 and len(parts[0]) == 40 and parts[1].isdigit() and parts[2].isdigit():
+            current_sha, final_line = parts[0], int(parts[2])
+            commits.setdefault(current_sha, {})
+        elif parts[0] == "author":
+            commits[current_sha]["author"] = raw[len("author "):]
+        elif parts[0] == "author-time" and len(parts) > 1 and parts[1].isdigit():
+            commits[current_sha]["date"] = _format_epoch(int(parts[1]))
+        elif parts[0] == "summary":
+            commits[current_sha]["summary"] = raw[len("summary "):]
+    return lines
+
+
+class GitHistory:
+    """Persistent blame cache per (file, HEAD) and incrementally indexed commit log per repository."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, log_index_limit: int = LOG_INDEX_LIMIT):
+        self.cache_dir = Path(cache_dir)
+        self.log_index_limit = log_index_limit
+        self._blame: Dict[Tuple[str, str], List[BlameLine]] = {}
+        self._log_index: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def locate(filepath: str) -> Optional[Tuple[Path, str, str]]:
+        """Return (repo root, path relative to the root, HEAD sha) for a tracked file."""
+        path = Path(filepath).resolve()
+        start = path if path.is_dir() else path.parent
+        root = _git(start, "rev-parse", "--show-toplevel")
+        if root is None:
+            return None
+        repo = Path(root.strip())
+        head = _git(repo, "rev-parse", "HEAD")
+        if head is None:
+            return None
+        return repo, path.relative_to(repo).as_posix(), head.strip()
+
+    def _repo_dir(self, repo: Path) -> Path:
+        return self.cache_dir / hashlib.sha256(str(repo).encode("utf-8")).hexdigest()[:16]
+
+    def _write_json(self, path: Path, payload: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def blame(self, repo: Path, relpath: str, head: str) -> List[BlameLine]:
+        """Blame of the whole file at HEAD, from memory, disk cache, or a single `git blame`."""
+        key = (f"{repo}:{relpath}", head)
+        if key in self._blame:
+            return self._blame[key]
+        digest = hashlib.sha256(f"{relpath}@{head}".encode("utf-8")).hexdigest()[:24]
+        cache_path = self._repo_dir(repo) / "blame" / f"{digest}.json"
+        if cache_path.is_file():
+            lines = [BlameLine.model_validate(x) for x in json.loads(cache_path.read_text(encoding="utf-8"))]
+        else:
+            output = _git(repo, "blame", "--porcelain", head, "--", relpath)
+            if output is None:
+                return []
+            lines = _parse_blame_porcelain(output)
+            self._write_json(cache_path, [line.model_dump() for line in lines])
+        self._blame[key] = lines
+        return lines
+
+    def _git_log(self, repo: Path, *args: str) -> List[CommitInfo]:
+        output = _git(
+            repo, "log", f"--format={_RECORD_SEP}%H{_FIELD_SEP}%an{_FIELD_SEP}%ad{_FIELD_SEP}%s",
+            "--date=short", "--name-only", *args,
+        )
+        return _parse_log(output) if output is not None else []
+
+    def log_index(self, repo: Path, head: str) -> Dict[str, Any]:
+        """Commit index up to HEAD, extended with only the commits added since the indexed HEAD."""
+        index_path = self._repo_dir(repo) / "log_index.json"
+        index = self._log_index.get(str(repo))
+        if index is None and index_path.is_file():
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+        if index is not None and index["head"] == head:
+            self._log_index[str(repo)] = index
+            return index
+
+        is_ancestor = index is not None and _git(repo, "merge-base", "--is-ancestor", index["head"], head) is not None
+        if index is not None and is_ancestor:
+            new_commits = self._git_log(repo, f"{index['head']}..{head}")
+            index = {
+                "head": head,
+                "truncated": index["truncated"],
+                "commits": [c.model_dump() for c in new_commits] + index["commits"],
+            }
+        else:
+            # First build, or history was rewritten: rebuild from HEAD
+            commits = self._git_log(repo, "-n", str(self.log_index_limit), head)
+            index = {
+                "head": head,
+                "truncated": len(commits) >= self.log_index_limit,
+                "commits": [c.model_dump() for c in commits],
+            }
+        self._write_json(index_path, index)
+        self._log_index[str(repo)] = index
+        return index
+
+    def file_log(self, repo: Path, relpath: str, head: str, max_commits: int) -> List[CommitInfo]:
+        """Most recent commits touching `relpath`, newest first."""
+        index = self.log_index(repo, head)
+        commits = [CommitInfo.model_validate(c) for c in index["commits"] if relpath in c["files"]][:max_commits]
+        if len(commits) < max_commits and index["truncated"]:
+            return self._git_log(repo, "-n", str(max_commits), head, "--", relpath)
+        return commits
+
+    def describe(self, filepath: str, start_line: int = 1, end_line: int = 50, max_commits: int = 10) -> str:
+        """Render the file's recent log and the blame of a line range for the workflow tools."""
+        located = self.locate(filepath)
+        if located is None:
+            return f"No git history available for {filepath} (not inside a git repository)."
+        repo, relpath, head = located
+
+        sections = [f"=== Log for {relpath} (HEAD {head[:10]}) ==="]
+        commits = self.file_log(repo, relpath, head, max_commits)
+        sections.extend(f"{c.sha[:10]} {c.date} {c.author}: {c.subject}" for c in commits)
+        if not commits:
+            sections.append("No commits touch this file.")
+
+        blame = [b for b in self.blame(repo, relpath, head) if start_line <= b.line <= end_line]
+        sections.append(f"=== Blame {relpath}:{start_line}-{end_line} ===")
+        if not blame:
+            sections.append("No committed lines in this range.")
+        group_start = 0
+        for i in range(1, len(blame) + 1):
+            if i < len(blame) and blame[i].sha == blame[group_start].sha and blame[i].line == blame[i - 1].line + 1:
+                continue
+            first, last = blame[group_start], blame[i - 1]
+            sections.append(f"{first.line}-{last.line} {first.sha[:10]} {first.date} {first.author}: {first.summary}")
+            sections.extend(f"  {b.line}: {b.content}" for b in blame[group_start:i])
+            group_start = i
+        return "\n".join(sections)
+
+
+DEFAULT_GIT_HISTORY = GitHistory()
@@ -0,0 +1,235 @@
+"""Offline load-test harness for `CodeGroundingWorkflow`.
+
+Drives N inquiries through the real 4-stage pipeline with a bounded number in flight,
+against a local mock LM that answers every stage with the fixture outputs of the
+bidder-deletion inquiry after a sampled latency. Reports throughput, p50/p95/p99
+end-to-end and per-stage latency and peak traced memory, and diffs them against a
+stored baseline report.
+
+Usage:
+    uv run loadtestworkflow --inquiries 64 --concurrency 8 --latency-ms 200
+    uv run loadtestworkflow --save-baseline loadtest_baseline.json
+    uv run loadtestworkflow --baseline loadtest_baseline.json --max-regression-pct 10
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Literal
+
+import dspy
+from pydantic import BaseModel, Field
+
+from common.mock_lm import with_latency
+from workflow.fixtures import (
+    SAMPLE_CODE_CONTEXT,
+    SAMPLE_CONTEXT,
+    SAMPLE_QUESTION,
+    sample_stage_outputs,
+)
+from workflow.flow import CodeGroundingWorkflow
+
+STAGES = ("ingress", "discovery", "adversarial", "reconcile")
+# Metrics compared against a baseline; True means higher is better
+DIFF_METRICS: dict[str, bool] = {
+    "throughput_rps": True,
+    "e2e_ms.p50": False,
+    "e2e_ms.p95": False,
+    "e2e_ms.p99": False,
+    "peak_memory_mb": False,
+}
+
+
+class LatencyModel(BaseModel):
+    """Per-call latency of the mock LM."""
+    distribution: Literal["fixed", "uniform", "lognormal"] = "lognormal"
+    median_ms: float = Field(default=200.0, description="Median (fixed: exact, uniform: centre) latency")
+    spread: float = Field(default=0.5, description="lognormal: sigma; uniform: +/- fraction of the median")
+
+    def sample_s(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            return self.median_ms / 1000
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(1 - self.spread, 1 + self.spread) * self.median_ms / 1000)
+        return rng.lognormvariate(math.log(max(self.median_ms, 1e-3)), self.spread) / 1000
+
+
+class MockWorkflowLM(dspy.utils.DummyLM):
+    """DummyLM answering each workflow stage with fixture outputs after a sampled delay."""
+
+    def __init__(self, latency: LatencyModel | None = None, seed: int = 0, inquiry_id: str = "INQ-LOAD"):
+        inquiry, baseline, ledger, verdict = sample_stage_outputs(inquiry_id)
+        reasoning = "Traced the listener and the scheduled sync job in the provided code."
+        # Keyed by a stage's distinctive input field header (the last message holds the inputs)
+        super().__init__({
+            "[[ ## ledger ## ]]\n": {"reasoning": reasoning, "verdict": verdict},
+            "[[ ## baseline ## ]]\n": {"reasoning": reasoning, "ledger": ledger},
+            "[[ ## code_context ## ]]\n": {"reasoning": reasoning, "baseline": baseline},
+            "[[ ## raw_question ## ]]\n": {"inquiry": inquiry},
+        })
+        self.latency = latency or LatencyModel()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        with_latency(self, self._sample_delay_s)
+
+    def _sample_delay_s(self) -> float:
+        with self._rng_lock:
+            return self.latency.sample_s(self._rng)
+
+
+class Percentiles(BaseModel):
+    p50: float
+    p95: float
+    p99: float
+
+
+class LoadTestReport(BaseModel):
+    inquiries: int
+    concurrency: int
+    latency: LatencyModel
+    errors: int = 0
+    wall_s: float
+    throughput_rps: float
+    e2e_ms: Percentiles
+    stages_ms: dict[str, Percentiles]
+    peak_memory_mb: float
+
+
+def percentiles(values_ms: list[float]) -> Percentiles:
+    """Nearest-rank p50/p95/p99."""
+    ordered = sorted(values_ms) or [0.0]
+
+    def rank(q: float) -> float:
+        return round(ordered[max(0, math.ceil(q * len(ordered)) - 1)], 3)
+
+    return Percentiles(p50=rank(0.50), p95=rank(0.95), p99=rank(0.99))
+
+
+def run_load_test(
+    inquiries: int = 32,
+    concurrency: int = 8,
+    latency: LatencyModel | None = None,
+    seed: int = 0,
+) -> LoadTestReport:
+    """Run `inquiries` workflow calls with at most `concurrency` in flight against the mock LM."""
+    latency = latency or LatencyModel()
+    lm = MockWorkflowLM(latency=latency, seed=seed)
+    local = threading.local()
+
+    def run_one(idx: int) -> tuple[float, dict[str, float]] | None:
+        if not hasattr(local, "workflow"):
+            local.workflow = CodeGroundingWorkflow(use_react=False)
+        start = time.perf_counter()
+        try:
+            with dspy.context(lm=lm, adapter=dspy.ChatAdapter()):
+                result = local.workflow(
+                    raw_question=f"{SAMPLE_QUESTION} (request {idx})",
+                    operational_context=SAMPLE_CONTEXT,
+                    code_context=SAMPLE_CODE_CONTEXT,
+                )
+        except Exception:  # noqa: BLE001 - any failed inquiry is counted as an error
+            return None
+        return time.perf_counter() - start, result.plan.stage_timings_s
+
+    tracemalloc.start()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(run_one, range(inquiries)))
+    wall_s = time.perf_counter() - wall_start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    completed = [o for o in outcomes if o is not None]
+    return LoadTestReport(
+        inquiries=inquiries,
+        concurrency=concurrency,
+        latency=latency,
+        errors=len(outcomes) - len(completed),
+        wall_s=round(wall_s, 3),
+        throughput_rps=round(len(completed) / wall_s, 3) if wall_s else 0.0,
+        e2e_ms=percentiles([e2e * 1000 for e2e, _ in completed]),
+        stages_ms={
+            stage: percentiles([timings[stage] * 1000 for _, timings in completed if stage in timings])
+            for stage in STAGES
+        },
+        peak_memory_mb=round(peak_bytes / 2**20, 3),
+    )
+
+
+def _metric(report: LoadTestReport, path: str) -> float:
+    value = report.model_dump()
+    for part in path.split("."):
+        value = value[part]
+    return float(value)
+
+
+def diff_reports(current: LoadTestReport, baseline: LoadTestReport) -> list[tuple[str, float, float, float, bool]]:
+    """(metric, baseline, current, change %, regressed?) for every compared metric.
+
+    Per-stage p95 latencies are compared alongside the headline metrics.
+    """
+    metrics = dict(DIFF_METRICS)
+    metrics.update({f"stages_ms.{stage}.p95": False for stage in STAGES})
+    rows = []
+    for path, higher_is_better in metrics.items():
+        before, after = _metric(baseline, path), _metric(current, path)
+        change = 100 * (after - before) / before if before else 0.0
+        regressed = change < 0 if higher_is_better else change > 0
+        rows.append((path, before, after, round(change, 2), regressed))
+    return rows
+
+
+def _print_report(report: LoadTestReport) -> None:
+    print(f"Inquiries: {report.inquiries}  concurrency: {report.concurrency}  errors: {report.errors}  "
+          f"mock LM: {report.latency.distribution} median {report.latency.median_ms}ms")
+    print(f"Throughput: {report.throughput_rps} inquiries/s over {report.wall_s}s")
+    print(f"Peak traced memory: {report.peak_memory_mb} MB")
+    print(f"{'Latency (ms)':<16}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, pct in [("end-to-end", report.e2e_ms), *report.stages_ms.items()]:
+        print(f"{name:<16}{pct.p50:>10.1f}{pct.p95:>10.1f}{pct.p99:>10.1f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline load test of CodeGroundingWorkflow against a mock LM")
+    parser.add_argument("--inquiries", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Median mock LM latency per call")
+    parser.add_argument("--spread", type=float, default=0.5, help="lognormal sigma / uniform +/- fraction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Report JSON to diff against")
+    parser.add_argument("--save-baseline", help="Write this run's report JSON here")
+    parser.add_argument("--max-regression-pct", type=float, help="Exit non-zero if any metric regresses by more")
+    args = parser.parse_args(argv)
+
+    latency = LatencyModel(distribution=args.distribution, median_ms=args.latency_ms, spread=args.spread)
+    report = run_load_test(args.inquiries, args.concurrency, latency, seed=args.seed)
+    _print_report(report)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(report.model_dump_json(indent=2), encoding="utf-8")
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = LoadTestReport.model_validate(json.loads(Path(args.baseline).read_text(encoding="utf-8")))
+        print(f"\n{'Metric':<28}{'Baseline':>12}{'Current':>12}{'Change':>10}")
+        worst = 0.0
+        for path, before, after, change, regressed in diff_reports(report, baseline):
+            flag = "  !" if regressed else ""
+            print(f"{path:<28}{before:>12.2f}{after:>12.2f}{change:>9.1f}%{flag}")
+            if regressed:
+                worst = max(worst, abs(change))
+        if args.max_regression_pct is not None and worst > args.max_regression_pct:
+            print(f"\nRegression of {worst:.1f}% exceeds {args.max_regression_pct}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
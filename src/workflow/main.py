@@ -6,37 +6,9 @@ Executes the 4-stage pipeline against a representative high-stakes technical que
 import sys
 from common.constants import MODEL_NAME_GEMINI_3_5_FLASH
 from common.utils import dspy_configure, get_lm_for_model_name
+from workflow.fixtures import SAMPLE_CODE_CONTEXT, SAMPLE_CONTEXT, SAMPLE_QUESTION
 from workflow.flow import CodeGroundingWorkflow
-
-
-SAMPLE_QUESTION = "Does deleting a bidder in campaign manager automatically pause active Google Ads campaigns in shopping ad automation?"
-SAMPLE_CONTEXT = """
-Urgent incident investigation: Stakeholders observed that deleting a bidder record from the database
-did not immediately pause live bidding campaigns on Google Ads. Need verifiable code trace of the deletion event flow.
-"""
-
-SAMPLE_CODE_CONTEXT = """
-// BidderDeactivationListener.java
-@EventListener
-public void onBidderDeleted(BidderDeleteEvent event) {
-    Long bidderId = event.getBidderId();
-    // Soft delete: sets active = false
-    bidderRepository.markInactive(bidderId);
-    // NOTICE: Google Ads API campaign pause is handled via async cron exporter every 15 minutes,
-    // NOT via synchronous event listener!
-    log.info("Bidder {} marked inactive. Sync queue updated.", bidderId);
-}
-
-// GoogleAdsCampaignSyncJob.java
-@Scheduled(fixedRate = 900_000)
-public void syncPausedCampaigns() {
-    List<Bidder> inactiveBidders = bidderRepository.findAllByActiveFalseAndCampaignsPausedFalse();
-    for (Bidder bidder : inactiveBidders) {
-        googleAdsClient.pauseCampaignsForBidder(bidder.getExternalId());
-        bidder.setCampaignsPaused(true);
-    }
-}
-"""
+from workflow.tools import validate_d2_batch
 
 
 def run_demo(model_name: str = MODEL_NAME_GEMINI_3_5_FLASH):
@@ -76,6 +48,12 @@ def run_demo(model_name: str = MODEL_NAME_GEMINI_3_5_FLASH):
     print(f"Severity: {result.inquiry.stakes_severity}")
     print(f"Target Systems: {result.inquiry.target_systems}")
     print(f"Operational Context: {result.inquiry.operational_context}")
+    print(f"Execution Plan: {result.plan.review_mode} adversarial review")
+    if result.provenance is not None:
+        print(f"Served from verdict cache: {result.provenance.source_inquiry_id} "
+              f"(similarity {result.provenance.similarity:.2f})")
+    if result.plan.tool_memo_stats:
+        print(f"Tool Memo: {result.plan.tool_memo_stats}")
 
     print("\n" + "-" * 80)
     print("🔍 STAGE 2: PRIMARY BASELINE DISCOVERY (Forward Trace)")
@@ -105,6 +83,8 @@ def run_demo(model_name: str = MODEL_NAME_GEMINI_3_5_FLASH):
     print(f"Residual Risks: {result.verdict.residual_risks}")
     print(f"\n📢 Stakeholder Verdict:\n{result.verdict.plain_language_verdict}")
     print(f"\n🎯 Action Matrix:\n{result.verdict.actionable_decision_matrix}")
+    diagram_checks = validate_d2_batch([result.baseline.diagram_d2, result.verdict.reconciled_diagram_d2])
+    print(f"\n🧩 Diagram Validation (baseline, reconciled):\n{diagram_checks}")
     print("=" * 80)
 
 
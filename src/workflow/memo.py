@@ -0,0 +1,140 @@
+"""Run-scoped memoization of the workflow's repository tools.
+
+The discovery and adversarial ReAct loops of one workflow run often issue the same
+`search_code` / `read_code_slice` calls. `ToolMemo.wrap` returns a drop-in tool whose
+results are keyed by the call arguments, so a repeated call is answered instantly.
+A file argument is also keyed by the file's mtime and size, so re-reading a modified
+file misses. Directory-wide calls (searches) treat the tree as a snapshot for the run,
+so a hit never rescans the tree.
+
+Each run's results and counters live in a context variable set by `ToolMemo.run()`, so
+concurrent workflow runs sharing one memo (and its wrapped tools) never see or clear each
+other's entries. Calls outside any run share one default state, cleared by `reset()`.
+"""
+
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Tool arguments that name files or directories whose contents determine the result
+PATH_ARGUMENTS = frozenset({"filepath", "file_path", "directory", "directories"})
+
+
+def _stat_token(path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (-1, -1)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _path_fingerprint(path: str) -> str:
+    """mtime/size of a file; a directory is a snapshot for the run (its results die with the run state)."""
+    if Path(path).is_dir():
+        return f"{path}:dir"
+    return f"{path}:{_stat_token(path)}"
+
+
+def _as_paths(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return []
+
+
+class _MemoRun:
+    """Results and hit/miss counters of one run."""
+
+    def __init__(self) -> None:
+        self.results: Dict[str, Any] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+
+class ToolMemo:
+    """Per-run cache of tool results keyed by arguments and file fingerprints.
+
+    Safe to share between threads and between concurrent runs.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._default = _MemoRun()
+        self._current: contextvars.ContextVar[Optional[_MemoRun]] = contextvars.ContextVar(
+            f"tool_memo_run_{id(self)}", default=None
+        )
+
+    def _state(self) -> _MemoRun:
+        return self._current.get() or self._default
+
+    @contextmanager
+    def run(self) -> Iterator[None]:
+        """Scope a workflow run: tool calls in this block share a fresh cache of their own."""
+        token = self._current.set(_MemoRun())
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+
+    def reset(self) -> None:
+        """Forget the cached results and counters of the current run (or of the default state)."""
+        state = self._state()
+        with self._lock:
+            state.results.clear()
+            state.hits.clear()
+            state.misses.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counts per tool name for the current run."""
+        state = self._state()
+        with self._lock:
+            names = sorted(set(state.hits) | set(state.misses))
+            return {name: {"hits": state.hits.get(name, 0), "misses": state.misses.get(name, 0)} for name in names}
+
+    def _key(self, name: str, arguments: Dict[str, Any]) -> str:
+        fingerprints: List[str] = [
+            _path_fingerprint(path)
+            for arg_name in sorted(PATH_ARGUMENTS & arguments.keys())
+            for path in _as_paths(arguments[arg_name])
+        ]
+        payload = json.dumps([name, arguments, fingerprints], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def wrap(self, tool: Callable[..., Any]) -> Callable[..., Any]:
+        """Return a memoized tool with the same name, docstring and signature (as dspy.Tool reads them)."""
+        signature = inspect.signature(tool)
+        name = tool.__name__
+        call_state = threading.local()
+
+        @functools.wraps(tool)
+        def memoized(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = self._key(name, dict(bound.arguments))
+            state = self._state()
+            with self._lock:
+                hit = key in state.results
+                counts = state.hits if hit else state.misses
+                counts[name] = counts.get(name, 0) + 1
+                result = state.results.get(key)
+            call_state.hit = hit
+            if hit:
+                return result
+            # Run outside the lock so concurrent calls of other tools are not serialized
+            result = tool(*args, **kwargs)
+            with self._lock:
+                state.results[key] = result
+            return result
+
+        # Read by WorkflowTracer (in the calling thread) to mark tool spans as memo hits
+        setattr(memoized, "call_state", call_state)
+        return memoized
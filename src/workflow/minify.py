@@ -0,0 +1,248 @@
+"""Language-aware minification of `code_context` prompt payloads.
+
+Code context (hand-written like `SAMPLE_CODE_CONTEXT`, or packed by `CodeRetriever`)
+is split into per-file sections at `// path` / `// path:start-end` markers and then:
+
+- comments are dropped unless they carry a NOTICE-style annotation (the whole comment
+  block is kept so multi-line notices stay intact); license headers go with them
+- blank lines are dropped, indentation shrinks to one space per level and consecutive
+  import lines collapse into one grouped line
+- when relevance terms are given, bodies of methods mentioning none of them are elided
+
+Line numbers stay exact while costing few tokens: a line carries its original number as
+an `N: ` prefix (the format `CodeSlice.render` uses) only where the numbering jumps, i.e.
+at the start of a file and after removed lines; an unlabeled line is the line after the
+previous one. Collapsed imports and elided bodies are labelled with their `first-last`
+range. `MinifiedContext.line_map` maps each output line back to its file and original line.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from common.tokens import estimate_tokens
+from workflow.retrieval import tokenize
+
+
+# Comment blocks that mention one of these words survive minification
+KEEP_COMMENT = re.compile(r"\b(NOTICE|IMPORTANT|WARNING|SECURITY|TODO|FIXME|HACK|XXX|NOTE)\b")
+HASH_COMMENT_EXTENSIONS = {".py", ".rb", ".sh", ".yaml", ".yml", ".toml", ".pl", ".r"}
+# Method bodies shorter than this are kept even when unrelated
+MIN_ELIDED_BODY_LINES = 3
+STEM_CHARS = 5
+
+_FILE_MARKER = re.compile(r"^\s*(?://|#)\s*([\w./-]+\.\w+)(?::(\d+)-(\d+))?\s*$")
+_NUMBERED = re.compile(r"^(\d+): ?(.*)$")
+_IMPORT = re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;?\s*$")
+_PY_FROM_IMPORT = re.compile(r"^\s*from\s+([\w.]+)\s+import\s+(.+?)\s*$")
+_CONTROL = re.compile(r"^\s*(?:}\s*)?(?:if|for|while|switch|catch|else|try|do|synchronized|return|new)\b")
+_PY_DEF = re.compile(r"^(\s*)(?:async\s+)?def\s+\w+.*:\s*$")
+
+Line = Tuple[int, str]
+
+
+class MinifiedContext(BaseModel):
+    text: str = Field(..., description="Minified code context with original line numbers")
+    line_map: List[Tuple[str, int]] = Field(
+        default_factory=list, description="Per output line: (file, original line); 0 for file headers"
+    )
+    original_tokens: int = 0
+    minified_tokens: int = 0
+
+    def original_location(self, output_line: int) -> Tuple[str, int]:
+        """(file, original line) of a 1-indexed line of `text`."""
+        return self.line_map[output_line - 1]
+
+
+def _split_sections(code_context: str) -> List[Tuple[str, List[Line]]]:
+    """Split into (filepath, [(original line, text)]) sections at file markers."""
+    sections: List[Tuple[str, List[Line]]] = []
+    filepath, start = "", 1
+    raw_lines: List[str] = []
+
+    def flush() -> None:
+        if filepath or any(t.strip() for t in raw_lines):
+            numbered = [_NUMBERED.match(t) for t in raw_lines if t.strip()]
+            if numbered and all(numbered):
+                parsed = [(int(m.group(1)), m.group(2)) for m in (_NUMBERED.match(t) for t in raw_lines) if m]
+            else:
+                parsed = [(start + i, t) for i, t in enumerate(raw_lines)]
+            sections.append((filepath, parsed))
+
+    for text in code_context.split("\n"):
+        marker = _FILE_MARKER.match(text)
+        if marker:
+            flush()
+            filepath, start, raw_lines = marker.group(1), int(marker.group(2) or 1), []
+        else:
+            raw_lines.append(text)
+    flush()
+    return sections
+
+
+def _comment_syntax(filepath: str) -> str:
+    return "#" if any(filepath.endswith(ext) for ext in HASH_COMMENT_EXTENSIONS) else "//"
+
+
+def _strip_trailing_comment(text: str, marker: str) -> str:
+    idx = text.find(marker)
+    while idx > 0:
+        prefix = text[:idx]
+        if prefix.count('"') % 2 == 0 and prefix.count("'") % 2 == 0:
+            return prefix.rstrip() if not KEEP_COMMENT.search(text[idx:]) else text
+        idx = text.find(marker, idx + 1)
+    return text
+
+
+def _strip_comments(lines: List[Line], marker: str) -> List[Line]:
+    kept: List[Line] = []
+    block: List[Line] = []
+    in_block_comment = False
+
+    def flush_block() -> None:
+        if any(KEEP_COMMENT.search(t) for _, t in block):
+            kept.extend(block)
+        block.clear()
+
+    for lineno, text in lines:
+        stripped = text.strip()
+        if in_block_comment:
+            block.append((lineno, text))
+            in_block_comment = "*/" not in stripped
+            continue
+        if marker == "//" and stripped.startswith("/*"):
+            block.append((lineno, text))
+            in_block_comment = "*/" not in stripped
+            continue
+        if stripped.startswith(marker):
+            block.append((lineno, text))
+            continue
+        flush_block()
+        if stripped:
+            kept.append((lineno, _strip_trailing_comment(text, marker)))
+    flush_block()
+    return kept
+
+
+def _collapse_imports(lines: List[Line]) -> List[Tuple[int, int, str]]:
+    """Return (first line, last line, text); runs of imports become one grouped line."""
+    out: List[Tuple[int, int, str]] = []
+    run: List[Tuple[int, str, str]] = []
+
+    def flush_run() -> None:
+        if len(run) < 2:
+            out.extend((n, n, raw) for n, _, raw in run)
+        else:
+            groups: Dict[str, List[str]] = {}
+            for _, name, _ in run:
+                package, _, leaf = name.rpartition(".")
+                groups.setdefault(package, []).append(leaf)
+            rendered = ", ".join(
+                f"{pkg}.{{{', '.join(leaves)}}}" if len(leaves) > 1 else (f"{pkg}.{leaves[0]}" if pkg else leaves[0])
+                for pkg, leaves in groups.items()
+            )
+            indent = run[0][2][: len(run[0][2]) - len(run[0][2].lstrip())]
+            out.append((run[0][0], run[-1][0], f"{indent}import {rendered}"))
+        run.clear()
+
+    for lineno, text in lines:
+        java_import = _IMPORT.match(text)
+        py_import = _PY_FROM_IMPORT.match(text)
+        if java_import:
+            run.append((lineno, java_import.group(1), text))
+        elif py_import:
+            for name in py_import.group(2).strip("()").split(","):
+                if name.strip():
+                    run.append((lineno, f"{py_import.group(1)}.{name.strip()}", text))
+        else:
+            flush_run()
+            out.append((lineno, lineno, text))
+    flush_run()
+    return out
+
+
+def _is_relevant(lines: List[Tuple[int, int, str]], stems: set) -> bool:
+    return any(term[:STEM_CHARS] in stems for _, _, text in lines for term in tokenize(text))
+
+
+def _method_end(lines: List[Tuple[int, int, str]], start: int, python: bool) -> Optional[int]:
+    """Index of the last line of the method starting at `start`, or None if it is cut off."""
+    if python:
+        indent = len(_PY_DEF.match(lines[start][2]).group(1))
+        end = start
+        while end + 1 < len(lines) and len(lines[end + 1][2]) - len(lines[end + 1][2].lstrip()) > indent:
+            end += 1
+        return end if end > start else None
+    depth = 0
+    for idx in range(start, len(lines)):
+        text = lines[idx][2]
+        depth += text.count("{") - text.count("}")
+        if depth <= 0:
+            return idx
+    return None
+
+
+def _elide_bodies(lines: List[Tuple[int, int, str]], stems: set, python: bool) -> List[Tuple[int, int, str]]:
+    out: List[Tuple[int, int, str]] = []
+    idx = 0
+    while idx < len(lines):
+        first, last, text = lines[idx]
+        is_method = bool(_PY_DEF.match(text)) if python else (
+            "(" in text and text.rstrip().endswith("{") and not _CONTROL.match(text)
+        )
+        end = _method_end(lines, idx, python) if is_method else None
+        if end is not None and end - idx - 1 >= MIN_ELIDED_BODY_LINES and not _is_relevant(lines[idx:end + 1], stems):
+            body_first, body_last = lines[idx + 1][0], lines[end][1]
+            note = f"lines {body_first}-{body_last} elided"
+            elided = f"{text} ...  # {note}" if python else f"{text} /* {note} */ }}"
+            out.append((first, body_last, elided))
+            idx = end + 1
+            continue
+        out.append((first, last, text))
+        idx += 1
+    return out
+
+
+def _reindent(lines: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """Shrink each indentation level to one space (levels are kept, so Python stays readable)."""
+    indents = [len(t) - len(t.lstrip()) for _, _, t in lines if t.strip()]
+    unit = min((i for i in indents if i > 0), default=0)
+    if unit <= 1:
+        return lines
+    return [(first, last, " " * ((len(t) - len(t.lstrip())) // unit) + t.lstrip()) for first, last, t in lines]
+
+
+def minify_code_context(code_context: str, relevance_terms: Optional[Sequence[str]] = None) -> MinifiedContext:
+    """Minify a code_context string; method bodies are only elided when `relevance_terms` are given."""
+    stems = {term.lower()[:STEM_CHARS] for term in relevance_terms or []}
+    out_lines: List[str] = []
+    line_map: List[Tuple[str, int]] = []
+    for filepath, lines in _split_sections(code_context):
+        marker = _comment_syntax(filepath)
+        collapsed = _collapse_imports(_strip_comments(lines, marker))
+        if stems:
+            collapsed = _elide_bodies(collapsed, stems, python=marker == "#")
+        collapsed = _reindent(collapsed)
+        if not collapsed:
+            continue
+        if filepath:
+            out_lines.append(f"{marker} {filepath}")
+            line_map.append((filepath, 0))
+        previous_last: Optional[int] = None
+        for first, last, text in collapsed:
+            if first != last:
+                out_lines.append(f"{first}-{last}: {text}")
+            elif previous_last is None or first != previous_last + 1:
+                out_lines.append(f"{first}: {text}")
+            else:
+                out_lines.append(text)
+            line_map.append((filepath, first))
+            previous_last = last
+    text = "\n".join(out_lines)
+    return MinifiedContext(
+        text=text,
+        line_map=line_map,
+        original_tokens=estimate_tokens(code_context),
+        minified_tokens=estimate_tokens(text),
+    )
@@ -0,0 +1,122 @@
+"""Sharded code search across several repository roots.
+
+Investigations usually span the services listed in `InquiryRecord.target_systems`.
+`RepositorySearch` queries every configured root concurrently (ripgrep where
+installed, otherwise the shared fallback scanner), caps matches per repository, and
+returns the repositories ordered by how well their names match the target systems.
+The workflow binds the current inquiry's target systems with `for_inquiry`, so tool
+calls that do not pass their own are still ranked.
+"""
+
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from workflow.scanner import scan_directories
+from workflow.tools import compile_for_grouping, ripgrep_batch
+
+
+DEFAULT_MATCHES_PER_REPO = 10
+MAX_SEARCH_WORKERS = 8
+
+_NAME_PARTS = re.compile(r"[a-z0-9]+")
+
+
+class RepositoryMatches(BaseModel):
+    root: str
+    name: str
+    relevance: float
+    matches: List[str]
+
+
+def _name_terms(name: str) -> List[str]:
+    return _NAME_PARTS.findall(name.lower())
+
+
+def repository_relevance(root: str, target_systems: Sequence[str]) -> float:
+    """Best fraction of a target system's name terms found in the repository directory name."""
+    repo_terms = set(_name_terms(Path(root).resolve().name))
+    best = 0.0
+    for system in target_systems:
+        terms = _name_terms(system)
+        if terms:
+            best = max(best, len(repo_terms.intersection(terms)) / len(terms))
+    return best
+
+
+def _search_root(pattern: str, root: str, max_matches: int) -> List[str]:
+    regex = compile_for_grouping(pattern)
+    grouped = ripgrep_batch([pattern], [regex], [root])
+    if grouped is None:
+        grouped = scan_directories([regex], [root], max_matches)
+    return grouped[0][:max_matches]
+
+
+class RepositorySearch:
+    """Concurrent search over a fixed set of repository roots."""
+
+    def __init__(self, roots: Sequence[str], max_matches_per_repo: int = DEFAULT_MATCHES_PER_REPO):
+        self.roots = list(roots)
+        self.max_matches_per_repo = max_matches_per_repo
+        # Per thread/context, so concurrent workflow runs rank by their own inquiry
+        self._inquiry_targets: contextvars.ContextVar[Tuple[str, ...]] = contextvars.ContextVar(
+            f"repository_search_targets_{id(self)}", default=()
+        )
+
+    @contextmanager
+    def for_inquiry(self, target_systems: Sequence[str]) -> Iterator[None]:
+        """Rank by `target_systems` in tool calls within this block that do not pass their own."""
+        token = self._inquiry_targets.set(tuple(target_systems))
+        try:
+            yield
+        finally:
+            self._inquiry_targets.reset(token)
+
+    def search(self, pattern: str, target_systems: Optional[Sequence[str]] = None) -> List[RepositoryMatches]:
+        """Search all roots at once; results are ordered by relevance, then match count, then root order."""
+        if not self.roots:
+            return []
+        with ThreadPoolExecutor(max_workers=min(MAX_SEARCH_WORKERS, len(self.roots))) as executor:
+            found = list(executor.map(lambda root: _search_root(pattern, root, self.max_matches_per_repo), self.roots))
+        results = [
+            RepositoryMatches(
+                root=root,
+                name=Path(root).resolve().name,
+                relevance=repository_relevance(root, target_systems or []),
+                matches=matches,
+            )
+            for root, matches in zip(self.roots, found)
+        ]
+        order = {root: idx for idx, root in enumerate(self.roots)}
+        return sorted(results, key=lambda r: (-r.relevance, -len(r.matches), order[r.root]))
+
+    def render(self, pattern: str, target_systems: Optional[Sequence[str]] = None) -> str:
+        sections: List[str] = []
+        for repo in self.search(pattern, target_systems):
+            if not repo.matches:
+                continue
+            sections.append(f"=== Repository '{repo.name}' (relevance {repo.relevance:.2f}, {len(repo.matches)} matches) ===")
+            sections.extend(repo.matches)
+        return "\n".join(sections) if sections else f"No matches found for pattern '{pattern}' in {len(self.roots)} repositories."
+
+    def as_tool(self) -> Callable[..., str]:
+        """A `search_repositories` tool bound to these roots, for dspy.ReAct."""
+        def search_repositories(pattern: str, target_systems: Optional[List[str]] = None) -> str:
+            return self.render(pattern, target_systems or list(self._inquiry_targets.get()))
+
+        names = ", ".join(Path(root).resolve().name for root in self.roots)
+        search_repositories.__doc__ = f"""Search a regex or keyword pattern across all service repositories ({names}) in one call.
+
+    Args:
+        pattern: Regex or string pattern to find (e.g. 'class BidderService').
+        target_systems: Systems to rank first (defaults to the current inquiry's target systems).
+
+    Returns:
+        One section per repository with matches (capped per repository), most relevant first.
+    """
+        return search_repositories
@@ -0,0 +1,57 @@
+"""Severity-adaptive execution plans for the Code Grounding workflow.
+
+Ingress classifies `stakes_severity`; the policy maps it to how Stage 3 (adversarial
+review) runs, so low-stakes inquiries do not pay for the full ChainOfThought/ReAct review.
+"""
+
+from typing import Dict, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from workflow.schemas import InquiryRecord
+
+
+Severity = Literal["low", "medium", "high", "critical"]
+ReviewMode = Literal["skip", "shrink", "cheap", "full"]
+
+
+class ExecutionPlan(BaseModel):
+    """Plan chosen for one inquiry, plus the measurements recorded while executing it."""
+    severity: Severity = Field(..., description="Severity assessed by ingress")
+    review_mode: ReviewMode = Field(
+        ...,
+        description="skip: no Stage 3; shrink: single Predict call; cheap: review on the cheaper LM; full: configured reviewer",
+    )
+    review_model: Optional[str] = Field(default=None, description="Model used for the review when it is not the default LM")
+    stage_timings_s: Dict[str, float] = Field(default_factory=dict, description="Wall time per executed stage")
+    estimated_latency_saved_s: Optional[float] = Field(
+        default=None,
+        description="Reference full-review latency minus actual review latency (None until a full review was observed)",
+    )
+    tool_memo_stats: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict, description="Memoized tool hits/misses per tool name for this run"
+    )
+
+
+class ExecutionPolicy(BaseModel):
+    """Maps ingress severity to a Stage 3 review mode."""
+    review_modes: Dict[Severity, ReviewMode] = Field(
+        default_factory=lambda: {"low": "skip", "medium": "cheap", "high": "full", "critical": "full"}
+    )
+
+    def plan_for(self, inquiry: InquiryRecord, cheap_model: Optional[str] = None) -> ExecutionPlan:
+        """Pick the plan for an inquiry; 'cheap' degrades to 'full' when no cheaper LM is configured."""
+        mode = self.review_modes.get(inquiry.stakes_severity, "full")
+        if mode == "cheap" and cheap_model is None:
+            mode = "full"
+        return ExecutionPlan(
+            severity=inquiry.stakes_severity,
+            review_mode=mode,
+            review_model=cheap_model if mode == "cheap" else None,
+        )
+
+
+# Runs every stage in full regardless of severity (the workflow default)
+FULL_PIPELINE_POLICY = ExecutionPolicy(
+    review_modes={"low": "full", "medium": "full", "high": "full", "critical": "full"}
+)
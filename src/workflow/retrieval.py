@@ -0,0 +1,148 @@
+"""Deterministic code_context retrieval for one-shot (non-ReAct) workflow runs.
+
+Builds a BM25 index over fixed-size line slices of the repository, derives search
+terms from the normalized inquiry, and packs the best-ranked slices into a
+`code_context` string that fits a token budget.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from common.tokens import estimate_tokens
+from workflow.schemas import InquiryRecord
+from workflow.scanner import iter_source_files
+
+
+SLICE_LINES = 40
+DEFAULT_TOKEN_BUDGET = 2000
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_PARTS = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "does", "do", "for", "from", "how", "if", "in",
+    "is", "it", "of", "on", "or", "the", "this", "that", "to", "what", "when", "where", "which",
+    "who", "why", "will", "with", "we", "our", "can", "should", "would", "automatically",
+}
+
+
+class CodeSlice(BaseModel):
+    """A contiguous line range of a source file that can be ranked and cited."""
+    filepath: str = Field(..., description="Path of the source file")
+    start_line: int = Field(..., description="1-indexed first line of the slice")
+    end_line: int = Field(..., description="1-indexed last line of the slice")
+    text: str = Field(..., description="Raw text of the slice")
+
+    def render(self) -> str:
+        """Render with a location header and numbered lines so citations stay exact."""
+        numbered = [f"{n}: {line}" for n, line in enumerate(self.text.split("\n"), start=self.start_line)]
+        return f"// {self.filepath}:{self.start_line}-{self.end_line}\n" + "\n".join(numbered)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, expanding camelCase and snake_case identifiers."""
+    terms: List[str] = []
+    for identifier in _IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        terms.append(lowered)
+        parts = [p.lower() for chunk in identifier.split("_") for p in _CAMEL_PARTS.findall(chunk)]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+def derive_search_terms(inquiry: InquiryRecord) -> List[str]:
+    """Derive de-duplicated query terms from the inquiry's target systems and question."""
+    source = " ".join(inquiry.target_systems + [inquiry.raw_question])
+    seen: Dict[str, None] = {}
+    for term in tokenize(source.replace("-", " ")):
+        if term not in _STOPWORDS and len(term) > 2:
+            seen.setdefault(term, None)
+    return list(seen)
+
+
+class CodeIndex:
+    """BM25 index over fixed-size line slices of every scannable file under a root."""
+
+    def __init__(self, slices: List[CodeSlice]):
+        self.slices = slices
+        self._term_freqs: List[Counter] = [Counter(tokenize(s.text)) for s in slices]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        doc_freq: Counter = Counter()
+        for tf in self._term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(slices)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    @classmethod
+    def build(cls, root: str, slice_lines: int = SLICE_LINES) -> "CodeIndex":
+        """Slice every scannable file under `root` into `slice_lines`-line windows."""
+        slices: List[CodeSlice] = []
+        for path in iter_source_files(root):
+            try:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    lines = f.read().split("\n")
+            except OSError:
+                continue
+            for start in range(0, len(lines), slice_lines):
+                window = lines[start:start + slice_lines]
+                if any(line.strip() for line in window):
+                    slices.append(CodeSlice(filepath=path, start_line=start + 1,
+                                            end_line=start + len(window), text="\n".join(window)))
+        return cls(slices)
+
+    def search(self, terms: List[str], limit: int = 20) -> List[Tuple[CodeSlice, float]]:
+        """Return up to `limit` slices ranked by BM25 score (zero-score slices are dropped)."""
+        scored: List[Tuple[float, int]] = []
+        for idx, tf in enumerate(self._term_freqs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[idx] / (self._avg_length or 1.0))
+            score = sum(
+                self._idf[t] * tf[t] * (BM25_K1 + 1) / (tf[t] + norm)
+                for t in terms if tf.get(t)
+            )
+            if score > 0:
+                scored.append((score, idx))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.slices[idx], score) for score, idx in scored[:limit]]
+
+
+def pack_code_context(ranked: List[CodeSlice], token_budget: int) -> str:
+    """Greedily pack rendered slices in rank order while staying within `token_budget` tokens."""
+    packed: List[str] = []
+    used = 0
+    for code_slice in ranked:
+        rendered = code_slice.render()
+        cost = estimate_tokens(rendered) + 1
+        if used + cost > token_budget:
+            continue
+        packed.append(rendered)
+        used += cost
+    return "\n\n".join(packed)
+
+
+class CodeRetriever:
+    """Retrieval stage that fills an empty code_context from a lazily built repository index."""
+
+    def __init__(self, root: str = ".", token_budget: int = DEFAULT_TOKEN_BUDGET, max_candidates: int = 20):
+        self.root = root
+        self.token_budget = token_budget
+        self.max_candidates = max_candidates
+        self._index: Optional[CodeIndex] = None
+
+    @property
+    def index(self) -> CodeIndex:
+        if self._index is None:
+            self._index = CodeIndex.build(self.root)
+        return self._index
+
+    def retrieve(self, inquiry: InquiryRecord) -> str:
+        """Return packed code evidence for the inquiry, or an empty string when nothing matched."""
+        terms = derive_search_terms(inquiry)
+        ranked = [s for s, _ in self.index.search(terms, limit=self.max_candidates)]
+        return pack_code_context(ranked, self.token_budget)
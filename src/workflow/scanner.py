@@ -0,0 +1,234 @@
+"""Pure-Python fallback scanner used by the search tools when ripgrep is unavailable.
+
+Walks the repository honouring `.gitignore` files, skips binaries, vendored/build
+directories and oversized files (e.g. multi-MB lockfiles), and fans file scanning
+out across a process pool, cancelling pending work once every pattern hit its cap.
+"""
+
+import fnmatch
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_IGNORED_DIRS = {"node_modules", "__pycache__", "build", "dist", "target", "venv", "site-packages"}
+DEFAULT_IGNORED_FILES = ("*.lock", "package-lock.json", "*.min.js", "*.map", "*.pyc")
+MAX_FILE_BYTES = 1_000_000
+BINARY_SNIFF_BYTES = 8192
+PARALLEL_MIN_FILES = 64
+FILES_PER_TASK = 32
+
+# (base directory, compiled rule, negated, directory-only)
+GitignoreRule = Tuple[str, re.Pattern, bool, bool]
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Multi-repository search scans roots from several threads at once
+_pool_lock = threading.Lock()
+
+
+def _gitignore_regex(pattern: str) -> re.Pattern:
+    """Translate a gitignore glob into a regex over '/'-separated paths relative to its base."""
+    anchored = "/" in pattern.rstrip("/")
+    body = pattern.strip("/")
+    out: List[str] = []
+    i = 0
+    while i < len(body):
+        if body.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif body.startswith("/**", i) and i + 3 == len(body):
+            out.append("/.*")
+            i += 3
+        elif body[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif body[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(body[i]))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(out) + "$")
+
+
+def _load_gitignore(directory: str) -> List[GitignoreRule]:
+    """Parse `.gitignore` in `directory` (if any) into rules relative to that directory."""
+    rules: List[GitignoreRule] = []
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        rules.append((directory, _gitignore_regex(line), negated, line.endswith("/")))
+    return rules
+
+
+def _is_ignored(path: str, is_dir: bool, rules: List[GitignoreRule]) -> bool:
+    """Apply gitignore rules in order; the last matching rule wins."""
+    ignored = False
+    for base, regex, negated, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        rel = os.path.relpath(path, base).replace(os.sep, "/")
+        if regex.match(rel):
+            ignored = not negated
+    return ignored
+
+
+def _skip_entry(entry: os.DirEntry, rules: List[GitignoreRule]) -> bool:
+    """Decide whether a directory entry is excluded from scanning."""
+    if entry.name.startswith("."):
+        return True
+    if entry.is_dir(follow_symlinks=False):
+        return entry.name in DEFAULT_IGNORED_DIRS or _is_ignored(entry.path, True, rules)
+    if any(fnmatch.fnmatch(entry.name, glob) for glob in DEFAULT_IGNORED_FILES):
+        return True
+    try:
+        if entry.stat().st_size > MAX_FILE_BYTES:
+            return True
+    except OSError:
+        return True
+    return _is_ignored(entry.path, False, rules)
+
+
+def iter_source_files(directory: str) -> Iterator[str]:
+    """Yield scannable files under `directory` in a stable order, honouring nested `.gitignore` files."""
+    root = Path(directory)
+    if root.is_file():
+        yield str(root)
+        return
+    stack: List[Tuple[str, List[GitignoreRule]]] = [(str(root), [])]
+    while stack:
+        current, inherited = stack.pop()
+        rules = inherited + _load_gitignore(current)
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs: List[str] = []
+        for entry in entries:
+            if _skip_entry(entry, rules):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file():
+                yield str(root / os.path.relpath(entry.path, root))
+        stack.extend((d, rules) for d in reversed(subdirs))
+
+
+def _scan_file(path: str, regexes: List[re.Pattern], found: Dict[int, List[str]], max_matches: int) -> None:
+    """Scan one file into `found`, skipping it when the leading bytes look binary."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return
+    for idx, line in enumerate(data.decode("utf-8", errors="ignore").splitlines(), start=1):
+        for pattern_idx, regex in enumerate(regexes):
+            if len(found[pattern_idx]) < max_matches and regex.search(line):
+                found[pattern_idx].append(f"{path}:{idx}: {line.strip()}")
+
+
+def _scan_files(paths: List[str], regexes: List[re.Pattern], max_matches: int) -> Dict[int, List[str]]:
+    """Scan a batch of files, stopping once every pattern has `max_matches` lines."""
+    found: Dict[int, List[str]] = {idx: [] for idx in range(len(regexes))}
+    for path in paths:
+        _scan_file(path, regexes, found, max_matches)
+        if all(len(lines) >= max_matches for lines in found.values()):
+            break
+    return found
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared worker pool so repeated tool calls skip process start-up."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: scans run from several threads (multi-repository search),
+            # and forking a multithreaded process can copy locks held by other threads
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 2, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool() -> None:
+    """Shut down the shared pool and forget it, so the next parallel scan starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _merge_in_order(batches: Dict[int, Dict[int, List[str]]], num_patterns: int, max_matches: int) -> Dict[int, List[str]]:
+    """Merge per-batch results in file order, keeping the first `max_matches` lines per pattern."""
+    merged: Dict[int, List[str]] = {idx: [] for idx in range(num_patterns)}
+    for batch_idx in sorted(batches):
+        for pattern_idx, lines in batches[batch_idx].items():
+            merged[pattern_idx].extend(lines[: max_matches - len(merged[pattern_idx])])
+    return merged
+
+
+def _scan_parallel(files: List[str], regexes: List[re.Pattern], max_matches: int) -> Dict[int, List[str]]:
+    """Fan batches out over the process pool and cancel pending batches once all caps are met.
+
+    Caps are only checked over the contiguous prefix of finished batches, so the result
+    is identical to a serial scan regardless of completion order.
+    """
+    pool = _get_pool()
+    pending: Dict[Future, int] = {}
+    for batch_idx, start in enumerate(range(0, len(files), FILES_PER_TASK)):
+        future = pool.submit(_scan_files, files[start:start + FILES_PER_TASK], regexes, max_matches)
+        pending[future] = batch_idx
+
+    done_batches: Dict[int, Dict[int, List[str]]] = {}
+    prefix_end = 0
+    prefix_totals = [0] * len(regexes)
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            done_batches[pending.pop(future)] = future.result()
+        while prefix_end in done_batches:
+            for pattern_idx, lines in done_batches[prefix_end].items():
+                prefix_totals[pattern_idx] += len(lines)
+            prefix_end += 1
+        if all(total >= max_matches for total in prefix_totals):
+            for future in pending:
+                future.cancel()
+            break
+    return _merge_in_order({idx: done_batches[idx] for idx in range(prefix_end)}, len(regexes), max_matches)
+
+
+def scan_directories(
+    regexes: List[re.Pattern],
+    directories: List[str],
+    max_matches: int,
+    parallel_min_files: int = PARALLEL_MIN_FILES,
+) -> Dict[int, List[str]]:
+    """Collect up to `max_matches` matching lines per regex (keyed by regex position).
+
+    Small trees are scanned in-process; larger ones are spread across a process pool.
+    """
+    files = [path for directory in directories for path in iter_source_files(directory)]
+    if len(files) < parallel_min_files:
+        return _scan_files(files, regexes, max_matches)
+    try:
+        return _scan_parallel(files, regexes, max_matches)
+    except (BrokenProcessPool, OSError):
+        # Worker processes died or cannot be started (e.g. in some sandboxes); degrade to serial scanning
+        _discard_pool()
+        return _scan_files(files, regexes, max_matches)
@@ -4,6 +4,7 @@ Each signature captures the intent, input parameters, and output contracts.
 """
 
 import dspy
+from workflow.compact import STAGE_EXCLUDED_FIELDS, compact_signature
 from workflow.schemas import (
     InquiryRecord,
     PrimaryBaseline,
@@ -51,3 +52,16 @@ class OperationalReconciliationSignature(dspy.Signature):
     baseline: PrimaryBaseline = dspy.InputField(desc="Primary baseline report")
     ledger: ProposalLedger = dspy.InputField(desc="Adversarial challenge proposals ledger")
     verdict: ReconciledVerdict = dspy.OutputField(desc="Final calibrated stakeholder verdict and reconciled diagram")
+
+
+# Compact-input variants for stages 3 and 4: upstream models arrive as minified JSON strings
+CompactAdversarialChallengeSignature = compact_signature(
+    AdversarialChallengeSignature,
+    {"inquiry": InquiryRecord, "baseline": PrimaryBaseline},
+    STAGE_EXCLUDED_FIELDS["adversarial"],
+)
+CompactOperationalReconciliationSignature = compact_signature(
+    OperationalReconciliationSignature,
+    {"inquiry": InquiryRecord, "baseline": PrimaryBaseline, "ledger": ProposalLedger},
+    STAGE_EXCLUDED_FIELDS["reconcile"],
+)
@@ -6,8 +6,15 @@ by dspy.ReAct modules or called deterministically within the workflow.
 
 import re
 import subprocess
+import threading
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+
+from workflow.d2_validator import DEFAULT_D2_VALIDATOR
+from workflow.git_index import DEFAULT_GIT_HISTORY
+from workflow.scanner import scan_directories
+
+MAX_SEARCH_MATCHES = 15
 
 
 def search_code(pattern: str, directory: str = ".") -> str:
@@ -23,7 +30,7 @@ def search_code(pattern: str, directory: str = ".") -> str:
     # Prefer ripgrep (rg) if available
     try:
         res = subprocess.run(
-            ["rg", "-n", "--max-count", "15", "--ignore-case", pattern, directory],
+            ["rg", "-n", "--max-count", str(MAX_SEARCH_MATCHES), "--ignore-case", pattern, directory],
             capture_output=True,
             text=True,
             timeout=5
@@ -33,26 +40,102 @@ def search_code(pattern: str, directory: str = ".") -> str:
     except Exception:
         pass
 
-    # Fallback to pure Python search
-    matches: List[str] = []
-    regex = re.compile(pattern, re.IGNORECASE)
-    base_path = Path(directory)
-    
-    for path in base_path.rglob("*"):
-        if path.is_file() and not any(part.startswith(".") for part in path.parts):
-            try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    for idx, line in enumerate(f, start=1):
-                        if regex.search(line):
-                            matches.append(f"{path}:{idx}: {line.strip()}")
-                            if len(matches) >= 15:
-                                break
-            except Exception:
-                continue
-        if len(matches) >= 15:
-            break
-
-    return "\n".join(matches) if matches else f"No matches found for pattern '{pattern}' in {directory}."
+    # Fallback to the gitignore-aware, parallel pure Python scanner
+    found = scan_directories([re.compile(pattern, re.IGNORECASE)], [directory], MAX_SEARCH_MATCHES)[0]
+    return "\n".join(found) if found else f"No matches found for pattern '{pattern}' in {directory}."
+
+
+def compile_for_grouping(pattern: str) -> re.Pattern:
+    """Compile a pattern for attributing matches; patterns Python cannot parse are matched literally."""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return re.compile(re.escape(pattern), re.IGNORECASE)
+
+
+def ripgrep_batch(patterns: List[str], regexes: List[re.Pattern], directories: List[str]) -> Optional[Dict[int, List[str]]]:
+    """Run a single rg invocation for all patterns; returns None when rg is unavailable or fails.
+
+    rg's `--max-count` limits matching lines per file, not in total, so the output is
+    streamed and rg is killed as soon as every pattern has MAX_SEARCH_MATCHES matches.
+    Since the limit counts lines matching any pattern, a file with many matches of one
+    pattern can hide later matches of another pattern in that same file.
+    """
+    cmd = ["rg", "-n", "--no-heading", "--with-filename", "--ignore-case",
+           "--max-count", str(MAX_SEARCH_MATCHES * len(patterns))]
+    for pattern in patterns:
+        cmd.extend(["-e", pattern])
+    cmd.extend(directories)
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8", errors="replace"
+        )
+    except OSError:
+        return None
+
+    timed_out = threading.Event()
+
+    def kill_on_timeout() -> None:
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(5, kill_on_timeout)
+    timer.start()
+    grouped: Dict[int, List[str]] = {idx: [] for idx in range(len(patterns))}
+    complete = False
+    # Leaving the block closes stdout and waits for rg
+    with proc:
+        assert proc.stdout is not None
+        try:
+            for out_line in proc.stdout:
+                out_line = out_line.rstrip("\n")
+                parts = out_line.split(":", 2)
+                text = parts[2] if len(parts) == 3 else out_line
+                for pattern_idx, regex in enumerate(regexes):
+                    if len(grouped[pattern_idx]) < MAX_SEARCH_MATCHES and regex.search(text):
+                        grouped[pattern_idx].append(out_line)
+                if all(len(found) >= MAX_SEARCH_MATCHES for found in grouped.values()):
+                    complete = True
+                    break
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+    if complete:
+        return grouped
+    # rg exits with 1 when nothing matched, >1 on errors (e.g. invalid regex)
+    if timed_out.is_set() or proc.returncode not in (0, 1):
+        return None
+    return grouped
+
+
+def search_code_batch(patterns: List[str], directories: Optional[List[str]] = None) -> str:
+    """Search several regex or keyword patterns in a single scan, grouping matches per pattern.
+
+    Prefer this over repeated `search_code` calls when several identifiers are needed at once.
+
+    Args:
+        patterns: Regex or string patterns to find (e.g. ['class BidderService', 'markInactive']).
+        directories: Root directories to search within (defaults to the current directory).
+
+    Returns:
+        One section per pattern with filepath and line-numbered matches, or a not-found note.
+    """
+    if not patterns:
+        return "No patterns given."
+    roots = directories or ["."]
+    regexes = [compile_for_grouping(p) for p in patterns]
+
+    grouped = ripgrep_batch(patterns, regexes, roots)
+    if grouped is None:
+        grouped = scan_directories(regexes, roots, MAX_SEARCH_MATCHES)
+
+    sections: List[str] = []
+    for pattern_idx, pattern in enumerate(patterns):
+        found = grouped[pattern_idx]
+        sections.append(f"=== Pattern '{pattern}' ({len(found)} matches) ===")
+        sections.append("\n".join(found) if found else f"No matches found for pattern '{pattern}' in {', '.join(roots)}.")
+    return "\n".join(sections)
 
 
 def read_code_slice(filepath: str, start_line: int = 1, end_line: int = 50) -> str:
@@ -83,42 +166,46 @@ def read_code_slice(filepath: str, start_line: int = 1, end_line: int = 50) -> s
         return f"Error reading {filepath}: {str(e)}"
 
 
+def git_history(filepath: str, start_line: int = 1, end_line: int = 50, max_commits: int = 10) -> str:
+    """Show the commit log of a file and the blame (commit, author, date, subject) of a line range.
+
+    Use it to ground git_intent_summary in real commit history and author intent.
+
+    Args:
+        filepath: Relative or absolute path to a file inside a git repository.
+        start_line: 1-indexed first line to blame.
+        end_line: 1-indexed last line to blame.
+        max_commits: Maximum number of log entries to list.
+
+    Returns:
+        Recent commits touching the file, then blame grouped by commit for the range.
+    """
+    return DEFAULT_GIT_HISTORY.describe(filepath, start_line, end_line, max_commits)
+
+
 def validate_d2_syntax(d2_code: str) -> str:
     """Validate D2 diagram syntax and check for unescaped placeholder errors.
 
+    Results are memoized per normalized diagram, so re-validating an unchanged
+    diagram does not spawn another d2 compile.
+
     Args:
         d2_code: Source D2 markup string.
 
     Returns:
         Validation status message.
     """
-    if not d2_code or not d2_code.strip():
-        return "Warning: Empty D2 diagram."
+    return DEFAULT_D2_VALIDATOR.validate(d2_code)
 
-    # Heuristic check for common syntax errors
-    open_braces = d2_code.count("{")
-    close_braces = d2_code.count("}")
-    if open_braces != close_braces:
-        return f"D2 Syntax Error: Unbalanced curly braces ({open_braces} open vs {close_braces} close)."
 
-    # Check for unescaped template placeholders (e.g. {node})
-    if re.search(r"\{[a-zA-Z_]+\}", d2_code):
-        return "D2 Syntax Error: Unescaped template placeholder detected (e.g. '{node}')."
+def validate_d2_batch(diagrams: List[str]) -> str:
+    """Validate several D2 diagrams in one call (e.g. the baseline and reconciled diagrams).
 
-    # If d2 CLI is available, run a test compile
-    try:
-        res = subprocess.run(
-            ["d2", "-", "/dev/null"],
-            input=d2_code,
-            capture_output=True,
-            text=True,
-            timeout=3
-        )
-        if res.returncode == 0:
-            return "Valid D2 syntax (verified with d2 compiler)."
-        else:
-            return f"D2 Compilation Warning: {res.stderr.strip()}"
-    except Exception:
-        pass
+    Args:
+        diagrams: List of D2 markup strings.
 
-    return "D2 syntax check passed (heuristic validation)."
+    Returns:
+        One numbered validation status line per diagram, in input order.
+    """
+    results = DEFAULT_D2_VALIDATOR.validate_many(diagrams)
+    return "\n".join(f"[{i}] {result}" for i, result in enumerate(results, start=1))
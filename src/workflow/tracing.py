@@ -0,0 +1,179 @@
+"""Span tracing for the Code Grounding workflow, exportable as Chrome trace events.
+
+`WorkflowTracer` records one span per workflow stage and, as a dspy callback, one span
+per LM call (model, prompt/completion tokens, LM cache hit) and per tool invocation
+(tool name, memo hit). `to_chrome_trace()` produces trace-event JSON that loads in
+chrome://tracing or https://ui.perfetto.dev as a flame chart.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dspy.utils.callback import BaseCallback
+from pydantic import BaseModel, Field
+
+
+class TraceSpan(BaseModel):
+    name: str
+    category: str = Field(..., description="workflow, stage, lm or tool")
+    start_s: float = Field(..., description="Seconds since the tracer was created")
+    end_s: Optional[float] = None
+    thread_id: int = 0
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_s if self.end_s is not None else self.start_s) - self.start_s
+
+
+def _history_entry(lm: Any, outputs: Optional[Any]) -> Optional[Dict[str, Any]]:
+    """The LM history entry recorded for the call that returned `outputs`.
+
+    Matched by identity (dspy stores the returned outputs object in the entry), not by
+    position: concurrent calls on the same LM may have appended entries since.
+    """
+    if outputs is None:
+        return None
+    for entry in reversed(getattr(lm, "history", [])):
+        if entry.get("outputs") is outputs:
+            return entry
+    return None
+
+
+class WorkflowTracer(BaseCallback):
+    """Collects stage, LM and tool spans across workflow runs."""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._thread_ids: Dict[int, int] = {}
+        self._open_calls: Dict[str, Tuple[TraceSpan, Any]] = {}
+        # Per thread/context, so concurrent runs annotate their own innermost span
+        self._stage_stack: contextvars.ContextVar[Tuple[TraceSpan, ...]] = contextvars.ContextVar(
+            f"workflow_tracer_stages_{id(self)}", default=()
+        )
+        self.spans: List[TraceSpan] = []
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self._open_calls.clear()
+        self._stage_stack.set(())
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def _thread_id(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            return self._thread_ids.setdefault(ident, len(self._thread_ids) + 1)
+
+    def _open(self, name: str, category: str, **attributes: Any) -> TraceSpan:
+        span = TraceSpan(name=name, category=category, start_s=self._now(), thread_id=self._thread_id(),
+                         attributes=attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **attributes: Any) -> Iterator[TraceSpan]:
+        """Record a span around a block; `annotate` adds attributes to the innermost one."""
+        span = self._open(name, category, **attributes)
+        token = self._stage_stack.set((*self._stage_stack.get(), span))
+        try:
+            yield span
+        finally:
+            self._stage_stack.reset(token)
+            span.end_s = self._now()
+
+    def annotate(self, **attributes: Any) -> None:
+        stack = self._stage_stack.get()
+        if stack:
+            stack[-1].attributes.update(attributes)
+
+    def _track_call(self, call_id: str, span: TraceSpan, instance: Any) -> None:
+        with self._lock:
+            self._open_calls[call_id] = (span, instance)
+
+    def _finish_call(self, call_id: str) -> Optional[Tuple[TraceSpan, Any]]:
+        with self._lock:
+            opened = self._open_calls.pop(call_id, None)
+        if opened is not None:
+            opened[0].end_s = self._now()
+        return opened
+
+    # dspy callback hooks
+
+    def on_lm_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]):
+        self._track_call(call_id, self._open(getattr(instance, "model", type(instance).__name__), "lm"), instance)
+
+    def on_lm_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None):
+        opened = self._finish_call(call_id)
+        if opened is None:
+            return
+        span, lm = opened
+        entry = _history_entry(lm, outputs)
+        if entry is not None:
+            usage = entry.get("usage") or {}
+            span.attributes.update(
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                cache_hit=bool(getattr(entry.get("response"), "cache_hit", False)),
+            )
+        if exception is not None:
+            span.attributes["error"] = repr(exception)
+
+    def on_tool_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]):
+        span = self._open(getattr(instance, "name", "tool"), "tool", args=inputs.get("kwargs", inputs))
+        self._track_call(call_id, span, instance)
+
+    def on_tool_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None):
+        opened = self._finish_call(call_id)
+        if opened is None:
+            return
+        span, tool = opened
+        span.end_s = self._now()
+        call_state = getattr(getattr(tool, "func", None), "call_state", None)
+        memo_hit = getattr(call_state, "hit", None)
+        if memo_hit is not None:
+            span.attributes["memo_hit"] = memo_hit
+        if exception is not None:
+            span.attributes["error"] = repr(exception)
+
+    # Export
+
+    def summary(self) -> Dict[str, float]:
+        """Total seconds per `category:name`, e.g. to find the dominant stage."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            key = f"{span.category}:{span.name}"
+            totals[key] = totals.get(key, 0.0) + span.duration_s
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace-event JSON ('X' complete events, microsecond timestamps)."""
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round(span.start_s * 1e6, 3),
+                "dur": round(span.duration_s * 1e6, 3),
+                "pid": 1,
+                "tid": span.thread_id,
+                "args": json.loads(json.dumps(span.attributes, default=str)),
+            }
+            for span in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> Path:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(self.to_chrome_trace(), ensure_ascii=False), encoding="utf-8")
+        return out
@@ -0,0 +1,147 @@
+"""Bounded ReAct trajectories for `use_react=True`.
+
+dspy.ReAct re-sends its whole trajectory (thoughts, tool calls and raw tool outputs)
+on every iteration, so prompt size grows quadratically with the number of steps.
+`CompactingReAct` formats a compacted view of the trajectory instead: the most
+recent observations stay verbatim, older ones shrink to a short preview, repeated
+outputs and re-read code slices point at their latest copy, and the whole view is
+held under a token ceiling. The full trajectory is still returned on the prediction.
+"""
+
+import hashlib
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+import dspy
+
+from common.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+
+DEFAULT_TRAJECTORY_TOKENS = 4000
+DEFAULT_KEEP_RECENT = 2
+ELIDED_PREVIEW_LINES = 2
+
+STEP_FIELDS = ("thought", "tool_name", "tool_args", "observation")
+_STEP_KEY = re.compile(r"^(?:thought|tool_name|tool_args|observation)_(\d+)$")
+
+
+def _step_indices(trajectory: Dict[str, Any]) -> List[int]:
+    indices = {int(m.group(1)) for m in map(_STEP_KEY.match, trajectory) if m}
+    return sorted(indices)
+
+
+def _slice_range(tool_name: Any, tool_args: Any) -> Optional[tuple]:
+    """(filepath, start, end) of a read_code_slice call, or None for other tools."""
+    if tool_name != "read_code_slice" or not isinstance(tool_args, dict) or "filepath" not in tool_args:
+        return None
+    try:
+        return str(tool_args["filepath"]), int(tool_args.get("start_line", 1)), int(tool_args.get("end_line", 50))
+    except (TypeError, ValueError):
+        return None
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}\n… [truncated {len(text) - max_chars} chars]"
+
+
+class TrajectoryCompactor:
+    """Builds a bounded view of a ReAct trajectory for the next LM call."""
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_TRAJECTORY_TOKENS,
+        keep_recent: int = DEFAULT_KEEP_RECENT,
+        preview_lines: int = ELIDED_PREVIEW_LINES,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.preview_lines = preview_lines
+
+    @staticmethod
+    def estimate(trajectory: Dict[str, Any]) -> int:
+        return sum(estimate_tokens(f"{key}: {value}") for key, value in trajectory.items())
+
+    def _preview(self, text: str) -> str:
+        lines = text.splitlines()
+        if len(lines) <= self.preview_lines:
+            return text
+        head = "\n".join(lines[: self.preview_lines])
+        return f"{head}\n… [elided {len(lines) - self.preview_lines} more lines]"
+
+    def _dedupe(self, compacted: Dict[str, Any], steps: List[int]) -> None:
+        """Point repeated observations and re-read code slices at their most recent copy."""
+        latest_by_digest: Dict[str, int] = {}
+        later_slices: List[tuple] = []
+        for idx in reversed(steps):
+            key = f"observation_{idx}"
+            if key not in compacted:
+                continue
+            digest = hashlib.sha256(str(compacted[key]).strip().encode("utf-8")).hexdigest()
+            span = _slice_range(compacted.get(f"tool_name_{idx}"), compacted.get(f"tool_args_{idx}"))
+            covering = next(
+                (later for later, (path, start, end) in later_slices
+                 if span and path == span[0] and start <= span[1] and span[2] <= end),
+                None,
+            )
+            if digest in latest_by_digest:
+                compacted[key] = f"[same output as observation_{latest_by_digest[digest]}]"
+            elif covering is not None:
+                compacted[key] = f"[lines {span[1]}-{span[2]} of {span[0]} are re-read in observation_{covering}]"
+            else:
+                latest_by_digest[digest] = idx
+                if span:
+                    later_slices.append((idx, span))
+
+    def compact(self, trajectory: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a compacted copy of `trajectory`; the input is left untouched."""
+        compacted = dict(trajectory)
+        steps = _step_indices(compacted)
+        if not steps:
+            return compacted
+        self._dedupe(compacted, steps)
+
+        older = steps[: -self.keep_recent] if self.keep_recent > 0 else steps
+        for idx in older:
+            key = f"observation_{idx}"
+            if key in compacted:
+                compacted[key] = self._preview(str(compacted[key]))
+
+        # Over the ceiling: stub old observations, then drop whole old steps, oldest first
+        for idx in older:
+            if self.estimate(compacted) <= self.max_tokens:
+                return compacted
+            if f"observation_{idx}" in compacted:
+                compacted[f"observation_{idx}"] = "[elided]"
+        for idx in steps[:-1]:
+            if self.estimate(compacted) <= self.max_tokens:
+                return compacted
+            for field in STEP_FIELDS:
+                compacted.pop(f"{field}_{idx}", None)
+
+        # Only the latest step is left and it alone exceeds the ceiling
+        overflow = self.estimate(compacted) - self.max_tokens
+        last_key = f"observation_{steps[-1]}"
+        if overflow > 0 and last_key in compacted:
+            text = str(compacted[last_key])
+            compacted[last_key] = _truncate(text, max(0, estimate_tokens(text) - overflow))
+        return compacted
+
+
+class CompactingReAct(dspy.ReAct):
+    """dspy.ReAct that formats a bounded, deduplicated view of its trajectory each iteration."""
+
+    def __init__(
+        self,
+        signature: type[dspy.Signature],
+        tools: List[Callable],
+        max_iters: int = 20,
+        compactor: Optional[TrajectoryCompactor] = None,
+    ):
+        super().__init__(signature, tools=tools, max_iters=max_iters)
+        self.compactor = compactor if compactor is not None else TrajectoryCompactor()
+
+    def _format_trajectory(self, trajectory: Dict[str, Any]):
+        return super()._format_trajectory(self.compactor.compact(trajectory))
@@ -0,0 +1,187 @@
+"""Full-pipeline verdict cache for repeated questions about the same code.
+
+During an incident the same question about the same code is asked repeatedly. Entries
+are bucketed by a scope key over the caller's `operational_context`, the inquiry's
+`target_systems` and a hash of the code context discovery actually received (submitted
+or retrieved), so a change to any of them misses. Within a bucket the default is an
+exact match on the normalized `raw_question`; a stored run is returned together with a
+provenance pointer to the original inquiry.
+
+Fuzzy matching is opt-in (`fuzzy_threshold`): questions must share their content words
+(Jaccard similarity) *and* keep them in the same relative order, and their negation words
+must be identical. Character-level similarity is deliberately not used, since
+"pause"/"resume" or an inserted "not" barely change it while inverting the question; word
+order is checked because "A calls B" and "B calls A" use the same words.
+
+The lookup needs the inquiry's target systems and the retrieved context, so it runs after
+ingress: a hit saves stages 2-4, not the ingress call.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from workflow.policy import ExecutionPlan
+from workflow.schemas import InquiryRecord, PrimaryBaseline, ProposalLedger, ReconciledVerdict
+
+
+# Words that never change what is being asked; negations are deliberately absent
+STOPWORDS = frozenset({"a", "an", "the", "do", "does", "did", "is", "are", "was", "were", "be", "it", "its",
+                       "of", "to", "in", "on", "for", "and", "that", "this", "please"})
+NEGATIONS = frozenset({"not", "no", "never", "without", "nor", "cannot", "t"})
+
+
+def normalize_question(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def content_tokens(question: str) -> FrozenSet[str]:
+    """Words of a normalized question minus stopwords."""
+    return frozenset(question.split()) - STOPWORDS
+
+
+def _first_positions(question: str) -> Dict[str, int]:
+    positions: Dict[str, int] = {}
+    for idx, word in enumerate(question.split()):
+        if word not in STOPWORDS:
+            positions.setdefault(word, idx)
+    return positions
+
+
+def order_agreement(a: str, b: str) -> float:
+    """Fraction of pairs of shared content words that appear in the same order in both questions."""
+    positions_a, positions_b = _first_positions(a), _first_positions(b)
+    shared = sorted(set(positions_a) & set(positions_b), key=positions_a.__getitem__)
+    pairs = [(x, y) for i, x in enumerate(shared) for y in shared[i + 1:]]
+    if not pairs:
+        return 1.0
+    return sum(positions_b[x] < positions_b[y] for x, y in pairs) / len(pairs)
+
+
+def token_similarity(a: str, b: str) -> float:
+    """Lower of content-word Jaccard and word-order agreement; 0.0 if the negations differ."""
+    tokens_a, tokens_b = content_tokens(a), content_tokens(b)
+    if tokens_a & NEGATIONS != tokens_b & NEGATIONS:
+        return 0.0
+    union = tokens_a | tokens_b
+    overlap = len(tokens_a & tokens_b) / len(union) if union else 1.0
+    return min(overlap, order_agreement(a, b))
+
+
+def context_hash(code_context: str) -> str:
+    return hashlib.sha256(code_context.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def scope_key(operational_context: str, target_systems: Sequence[str], code_context: str) -> str:
+    """Bucket key: everything besides the question that shapes a verdict."""
+    payload = json.dumps({
+        "operational_context": " ".join(operational_context.split()),
+        "target_systems": sorted({system.strip().lower() for system in target_systems}),
+        "code_context": context_hash(code_context),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class VerdictProvenance(BaseModel):
+    """Where a cached verdict came from."""
+    entry_id: str = Field(..., description="Cache entry that served this result")
+    source_inquiry_id: str = Field(..., description="Inquiry that originally produced the verdict")
+    source_question: str = Field(..., description="raw_question of the original inquiry")
+    similarity: float = Field(..., description="Order-aware content-word similarity of the questions (1.0 for an exact match)")
+    cached_at: float = Field(..., description="Unix time the entry was stored")
+
+
+class CachedResult(BaseModel):
+    inquiry: InquiryRecord
+    baseline: PrimaryBaseline
+    ledger: ProposalLedger
+    verdict: ReconciledVerdict
+    plan: ExecutionPlan
+    provenance: VerdictProvenance
+
+
+class VerdictCache:
+    """Filesystem cache of completed runs under `<directory>/<scope_key>/<entry_id>.json`."""
+
+    def __init__(self, directory: str = ".workflow_verdicts", fuzzy_threshold: Optional[float] = None):
+        self.directory = Path(directory)
+        self.fuzzy_threshold = fuzzy_threshold
+        self._buckets: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _bucket(self, key: str) -> List[Dict[str, Any]]:
+        if key not in self._buckets:
+            self._buckets[key] = [
+                json.loads(path.read_text(encoding="utf-8"))
+                for path in sorted((self.directory / key).glob("*.json"))
+            ]
+        return self._buckets[key]
+
+    def lookup(
+        self,
+        raw_question: str,
+        operational_context: str,
+        target_systems: Sequence[str],
+        code_context: str,
+    ) -> Optional[CachedResult]:
+        """Return a stored run with the same scope and question (or, if enabled, a fuzzy match)."""
+        question = normalize_question(raw_question)
+        bucket = self._bucket(scope_key(operational_context, target_systems, code_context))
+        best = next((entry for entry in reversed(bucket) if entry["question"] == question), None)
+        best_score = 1.0
+        if best is None and self.fuzzy_threshold is not None:
+            scored = [(token_similarity(question, entry["question"]), entry) for entry in bucket]
+            best_score, best = max(scored, key=lambda pair: pair[0], default=(0.0, None))
+            if best_score < self.fuzzy_threshold:
+                best = None
+        if best is None:
+            return None
+        provenance = VerdictProvenance(
+            entry_id=best["entry_id"],
+            source_inquiry_id=best["outputs"]["inquiry"]["inquiry_id"],
+            source_question=best["raw_question"],
+            similarity=best_score,
+            cached_at=best["saved_at"],
+        )
+        return CachedResult.model_validate({**best["outputs"], "provenance": provenance})
+
+    def store(
+        self,
+        raw_question: str,
+        operational_context: str,
+        code_context: str,
+        inquiry: InquiryRecord,
+        baseline: PrimaryBaseline,
+        ledger: ProposalLedger,
+        verdict: ReconciledVerdict,
+        plan: ExecutionPlan,
+    ) -> Path:
+        """Atomically persist a completed run, scoped by the inquiry's target systems."""
+        key = scope_key(operational_context, inquiry.target_systems, code_context)
+        bucket = self._bucket(key)
+        entry_id = uuid.uuid4().hex[:12]
+        entry = {
+            "entry_id": entry_id,
+            "raw_question": raw_question,
+            "question": normalize_question(raw_question),
+            "saved_at": time.time(),
+            "outputs": {
+                name: model.model_dump(mode="json")
+                for name, model in (
+                    ("inquiry", inquiry), ("baseline", baseline), ("ledger", ledger), ("verdict", verdict), ("plan", plan)
+                )
+            },
+        }
+        path = self.directory / key / f"{entry_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+        bucket.append(entry)
+        return path
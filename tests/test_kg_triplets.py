@@ -0,0 +1,182 @@
+"""Tests for the knowledge graph triplet builders (no LM calls: extractors are faked)."""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import dspy
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from knowledge_graph.bench_multi_dimension import measure as measure_multi_dimension, mock_lm
+from knowledge_graph.entity_index import EntityIndex, normalize_entity, triplet_tokens
+from knowledge_graph.extraction_manifest import ExtractionManifest
+from knowledge_graph.jsonl_to_html import load_triplets_from_jsonl
+from knowledge_graph.markdown_splitter import TextChunk
+from knowledge_graph.simple_build_kg_triplets import (
+    Triplet,
+    TripletJsonlWriter,
+    save_triplets_as_jsonl,
+    iter_chunk_triplets,
+    iter_incremental_chunk_triplets,
+    merge_triplets,
+)
+from knowledge_graph.simple_build_kg_triplets_multi_dimension import DimensionTriplet, extract_all_dimensions
+from knowledge_graph.triplet_store import TripletStore
+
+
+def make_chunks(count: int) -> list[TextChunk]:
+    return [
+        TextChunk(content=f"Service{i} depends on Service{i + 1} for billing.", chunk_type="paragraph", chunk_index=i)
+        for i in range(count)
+    ]
+
+
+class FakeExtractor:
+    """Returns one triplet per chunk and records the context size each call received."""
+
+    def __init__(self):
+        self.context_sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, text, existing_triplets):
+        words = text.split()
+        with self._lock:
+            self.context_sizes[words[0]] = len(existing_triplets.existing_triplets)
+        triplet = Triplet(subject=words[0], predicate="depends on", object=words[3])
+        return SimpleNamespace(result=SimpleNamespace(triplets={triplet}))
+
+
+def test_parallel_extraction_uses_wave_snapshots_and_merges_deterministically():
+    chunks = make_chunks(7)
+    serial, parallel = FakeExtractor(), FakeExtractor()
+    serial_results = list(iter_chunk_triplets(chunks, serial, workers=1))
+    parallel_results = list(iter_chunk_triplets(chunks, parallel, workers=3))
+
+    assert [c.chunk_index for c, _ in parallel_results] == list(range(7))
+    assert merge_triplets(t for _, t in parallel_results) == merge_triplets(t for _, t in serial_results)
+    assert [serial.context_sizes[f"Service{i}"] for i in range(7)] == [0, 1, 2, 3, 4, 5, 6]
+    # Each wave of three sees only the triplets of earlier waves
+    assert [parallel.context_sizes[f"Service{i}"] for i in range(7)] == [0, 0, 0, 3, 3, 3, 6]
+
+
+def test_entity_index_selects_mentioned_entities_then_neighbours_within_budget():
+    linear = Triplet(subject="Linear", predicate="is", object="Issue Tracker")
+    agents = Triplet(subject="AI Agents", predicate="integrate with", object="Linear")
+    tracker = Triplet(subject="Issue Tracker", predicate="stores", object="Tickets")
+    unrelated = Triplet(subject="Postgres", predicate="stores", object="Rows")
+    index = EntityIndex([linear, agents, tracker, unrelated])
+
+    assert normalize_entity("  Linear, Inc. ") == "linear inc"
+    assert index.mentioned_entities("How do AI agents use Linear?") == ["ai agents", "linear"]
+    # Direct mentions first, then one-hop neighbours; never the unrelated triplet
+    assert index.select("AI agents and Linear.", max_tokens=10_000) == {linear, agents, tracker}
+    assert index.select("AI agents and Linear.", max_tokens=triplet_tokens(agents) + triplet_tokens(linear)) == {agents, linear}
+    assert index.select("Nothing relevant here.") == set()
+
+
+def test_budgeted_context_stays_flat_as_the_document_grows():
+    extractor = FakeExtractor()
+    list(iter_chunk_triplets(make_chunks(30), extractor, context_tokens=200))
+
+    # Chunk i mentions Service{i}: its predecessor's triplet plus one neighbour, however long the chain
+    assert [extractor.context_sizes[f"Service{i}"] for i in (0, 1, 2, 29)] == [0, 1, 2, 2]
+
+
+def test_jsonl_writer_appends_only_new_triplets(tmp_path):
+    first = Triplet(subject="Linear", predicate="is", object="Issue Tracker")
+    second = Triplet(subject="AI Agents", predicate="integrate with", object="Linear")
+    path = tmp_path / "triplets.jsonl"
+
+    with TripletJsonlWriter(str(path), fsync_interval_s=0) as writer:
+        assert writer.write([first]) == [first]
+        assert writer.write([first, second]) == [second]
+        assert writer.write([second]) == []
+    assert path.read_text(encoding="utf-8").count("\n") == 2
+    assert load_triplets_from_jsonl(path) == {first, second}
+
+    third = Triplet(subject="Tickets", predicate="belong to", object="Projects")
+    with TripletJsonlWriter(str(path), append=True) as writer:
+        assert writer.write([first, third]) == [third]
+    assert path.read_text(encoding="utf-8").count("\n") == 3
+    assert load_triplets_from_jsonl(path) == {first, second, third}
+
+
+def test_incremental_rebuild_extracts_only_changed_chunks_and_retracts_removed(tmp_path):
+    path = tmp_path / "manifest.json"
+    chunks = make_chunks(5)
+    first = FakeExtractor()
+    manifest = ExtractionManifest(str(path), fingerprint="v1")
+    full = list(iter_incremental_chunk_triplets(chunks, first, manifest))
+    manifest.save()
+    assert len(first.context_sizes) == 5 and not any(reused for _, _, reused in full)
+
+    # Chunk 2 edited, chunk 4 removed: only the edit reaches the extractor
+    edited = TextChunk(content="Service2 depends on Ledger for billing.", chunk_type="paragraph", chunk_index=2)
+    new_chunks = [chunks[0], chunks[1], edited, chunks[3]]
+    second = FakeExtractor()
+    manifest = ExtractionManifest(str(path), fingerprint="v1")
+    retracted = manifest.retain(chunk.content for chunk in new_chunks)
+    rebuilt = list(iter_incremental_chunk_triplets(new_chunks, second, manifest))
+
+    assert retracted == {
+        Triplet(subject="Service2", predicate="depends on", object="Service3"),
+        Triplet(subject="Service4", predicate="depends on", object="Service5"),
+    }
+    assert list(second.context_sizes) == ["Service2"]
+    assert second.context_sizes["Service2"] == 2  # only earlier chunks' triplets are its context
+    assert [(c.chunk_index, reused) for c, _, reused in rebuilt] == [(0, True), (1, True), (2, False), (3, True)]
+    assert Triplet(subject="Service2", predicate="depends on", object="Ledger") in merge_triplets(t for _, t, _ in rebuilt)
+
+    manifest.save()
+    assert len(ExtractionManifest(str(path), fingerprint="v1")) == 4
+    # A different extraction setup (model, instructions) invalidates every entry
+    assert len(ExtractionManifest(str(path), fingerprint="v2")) == 0
+
+
+def test_triplet_store_round_trips_jsonl_and_memory_maps(tmp_path):
+    triplets = [
+        Triplet(subject="Linear", predicate="is", object="Issue Tracker"),
+        Triplet(subject="AI Agents", predicate="integrate with", object="Linear"),
+        Triplet(subject="Linear", predicate="is", object="Issue Tracker"),
+        Triplet(subject="Équipe", predicate="uses", object="Linear"),
+    ]
+    jsonl = tmp_path / "triplets.jsonl"
+    save_triplets_as_jsonl(triplets, str(jsonl))
+
+    store = TripletStore.from_jsonl(jsonl)
+    assert len(store) == 3 and len(store.entities) == 4 and len(store.predicate_names) == 3
+    assert store.subjects.dtype == "int32"
+    assert list(store) == [triplets[0], triplets[1], triplets[3]]  # first-seen order, deduplicated
+    assert sorted(store.with_entity("Linear").tolist()) == [0, 1, 2]
+
+    loaded = TripletStore.load(store.save(tmp_path / "triplets.kgt"))
+    assert list(loaded) == list(store)
+    assert triplets[3] in loaded and Triplet(subject="Linear", predicate="is", object="Tickets") not in loaded
+    assert not loaded.add("Linear", "is", "Issue Tracker")
+    assert loaded.add("Linear", "is", "Tickets") and len(loaded) == 4
+
+    exported = loaded.to_jsonl(tmp_path / "exported.jsonl")
+    assert load_triplets_from_jsonl(exported) == loaded.to_triplets()
+
+
+def test_fused_multi_dimension_extraction_makes_one_call_per_chunk():
+    text = "\n\n".join(f"Paragraph {i}: Linear integrates with AI agents that triage issues for the team." for i in range(4))
+    rows = {mode: (calls, tokens) for mode, calls, tokens, _ in measure_multi_dimension(text, latency_ms=0)}
+
+    assert rows["serial"][0] == rows["concurrent"][0] == 12
+    assert rows["fused"][0] == 4
+    assert rows["fused"][1] < rows["serial"][1]
+
+    chunks = make_chunks(2)
+    with dspy.context(lm=mock_lm(0, chunks, fused=True), adapter=dspy.ChatAdapter()):
+        fused = extract_all_dimensions(chunks, "fused")
+    assert set(fused) == {"TECH_RELATIONS", "COMPANY_RELATIONS", "PEOPLE_RELATIONS"}
+    assert all({t.subject for t in triplets} == {"Chunk0", "Chunk1"} for triplets in fused.values())
+
+
+def test_dimension_tags_are_normalized_to_prompt_keys():
+    tags = ["tech_relations", "Tech Relations", "TECH", " people-relations ", "COMPANY_RELATIONS", "finance"]
+    normalized = [DimensionTriplet(subject="s", predicate="p", object="o", dimension=tag).dimension for tag in tags]
+    assert normalized == ["TECH_RELATIONS", "TECH_RELATIONS", "TECH_RELATIONS", "PEOPLE_RELATIONS", "COMPANY_RELATIONS", "FINANCE"]
@@ -4,12 +4,23 @@ NOTE: The 50-char minimum threshold means many short markdown snippets
 produce zero chunks. These tests use sufficiently long content.
 """
 
+import hashlib
+import io
+import itertools
+import json
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
 
-from knowledge_graph.markdown_splitter import split_markdown_into_chunks, TextChunk
+from knowledge_graph.bench_markdown_splitter import synthetic_markdown
+from knowledge_graph.markdown_splitter import (
+    ChunkView,
+    TextChunk,
+    iter_markdown_chunks,
+    split_markdown_into_chunks,
+    split_markdown_into_spans,
+)
 
 
 def make_text(parts: list[str], separator: str = "\n\n") -> str:
@@ -93,6 +104,100 @@ def test_bulleted_item_with_continuation():
         assert "continuation text" in chunks[0].content
 
 
+EDGE_CASE_MD = "\n".join([
+    "Intro paragraph that is long enough to pass the fifty character minimum.",
+    "# Top",
+    "## Section with list",
+    "Section text before the list that is dropped once a list item is emitted.",
+    "- Bullet inside a section that is long enough to pass the threshold.",
+    "  indented continuation of the bullet",
+    "",
+    "3. Numbered inside the section, also long enough to pass the threshold.",
+    "## Section without list items but long enough to be kept as one chunk",
+    "First line of the section body.",
+    "",
+    "Second line of the section body after a blank line.",
+    "### Deep header",
+    "- short",
+    "Sentence one is here. " * 120,
+])
+
+
+def test_streaming_matches_list_output():
+    for text in (LONG_MD, EDGE_CASE_MD, EDGE_CASE_MD + "\n", "", "Too short"):
+        expected = split_markdown_into_chunks(text)
+        assert list(iter_markdown_chunks(io.StringIO(text))) == expected
+        assert list(iter_markdown_chunks(text.split("\n"))) == expected
+
+
+def test_streaming_is_lazy():
+    """The first chunk is available without reading the rest of the input."""
+    endless = itertools.cycle(LONG_MD.split("\n"))
+    first_two = list(itertools.islice(iter_markdown_chunks(endless), 2))
+    assert [c.chunk_index for c in first_two] == [0, 1]
+
+
+def test_packed_strategy_merges_small_items_and_drops_nothing():
+    text = make_text(["# Notes", *[f"- short item {i}" for i in range(20)], "## Long", "Sentence number one is here. " * 200])
+    headers_first = split_markdown_into_chunks(text)
+    packed = split_markdown_into_chunks(text, strategy="packed", target_tokens=100)
+
+    # headers_first keeps each section whole (items are under 50 chars); packing merges the
+    # items into one chunk and splits the oversized section
+    assert [c.chunk_type for c in headers_first] == ["header_section", "header_section"]
+    assert packed[0].content == "\n".join(f"short item {i}" for i in range(20))
+    assert (packed[0].chunk_type, packed[0].header_context) == ("bulleted_item", "Notes")
+    # The long paragraph is split at sentence boundaries near the 400-char budget
+    long_chunks = packed[1:]
+    assert all(c.header_context == "Notes > Long" and c.content.endswith(".") for c in long_chunks)
+    assert all(len(c.content) <= 400 for c in long_chunks)
+    assert " ".join(c.content for c in long_chunks) == ("Sentence number one is here. " * 200).strip()
+    assert [c.chunk_index for c in packed] == list(range(len(packed)))
+    assert list(iter_markdown_chunks(io.StringIO(text), "packed", 100)) == packed
+
+
+def test_packed_strategy_reduces_chunks_on_notes():
+    text = NOTES_MD.read_text(encoding="utf-8")
+    assert len(split_markdown_into_chunks(text, strategy="packed")) * 3 <= len(split_markdown_into_chunks(text))
+
+
+def test_spans_are_views_of_the_same_chunks():
+    long_paragraph = "A sentence about agents and Linear. " * 80
+    text = long_paragraph + "\n\n" + EDGE_CASE_MD
+    for strategy, target_tokens in (("headers_first", 500), ("packed", 60)):
+        expected = split_markdown_into_chunks(text, strategy, target_tokens)
+        spans = split_markdown_into_spans(text, strategy, target_tokens)
+        assert len(spans) == len(expected)
+        assert all(isinstance(view, ChunkView) for view in spans)
+        assert [view.to_text_chunk() for view in spans] == expected
+        assert [(v.content, v.chunk_type, v.header_context, v.chunk_index) for v in spans[1:3]] == [
+            (c.content, c.chunk_type, c.header_context, c.chunk_index) for c in expected[1:3]
+        ]
+        # Header contexts and chunk types are stored once each
+        assert len(spans.header_contexts) == len({c.header_context for c in expected})
+        assert len(spans.chunk_types) == len({c.chunk_type for c in expected})
+
+
+# Outputs recorded from the original multi-pattern splitter, before the single-pass rewrite
+GOLDEN = json.loads((Path(__file__).parent / "data" / "markdown_splitter_golden.json").read_text(encoding="utf-8"))
+NOTES_MD = Path(__file__).resolve().parent.parent / "src/simplest/docs/images/notes-on-linear-and-ai-agents.postprocessed.md"
+
+
+def golden_digest(chunks: list[TextChunk]) -> dict:
+    dumped = json.dumps([c.model_dump() for c in chunks], sort_keys=True)
+    return {"chunks": len(chunks), "sha256": hashlib.sha256(dumped.encode()).hexdigest()}
+
+
+def test_golden_outputs():
+    assert [c.model_dump() for c in split_markdown_into_chunks(LONG_MD)] == GOLDEN["long_md"]
+    assert [c.model_dump() for c in split_markdown_into_chunks(EDGE_CASE_MD)] == GOLDEN["edge_case_md"]
+    assert golden_digest(split_markdown_into_chunks(NOTES_MD.read_text(encoding="utf-8"))) == GOLDEN["notes"]
+    for seed in range(3):
+        text = synthetic_markdown(300_000, seed)
+        assert golden_digest(split_markdown_into_chunks(text)) == GOLDEN[f"synthetic_300k_seed{seed}"]
+        assert golden_digest(list(iter_markdown_chunks(io.StringIO(text)))) == GOLDEN[f"synthetic_300k_seed{seed}"]
+
+
 if __name__ == "__main__":
     import traceback
 
@@ -105,6 +210,12 @@ if __name__ == "__main__":
         test_short_text_skipped,
         test_continuation_lines,
         test_bulleted_item_with_continuation,
+        test_streaming_matches_list_output,
+        test_streaming_is_lazy,
+        test_golden_outputs,
+        test_packed_strategy_merges_small_items_and_drops_nothing,
+        test_packed_strategy_reduces_chunks_on_notes,
+        test_spans_are_views_of_the_same_chunks,
     ]
 
     passed = 0
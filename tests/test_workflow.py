@@ -1,6 +1,10 @@
 """Unit tests for the DSPy Code Grounding Workflow."""
 
+import json
+import os
+
 import dspy
+import pytest
 from workflow.schemas import (
     InquiryRecord,
     CallTree,
@@ -9,8 +13,28 @@ from workflow.schemas import (
     ProposalLedger,
     ReconciledVerdict,
 )
-from workflow.tools import search_code, read_code_slice, validate_d2_syntax
+import re
+import subprocess
+import sys
+import time
+from workflow import multi_repo, scanner, tools
+from workflow.tools import search_code, search_code_batch, read_code_slice, validate_d2_syntax
+from workflow.checkpoint import StageCheckpointStore
+from workflow import git_index
+from workflow.d2_validator import D2Validator
+from workflow.git_index import GitHistory
+from workflow.loadtest import LatencyModel, diff_reports, run_load_test
+from workflow.fixtures import SAMPLE_CODE_CONTEXT
+from workflow.memo import ToolMemo
+from workflow.minify import minify_code_context
+from workflow.multi_repo import RepositorySearch
+from workflow.compact import STAGE_EXCLUDED_FIELDS, render_compact
 from workflow.flow import CodeGroundingWorkflow
+from workflow.policy import ExecutionPlan, ExecutionPolicy
+from workflow.retrieval import CodeIndex, CodeRetriever, derive_search_terms, pack_code_context
+from workflow.tracing import WorkflowTracer
+from workflow.trajectory import CompactingReAct, TrajectoryCompactor
+from workflow.verdict_cache import VerdictCache
 
 
 def test_schema_instantiation_and_validation():
@@ -90,6 +114,108 @@ def test_tool_search_code(tmp_path):
     assert "TargetService" in res
 
 
+def test_tool_search_code_batch_groups_per_pattern(tmp_path, monkeypatch):
+    """Verify search_code_batch returns one section per pattern, with and without ripgrep."""
+    (tmp_path / "service.py").write_text("class TargetService:\n    def execute(self):\n        pass\n")
+    (tmp_path / "listener.py").write_text("def on_deleted(event):\n    mark_inactive(event)\n")
+
+    def check(res: str) -> None:
+        sections = res.split("=== Pattern ")
+        assert len(sections) == 4
+        assert "TargetService" in sections[1] and "mark_inactive" not in sections[1]
+        assert "mark_inactive" in sections[2] and "TargetService" not in sections[2]
+        assert "No matches found for pattern 'NoSuchSymbol'" in sections[3]
+
+    patterns = ["TargetService", "mark_inactive", "NoSuchSymbol"]
+    check(search_code_batch(patterns, directories=[str(tmp_path)]))
+
+    # Force the pure Python single-pass fallback
+    monkeypatch.setattr(tools, "ripgrep_batch", lambda *args: None)
+    check(search_code_batch(patterns, directories=[str(tmp_path)]))
+
+
+def test_ripgrep_batch_stops_once_every_pattern_is_capped(tmp_path, monkeypatch):
+    """Verify rg is killed after enough matches instead of streaming its whole output."""
+    fake_rg = tmp_path / "rg"
+    fake_rg.write_text(
+        f"#!{sys.executable}\n"
+        "import time\n"
+        "for i in range(1, 1001):\n"
+        "    print(f'a.py:{i}:alpha beta', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    fake_rg.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    start = time.perf_counter()
+    grouped = tools.ripgrep_batch(["alpha", "beta"], [re.compile("alpha"), re.compile("beta")], [str(tmp_path)])
+    assert time.perf_counter() - start < 5  # returned before rg's own timeout
+    assert grouped is not None
+    assert [len(found) for found in grouped.values()] == [tools.MAX_SEARCH_MATCHES] * 2
+    assert grouped[0][0] == "a.py:1:alpha beta"
+
+
+def test_scanner_skips_ignored_binary_and_oversized_files(tmp_path, monkeypatch):
+    """Verify the fallback scanner honours .gitignore, vendored dirs, binaries and the size cap."""
+    (tmp_path / ".gitignore").write_text("generated/\n*.log\n!keep.log\n")
+    (tmp_path / "app.py").write_text("TARGET = 1\n")
+    (tmp_path / "keep.log").write_text("TARGET kept by negation\n")
+    (tmp_path / "debug.log").write_text("TARGET ignored\n")
+    (tmp_path / "blob.bin").write_bytes(b"TARGET\0\x01\x02")
+    (tmp_path / "uv.lock").write_text("TARGET lockfile\n")
+    for vendored in ("generated", "node_modules"):
+        (tmp_path / vendored).mkdir()
+        (tmp_path / vendored / "copy.py").write_text("TARGET = 2\n")
+    monkeypatch.setattr(scanner, "MAX_FILE_BYTES", 64)
+    (tmp_path / "huge.py").write_text("TARGET\n" + "x" * 100)
+
+    files = {p.split("/")[-1] for p in scanner.iter_source_files(str(tmp_path))}
+    assert files == {"app.py", "keep.log", "blob.bin"}
+
+    found = scanner.scan_directories([re.compile("target", re.IGNORECASE)], [str(tmp_path)], 15)[0]
+    assert sorted(line.split(":")[0].split("/")[-1] for line in found) == ["app.py", "keep.log"]
+
+
+def test_scanner_parallel_matches_serial_and_respects_cap(tmp_path):
+    """Verify the process-pool path returns the same capped, file-ordered matches as serial scanning."""
+    for idx in range(80):
+        (tmp_path / f"mod_{idx:03d}.py").write_text(f"def handler_{idx}():\n    return 'needle'\n")
+    regexes = [re.compile("needle"), re.compile("handler_7")]
+
+    serial = scanner.scan_directories(regexes, [str(tmp_path)], 15, parallel_min_files=10_000)
+    parallel = scanner.scan_directories(regexes, [str(tmp_path)], 15, parallel_min_files=1)
+    assert len(serial[0]) == 15
+    assert serial[0] == parallel[0][:15]
+    assert all("handler_7" in line for line in parallel[1])
+
+
+def test_scanner_discards_a_broken_pool_and_surfaces_worker_errors(monkeypatch, tmp_path):
+    """Verify a broken pool is shut down and replaced by a serial scan, while real errors propagate."""
+    from concurrent.futures.process import BrokenProcessPool
+
+    (tmp_path / "a.py").write_text("needle\n")
+    shutdowns = []
+
+    class FakePool:
+        def shutdown(self, wait=True, cancel_futures=False):
+            shutdowns.append(cancel_futures)
+
+    def broken(*args):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(scanner, "_pool", FakePool())
+    monkeypatch.setattr(scanner, "_scan_parallel", broken)
+    found = scanner.scan_directories([re.compile("needle")], [str(tmp_path)], 15, parallel_min_files=1)
+    assert len(found[0]) == 1 and shutdowns == [True] and scanner._pool is None
+
+    def failing(*args):
+        raise ValueError("bad pattern")
+
+    monkeypatch.setattr(scanner, "_scan_parallel", failing)
+    with pytest.raises(ValueError):
+        scanner.scan_directories([re.compile("needle")], [str(tmp_path)], 15, parallel_min_files=1)
+
+
 def test_tool_validate_d2_syntax():
     """Verify D2 syntax checking detects unbalanced braces and template placeholders."""
     valid_d2 = "user -> api: request\napi -> db: query"
@@ -102,6 +228,173 @@ def test_tool_validate_d2_syntax():
     assert "Unescaped template" in validate_d2_syntax(template_d2)
 
 
+def test_d2_validator_memoizes_and_batches(monkeypatch):
+    """Verify repeated and whitespace-variant diagrams hit the cache and batches keep input order."""
+    validator = D2Validator()
+    compiles = []
+    real_compile = validator._compile
+    monkeypatch.setattr(validator, "_compile", lambda code: compiles.append(code) or real_compile(code))
+
+    first = validator.validate("user -> api: request\napi -> db: query")
+    assert validator.validate("user -> api: request   \napi -> db: query\n") == first
+    assert len(compiles) == 1 and validator.hits == 1
+
+    results = validator.validate_many(["a -> b", "a -> {node}", "a -> b  "])
+    assert results[0] == results[2]
+    assert "Unescaped template" in results[1]
+    assert len(compiles) == 3
+
+    # A d2 run that times out falls back to the heuristic verdict without caching it
+    slow = D2Validator()
+    slow._d2_binary = "d2"
+    runs = []
+
+    def timeout(*args, **kwargs):
+        runs.append(args)
+        raise subprocess.TimeoutExpired(cmd="d2", timeout=slow.timeout_s)
+
+    monkeypatch.setattr(subprocess, "run", timeout)
+    assert "heuristic validation" in slow.validate("a -> b")
+    assert slow.validate_many(["a -> b"]) == [slow.validate("a -> b")]
+    assert len(runs) == 3 and slow.hits == 0
+
+
+def test_tool_memo_reuses_results_until_file_changes(tmp_path):
+    """Verify memoized tools keep their signature, hit on repeats and miss after a file is modified."""
+    source = tmp_path / "Job.java"
+    source.write_text("class Job {}\n")
+    memo = ToolMemo()
+    memo_read = memo.wrap(read_code_slice)
+    assert dspy.Tool(memo_read).name == "read_code_slice"
+    assert "start_line" in dspy.Tool(memo_read).args
+
+    first = memo_read(str(source), 1, 5)
+    assert memo_read(filepath=str(source), start_line=1, end_line=5) == first
+    assert memo.stats() == {"read_code_slice": {"hits": 1, "misses": 1}}
+
+    source.write_text("class Job { void run() {} }\n")
+    os.utime(source, ns=(source.stat().st_mtime_ns + 10**9,) * 2)
+    assert "run()" in memo_read(str(source), 1, 5)
+
+    memo_search = memo.wrap(search_code)
+    memo_search("class Job", str(tmp_path))
+    memo_search("class Job", str(tmp_path))
+    assert memo.stats()["search_code"] == {"hits": 1, "misses": 1}
+    assert memo_search.call_state.hit is True
+    memo.reset()
+    assert memo.stats() == {}
+    memo_search("class Job", str(tmp_path))
+    assert memo.stats()["search_code"] == {"hits": 0, "misses": 1}
+
+
+def test_tool_memo_counts_concurrent_calls_exactly(tmp_path):
+    """Verify directory-scoped calls are not rescanned on hits and stats stay exact across threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+
+    def search_code(pattern: str, directory: str) -> str:
+        calls.append(pattern)
+        return f"{pattern} in {directory}"
+
+    memo = ToolMemo()
+    memo_search = memo.wrap(search_code)
+    memo_search("warmup", str(tmp_path))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: memo_search(f"p{i % 4}", str(tmp_path)), range(200)))
+    assert results[:4] == [f"p{i} in {tmp_path}" for i in range(4)]
+    stats = memo.stats()["search_code"]
+    assert stats["hits"] + stats["misses"] == 201
+    assert stats["misses"] == len(calls)
+
+
+def test_tool_memo_isolates_concurrent_workflow_runs(monkeypatch):
+    """Verify two runs sharing one workflow and memo neither clear nor count each other's calls."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    memo = ToolMemo()
+    workflow = CodeGroundingWorkflow(use_react=False, tool_memo=memo)
+    memo_read = memo.wrap(read_code_slice)
+    _, mock_baseline, _, _ = _sample_stage_outputs()
+    both_started = threading.Barrier(2)
+
+    def discovery(**kw):
+        memo_read(__file__, 1, 2)
+        both_started.wait(timeout=5)
+        memo_read(__file__, 1, 2)
+        return dspy.Prediction(baseline=mock_baseline)
+
+    _stub_stages(monkeypatch, workflow, discovery=discovery)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda q: workflow(raw_question=q, code_context="ctx"), ["q1", "q2"]))
+    assert [r.plan.tool_memo_stats for r in results] == [{"read_code_slice": {"hits": 1, "misses": 1}}] * 2
+    assert memo.stats() == {}
+
+
+def test_git_history_caches_blame_and_indexes_log_incrementally(monkeypatch, tmp_path):
+    """Verify log and blame output, the persistent blame cache, and incremental log indexing."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+
+    def git(*args):
+        subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "Dev")
+    source = repo / "Job.java"
+    source.write_text("class Job {\n}\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "Add sync job")
+    source.write_text("class Job {\n  void pause() {}\n}\n")
+    git("commit", "-q", "-am", "Pause campaigns for inactive bidders")
+
+    cache_dir = str(tmp_path / "cache")
+    described = GitHistory(cache_dir=cache_dir).describe(str(source), 2, 2)
+    assert "Pause campaigns for inactive bidders" in described and "Add sync job" in described
+    assert "2-2" in described and "Dev: Pause campaigns" in described and "2:   void pause() {}" in described
+
+    calls = []
+    real_git = git_index._git
+    monkeypatch.setattr(git_index, "_git", lambda r, *a: calls.append(a[0]) or real_git(r, *a))
+    assert GitHistory(cache_dir=cache_dir).describe(str(source), 2, 2) == described
+    assert "blame" not in calls and "log" not in calls
+
+    (repo / "Other.java").write_text("class Other {}\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "Add other")
+    calls.clear()
+    assert "Add other" not in GitHistory(cache_dir=cache_dir).describe(str(source))
+    assert calls.count("log") == 1 and "blame" in calls
+
+
+def test_retrieval_ranks_relevant_slices_within_budget(tmp_path):
+    """Verify BM25 retrieval derives terms from the inquiry and packs ranked slices under the budget."""
+    (tmp_path / "BidderDeactivationListener.java").write_text(
+        "public void onBidderDeleted(BidderDeleteEvent event) {\n    bidderRepository.markInactive(id);\n}\n"
+    )
+    (tmp_path / "InvoiceService.java").write_text("public void sendInvoice(Invoice invoice) {\n    mailer.send(invoice);\n}\n")
+    inquiry = InquiryRecord(
+        inquiry_id="INQ-R1",
+        raw_question="Does deleting a bidder pause campaigns?",
+        operational_context="Audit",
+        target_systems=["bidder-service"],
+    )
+    terms = derive_search_terms(inquiry)
+    assert "bidder" in terms and "does" not in terms
+
+    index = CodeIndex.build(str(tmp_path))
+    ranked = index.search(terms)
+    assert ranked[0][0].filepath.endswith("BidderDeactivationListener.java")
+    assert all(not s.filepath.endswith("InvoiceService.java") for s, _ in ranked)
+
+    packed = pack_code_context([s for s, _ in ranked], token_budget=200)
+    assert "BidderDeactivationListener.java:1-4" in packed
+    assert "2:     bidderRepository.markInactive(id);" in packed
+    assert pack_code_context([s for s, _ in ranked], token_budget=5) == ""
+
+
 def test_workflow_initialization():
     """Verify CodeGroundingWorkflow initializes all stages properly."""
     workflow = CodeGroundingWorkflow(use_react=False)
@@ -115,6 +408,92 @@ def test_workflow_initialization():
     assert hasattr(workflow_react, "adversarial_reviewer")
 
 
+def test_trajectory_compactor_keeps_recent_and_dedupes_slices():
+    """Verify old observations are elided, re-read slices deduplicated and the token ceiling enforced."""
+    code_slice = "".join(f"{i}: line {i}\n" for i in range(1, 51))
+    trajectory = {}
+    steps = [
+        ("read_code_slice", {"filepath": "Job.java", "start_line": 10, "end_line": 20}, code_slice[:300]),
+        ("search_code", {"pattern": "markInactive"}, "\n".join(f"A.java:{i}: markInactive" for i in range(15))),
+        ("read_code_slice", {"filepath": "Job.java", "start_line": 1, "end_line": 50}, code_slice),
+        ("search_code", {"pattern": "pauseCampaigns"}, "B.java:4: pauseCampaigns"),
+    ]
+    for idx, (tool, args, observation) in enumerate(steps):
+        trajectory.update({f"thought_{idx}": "look", f"tool_name_{idx}": tool,
+                           f"tool_args_{idx}": args, f"observation_{idx}": observation})
+
+    compacted = TrajectoryCompactor(max_tokens=10_000, keep_recent=2).compact(trajectory)
+    assert compacted["observation_0"] == "[lines 10-20 of Job.java are re-read in observation_2]"
+    assert "elided 13 more lines" in compacted["observation_1"]
+    assert compacted["observation_2"] == code_slice
+    assert trajectory["observation_1"] == steps[1][2]
+
+    bounded = TrajectoryCompactor(max_tokens=200, keep_recent=2).compact(trajectory)
+    assert TrajectoryCompactor.estimate(bounded) <= 200
+    assert "observation_3" in bounded and "observation_0" not in bounded
+
+    workflow = CodeGroundingWorkflow(use_react=True, trajectory_compactor=TrajectoryCompactor(max_tokens=500))
+    assert isinstance(workflow.discovery, CompactingReAct)
+
+
+def _sample_stage_outputs():
+    """Build one mocked output per stage for the INQ-TEST inquiry."""
+    mock_inquiry = InquiryRecord(
+        inquiry_id="INQ-TEST",
+        raw_question="Does delete pause?",
+        operational_context="Audit",
+        target_systems=["billing"],
+        stakes_severity="medium"
+    )
+    mock_baseline = PrimaryBaseline(
+        inquiry_id="INQ-TEST",
+        call_tree=CallTree(entry_point="API", leaf_mutations=["DELETE"]),
+        git_intent_summary="Initial commit",
+        code_citations=["test.py:1"],
+        baseline_summary="Delete triggers DB removal",
+        diagram_d2="api -> db"
+    )
+    mock_ledger = ProposalLedger(
+        inquiry_id="INQ-TEST",
+        proposals=[
+            Proposal(
+                proposal_id="PROP-1",
+                category="intent-gap",
+                target_symbol="DELETE",
+                failing_scenario="Hard delete instead of soft delete",
+                code_evidence="Line 1",
+                suggested_revision="Use active=false"
+            )
+        ]
+    )
+    mock_verdict = ReconciledVerdict(
+        inquiry_id="INQ-TEST",
+        adopted_proposals=["PROP-1"],
+        certainty_score=5,
+        plain_language_verdict="Verified delete flow.",
+        actionable_decision_matrix="Migrate to soft delete."
+    )
+    return mock_inquiry, mock_baseline, mock_ledger, mock_verdict
+
+
+def _stub_stages(monkeypatch, workflow, **stubs):
+    """Replace the four stage modules with stubs returning `_sample_stage_outputs()`.
+
+    `stubs` overrides individual stages by module attribute (e.g. discovery=fake_discovery).
+    Returns the sample outputs so tests can assert on them.
+    """
+    mock_inquiry, mock_baseline, mock_ledger, mock_verdict = _sample_stage_outputs()
+    defaults = {
+        "ingress": lambda **kw: dspy.Prediction(inquiry=mock_inquiry),
+        "discovery": lambda **kw: dspy.Prediction(baseline=mock_baseline),
+        "adversarial_reviewer": lambda **kw: dspy.Prediction(ledger=mock_ledger),
+        "reconciler": lambda **kw: dspy.Prediction(verdict=mock_verdict),
+    }
+    for attr, stub in {**defaults, **stubs}.items():
+        monkeypatch.setattr(workflow, attr, stub)
+    return mock_inquiry, mock_baseline, mock_ledger, mock_verdict
+
+
 def test_workflow_forward_with_mocked_stages(monkeypatch):
     """Verify the deterministic sequential execution of CodeGroundingWorkflow."""
     workflow = CodeGroundingWorkflow(use_react=False)
@@ -166,3 +545,399 @@ def test_workflow_forward_with_mocked_stages(monkeypatch):
     assert result.baseline.baseline_summary == "Delete triggers DB removal"
     assert len(result.ledger.proposals) == 1
     assert result.verdict.certainty_score == 5
+
+
+def test_workflow_checkpoints_resume_and_replay(monkeypatch, tmp_path):
+    """Verify a rerun resumes after the last completed stage and stages can be replayed."""
+    store = StageCheckpointStore(directory=str(tmp_path / "checkpoints"))
+    workflow = CodeGroundingWorkflow(use_react=False, checkpoint_store=store)
+    mock_inquiry, mock_baseline, mock_ledger, mock_verdict = _sample_stage_outputs()
+    calls = {"ingress": 0, "discovery": 0, "adversarial": 0, "reconcile": 0}
+
+    def stage(name, **output):
+        def run(**kw):
+            calls[name] += 1
+            return dspy.Prediction(**output)
+        return run
+
+    def failing_reconciler(**kw):
+        raise TimeoutError("transient LM failure")
+
+    _stub_stages(
+        monkeypatch, workflow,
+        ingress=stage("ingress", inquiry=mock_inquiry),
+        discovery=stage("discovery", baseline=mock_baseline),
+        adversarial_reviewer=stage("adversarial", ledger=mock_ledger),
+        reconciler=failing_reconciler,
+    )
+
+    with pytest.raises(TimeoutError):
+        workflow(raw_question="Does delete pause?", code_context="def delete(): ...")
+
+    monkeypatch.setattr(workflow, "reconciler", stage("reconcile", verdict=mock_verdict))
+    result = workflow(raw_question="Does delete pause?", code_context="def delete(): ...")
+    assert calls == {"ingress": 1, "discovery": 1, "adversarial": 1, "reconcile": 1}
+    assert result.ledger == mock_ledger
+    assert result.verdict.certainty_score == 5
+    assert sorted(p.name.split("-")[0] for p in (tmp_path / "checkpoints" / "INQ-TEST").iterdir()) == [
+        "adversarial", "discovery", "ingress", "reconcile"
+    ]
+
+    replayed = workflow.replay_stage("adversarial", "INQ-TEST")
+    assert replayed == mock_ledger
+    assert calls["adversarial"] == 2
+
+    # A different LM (or signature) invalidates every stored stage output
+    with dspy.context(lm=dspy.LM("openai/other-model")):
+        workflow(raw_question="Does delete pause?", code_context="def delete(): ...")
+    assert calls == {"ingress": 2, "discovery": 2, "adversarial": 3, "reconcile": 2}
+
+
+def test_workflow_replays_checkpoint_on_the_review_variant_that_produced_it(monkeypatch, tmp_path):
+    """Verify replay_stage re-runs the shrunk reviewer for a checkpoint written by a 'shrink' review."""
+    store = StageCheckpointStore(directory=str(tmp_path / "checkpoints"))
+    workflow = CodeGroundingWorkflow(
+        use_react=False, checkpoint_store=store, policy=ExecutionPolicy(review_modes={"medium": "shrink"})
+    )
+    _, _, mock_ledger, _ = _sample_stage_outputs()
+    reviewers = []
+    _stub_stages(
+        monkeypatch, workflow,
+        adversarial_reviewer=lambda **kw: reviewers.append("full") or dspy.Prediction(ledger=mock_ledger),
+        adversarial_reviewer_lite=lambda **kw: reviewers.append("lite") or dspy.Prediction(ledger=mock_ledger),
+    )
+
+    assert workflow(raw_question="Does delete pause?", code_context="ctx").plan.review_mode == "shrink"
+    assert workflow.replay_stage("adversarial", "INQ-TEST") == mock_ledger
+    assert reviewers == ["lite", "lite"]
+
+
+def test_workflow_retrieves_code_context_when_empty(monkeypatch, tmp_path):
+    """Verify an empty code_context is filled by the retrieval stage before discovery."""
+    (tmp_path / "billing.py").write_text("def delete_invoice(invoice_id):\n    db.delete(invoice_id)\n")
+    workflow = CodeGroundingWorkflow(use_react=False, retriever=CodeRetriever(root=str(tmp_path), token_budget=500))
+    inquiry = InquiryRecord(
+        inquiry_id="INQ-RET", raw_question="Does delete_invoice remove rows?",
+        operational_context="Audit", target_systems=["billing"]
+    )
+    seen = {}
+
+    def fake_discovery(**kw):
+        seen["code_context"] = kw["code_context"]
+        return dspy.Prediction(baseline=None)
+
+    _stub_stages(monkeypatch, workflow, ingress=lambda **kw: dspy.Prediction(inquiry=inquiry), discovery=fake_discovery)
+
+    workflow(raw_question="Does delete_invoice remove rows?")
+    assert "billing.py:1-3" in seen["code_context"]
+    assert "1: def delete_invoice(invoice_id):" in seen["code_context"]
+
+
+def test_compact_rendering_drops_empties_and_duplicate_ids():
+    """Verify compact JSON omits empty fields and inquiry ids while summarizing long prose only."""
+    _, baseline, ledger, _ = _sample_stage_outputs()
+    baseline = baseline.model_copy(update={"git_intent_summary": "x" * 300})
+    compact = json.loads(render_compact(baseline, exclude=STAGE_EXCLUDED_FIELDS["reconcile"]["baseline"], max_field_chars=50))
+    assert "inquiry_id" not in compact
+    assert "event_publishers" not in compact["call_tree"]
+    assert compact["git_intent_summary"].endswith("… [+250 chars]")
+    assert compact["diagram_d2"] == "api -> db"
+    assert json.loads(render_compact(ledger, exclude=STAGE_EXCLUDED_FIELDS["reconcile"]["ledger"]))["proposals"][0]["proposal_id"] == "PROP-1"
+
+
+def test_workflow_compact_inputs_for_late_stages(monkeypatch):
+    """Verify stages 3 and 4 receive compact JSON strings when compact_inputs is enabled."""
+    workflow = CodeGroundingWorkflow(use_react=False, compact_inputs=True)
+    assert workflow.reconciler.predict.signature.input_fields["ledger"].annotation is str
+    baseline_desc = workflow.adversarial_reviewer.predict.signature.input_fields["baseline"].json_schema_extra["desc"]
+    assert baseline_desc.endswith("(compact PrimaryBaseline JSON without call_tree, code_citations, inquiry_id)")
+    _, mock_baseline, mock_ledger, mock_verdict = _sample_stage_outputs()
+    seen = {}
+
+    def capture(name, **output):
+        def run(**kw):
+            seen[name] = kw
+            return dspy.Prediction(**output)
+        return run
+
+    mock_inquiry, *_ = _stub_stages(
+        monkeypatch, workflow,
+        discovery=capture("discovery", baseline=mock_baseline),
+        adversarial_reviewer=capture("adversarial", ledger=mock_ledger),
+        reconciler=capture("reconcile", verdict=mock_verdict),
+    )
+
+    workflow(raw_question="Does delete pause?", code_context="def delete(): ...")
+    assert seen["discovery"]["inquiry"] is mock_inquiry
+    assert json.loads(seen["adversarial"]["inquiry"])["inquiry_id"] == "INQ-TEST"
+    # Stage 3 reviews against code_context, so the baseline's call tree and citations are left out
+    assert "operational_context" not in json.loads(seen["adversarial"]["inquiry"])
+    assert {"call_tree", "code_citations"}.isdisjoint(json.loads(seen["adversarial"]["baseline"]))
+    assert "call_tree" in json.loads(seen["reconcile"]["baseline"])
+    assert "inquiry_id" not in json.loads(seen["reconcile"]["baseline"])
+    assert "inquiry_id" not in json.loads(seen["reconcile"]["ledger"])
+
+
+def test_workflow_severity_policy_skips_or_downgrades_review(monkeypatch):
+    """Verify low severity skips Stage 3, medium reviews on the cheap LM and savings are recorded."""
+    cheap_lm = dspy.LM("openai/cheap-review-model")
+    workflow = CodeGroundingWorkflow(use_react=False, policy=ExecutionPolicy(), review_lm=cheap_lm)
+    mock_inquiry, _, mock_ledger, _ = _sample_stage_outputs()
+    current = {"inquiry": mock_inquiry}
+    review_lms = []
+
+    def reviewer(**kw):
+        review_lms.append(dspy.settings.lm)
+        return dspy.Prediction(ledger=mock_ledger)
+
+    _stub_stages(
+        monkeypatch, workflow,
+        ingress=lambda **kw: dspy.Prediction(inquiry=current["inquiry"]),
+        adversarial_reviewer=reviewer,
+    )
+
+    current["inquiry"] = mock_inquiry.model_copy(update={"stakes_severity": "high"})
+    full = workflow(raw_question="q", code_context="ctx")
+    assert full.plan.review_mode == "full" and review_lms == [None]
+    assert set(full.plan.stage_timings_s) == {"ingress", "discovery", "adversarial", "reconcile"}
+
+    current["inquiry"] = mock_inquiry.model_copy(update={"stakes_severity": "medium"})
+    cheap = workflow(raw_question="q", code_context="ctx")
+    assert cheap.plan.review_mode == "cheap" and cheap.plan.review_model == "openai/cheap-review-model"
+    assert review_lms[-1] is cheap_lm
+
+    current["inquiry"] = mock_inquiry.model_copy(update={"stakes_severity": "low"})
+    skipped = workflow(raw_question="q", code_context="ctx")
+    assert skipped.plan.review_mode == "skip"
+    assert skipped.ledger.proposals == [] and len(review_lms) == 2
+    assert skipped.plan.estimated_latency_saved_s is not None
+
+
+def test_workflow_verdict_cache_serves_exact_repeats_in_the_same_scope(monkeypatch, tmp_path):
+    """Verify repeats hit only for the same question, operational context, target systems and code context."""
+    workflow = CodeGroundingWorkflow(use_react=False, verdict_cache=VerdictCache(str(tmp_path)))
+    mock_inquiry, mock_baseline, *_ = _sample_stage_outputs()
+    inquiries = {"systems": mock_inquiry}
+    calls = []
+    _, _, _, mock_verdict = _stub_stages(
+        monkeypatch, workflow,
+        ingress=lambda **kw: dspy.Prediction(inquiry=inquiries["systems"]),
+        discovery=lambda **kw: calls.append(kw["code_context"]) or dspy.Prediction(baseline=mock_baseline),
+    )
+    question = "Does deleting a bidder pause its campaigns immediately?"
+
+    first = workflow(raw_question=question, operational_context="Audit", code_context="ctx")
+    assert first.provenance is None
+
+    repeat = workflow(raw_question="  does DELETING a bidder pause its campaigns immediately ", operational_context="Audit",
+                      code_context="ctx")
+    assert len(calls) == 1
+    assert repeat.verdict == mock_verdict
+    assert repeat.provenance.source_inquiry_id == "INQ-TEST" and repeat.provenance.similarity == 1.0
+
+    workflow(raw_question="Does deleting a bidder immediately pause its campaigns?", operational_context="Audit",
+             code_context="ctx")
+    workflow(raw_question=question, operational_context="Incident", code_context="ctx")
+    workflow(raw_question=question, operational_context="Audit", code_context="other ctx")
+    inquiries["systems"] = mock_inquiry.model_copy(update={"target_systems": ["bidding"]})
+    workflow(raw_question=question, operational_context="Audit", code_context="ctx")
+    assert len(calls) == 5
+
+    # Without a code context the tools search the live repository, so nothing is cached
+    workflow(raw_question=question, operational_context="Audit")
+    workflow(raw_question=question, operational_context="Audit")
+    assert len(calls) == 7
+
+
+def test_verdict_cache_fuzzy_matching_is_opt_in_and_rejects_inverted_questions(tmp_path):
+    """Verify rewordings hit only with fuzzy matching, and negation, antonym and entity swaps never do."""
+    inquiry, baseline, ledger, verdict = _sample_stage_outputs()
+    plan = ExecutionPlan(severity="medium", review_mode="full")
+    question = "Does pausing a campaign stop its auctions immediately?"
+    VerdictCache(str(tmp_path)).store(question, "Audit", "ctx", inquiry, baseline, ledger, verdict, plan)
+    reworded = "Does pausing a campaign immediately stop its auctions?"
+    assert VerdictCache(str(tmp_path)).lookup(reworded, "Audit", ["billing"], "ctx") is None
+
+    fuzzy = VerdictCache(str(tmp_path), fuzzy_threshold=0.75)
+    assert fuzzy.lookup(reworded, "Audit", ["billing"], "ctx").provenance.similarity >= 0.75
+    assert fuzzy.lookup(question, "Audit", ["Billing "], "ctx") is not None
+    for inverted in (
+        "Does pausing a campaign not stop its auctions immediately?",
+        "Doesn't pausing a campaign stop its auctions immediately?",
+        "Does resuming a campaign stop its auctions immediately?",
+        "Does pausing a campaign start its auctions immediately?",
+    ):
+        assert fuzzy.lookup(inverted, "Audit", ["billing"], "ctx") is None, inverted
+
+    entity = "Does the Google Ads sync retry failed uploads?"
+    fuzzy.store(entity, "Audit", "ctx", inquiry, baseline, ledger, verdict, plan)
+    assert fuzzy.lookup("Does the Microsoft Ads sync retry failed uploads?", "Audit", ["billing"], "ctx") is None
+
+    direction = "Does the billing service call the campaign service on delete?"
+    fuzzy.store(direction, "Audit", "ctx", inquiry, baseline, ledger, verdict, plan)
+    swapped = "Does the campaign service call the billing service on delete?"
+    assert fuzzy.lookup(swapped, "Audit", ["billing"], "ctx") is None
+    assert fuzzy.lookup(entity, "Audit", ["billing"], "other ctx") is None
+
+
+def test_workflow_tracer_records_stage_lm_and_tool_spans(monkeypatch, tmp_path):
+    """Verify stage spans, dspy LM/tool callback spans and the Chrome trace export."""
+    tracer = WorkflowTracer()
+    memo = ToolMemo()
+    workflow = CodeGroundingWorkflow(use_react=False, tracer=tracer, tool_memo=memo)
+    _, mock_baseline, _, _ = _sample_stage_outputs()
+    lm = dspy.utils.DummyLM([{"answer": "ok"}])
+    slice_tool = dspy.Tool(memo.wrap(read_code_slice))
+
+    def discovery(**kw):
+        dspy.Predict("question -> answer")(question="where?", lm=lm)
+        slice_tool(filepath=__file__, start_line=1, end_line=2)
+        slice_tool(filepath=__file__, start_line=1, end_line=2)
+        return dspy.Prediction(baseline=mock_baseline)
+
+    _stub_stages(monkeypatch, workflow, discovery=discovery)
+    workflow(raw_question="q", code_context="ctx")
+
+    by_category = {}
+    for span in tracer.spans:
+        by_category.setdefault(span.category, []).append(span)
+    assert [s.name for s in by_category["stage"]] == ["ingress", "discovery", "adversarial", "reconcile"]
+    assert len(by_category["lm"]) == 1 and by_category["lm"][0].attributes["cache_hit"] is False
+    assert [s.attributes["memo_hit"] for s in by_category["tool"]] == [False, True]
+    assert all(s.end_s is not None for s in tracer.spans)
+
+    trace = json.loads(tracer.export_chrome_trace(str(tmp_path / "trace.json")).read_text())
+    assert {e["ph"] for e in trace["traceEvents"]} == {"X"}
+    assert len(trace["traceEvents"]) == len(tracer.spans)
+    assert next(iter(tracer.summary())) == "workflow:workflow"
+
+
+def test_workflow_tracer_keeps_threads_and_interleaved_lm_calls_apart():
+    """Verify annotations stay in each thread's own stage and usage follows the call's outputs."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    tracer = WorkflowTracer()
+
+    def run(name):
+        with tracer.span(name):
+            time.sleep(0.01)
+            tracer.annotate(owner=name)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(run, [f"stage-{i}" for i in range(8)]))
+    assert all(span.attributes == {"owner": span.name} for span in tracer.spans)
+
+    lm = dspy.utils.DummyLM([])
+    outputs_a, outputs_b = ["a"], ["b"]
+    tracer.on_lm_start("call-a", lm, {})
+    tracer.on_lm_start("call-b", lm, {})
+    lm.history.append({"outputs": outputs_a, "usage": {"prompt_tokens": 10, "completion_tokens": 1}})
+    lm.history.append({"outputs": outputs_b, "usage": {"prompt_tokens": 20, "completion_tokens": 2}})
+    tracer.on_lm_end("call-a", outputs_a)
+    tracer.on_lm_end("call-b", outputs_b)
+    lm_spans = [span for span in tracer.spans if span.category == "lm"]
+    assert [span.attributes["prompt_tokens"] for span in lm_spans] == [10, 20]
+
+
+def test_repository_search_ranks_by_target_systems(monkeypatch, tmp_path):
+    """Verify concurrent multi-root search with per-repo caps and target-system ranking."""
+    monkeypatch.setattr(multi_repo, "ripgrep_batch", lambda *args: None)
+    for name, count in (("billing-service", 2), ("campaign-manager", 12), ("google-ads-sync", 1)):
+        repo = tmp_path / name
+        repo.mkdir()
+        (repo / "Bidder.java").write_text("".join(f"void pauseBidder{i}() {{}}\n" for i in range(count)))
+    roots = [str(tmp_path / n) for n in ("billing-service", "campaign-manager", "google-ads-sync")]
+    search = RepositorySearch(roots, max_matches_per_repo=5)
+
+    ranked = search.search("pauseBidder", target_systems=["campaign-manager", "google-ads-sync"])
+    assert [r.name for r in ranked] == ["campaign-manager", "google-ads-sync", "billing-service"]
+    assert [len(r.matches) for r in ranked] == [5, 1, 2]
+    assert ranked[2].relevance == 0.0
+
+    tool = search.as_tool()
+    assert tool.__name__ == "search_repositories" and "campaign-manager" in tool.__doc__
+    rendered = tool("pauseBidder", ["google-ads-sync"])
+    assert rendered.startswith("=== Repository 'google-ads-sync' (relevance 1.00, 1 matches) ===")
+
+    with search.for_inquiry(["google-ads-sync"]):
+        assert tool("pauseBidder").startswith("=== Repository 'google-ads-sync'")
+    assert tool("pauseBidder").startswith("=== Repository 'campaign-manager'")
+
+    workflow = CodeGroundingWorkflow(use_react=True, repositories=roots)
+    repo_tool = workflow.discovery.tools["search_repositories"]
+    mock_inquiry, mock_baseline, *_ = _sample_stage_outputs()
+    seen = {}
+
+    def discovery(**kw):
+        seen["rendered"] = repo_tool(pattern="pauseBidder")
+        return dspy.Prediction(baseline=mock_baseline)
+
+    _stub_stages(monkeypatch, workflow, discovery=discovery)
+    workflow(raw_question="Does pausing a bidder stop billing?", code_context="ctx")
+    # The stubbed inquiry targets ["billing"], so billing-service leads despite fewer matches
+    assert seen["rendered"].startswith("=== Repository 'billing-service' (relevance 1.00, 2 matches) ===")
+
+
+def test_minify_code_context_keeps_notices_and_line_numbers():
+    """Verify comments/imports are compacted, unrelated bodies elided and original line numbers kept."""
+    context = "\n".join([
+        "// BidderService.java:1-22",
+        "1: /*", "2:  * Copyright 2024 Example Corp.", "3:  */",
+        "4: import java.util.List;", "5: import java.util.Map;", "6: import com.example.ads.GoogleAdsClient;",
+        "7: ",
+        "8: public class BidderService {",
+        "9:     public String formatInvoice(Invoice i) {",
+        "10:         String total = i.total();",
+        "11:         String tax = i.tax();",
+        "12:         return total + tax;",
+        "13:     }",
+        "14:     public void deleteBidder(Long id) {",
+        "15:         // NOTICE: soft delete only,",
+        "16:         // campaigns are paused later",
+        "17:         repo.markInactive(id); // mark it",
+        "18:         String url = \"http://ads\";",
+        "19:     }",
+        "20: }",
+        "# jobs/sync.py",
+        "# helper comment",
+        "def pause_campaigns(bidder):",
+        "    client.pause(bidder)",
+    ])
+    minified = minify_code_context(context, relevance_terms=["bidder", "pause", "campaigns"])
+    lines = minified.text.split("\n")
+
+    assert "Copyright" not in minified.text and "mark it" not in minified.text
+    assert "4-6: import java.util.{List, Map}, com.example.ads.GoogleAdsClient" in lines
+    assert "9-13:  public String formatInvoice(Invoice i) { /* lines 10-13 elided */ }" in lines
+    # Labels only where numbering jumps: after the dropped blank line 7, not on the lines following it
+    assert "8: public class BidderService {" in lines
+    assert "  // NOTICE: soft delete only," in lines and "  // campaigns are paused later" in lines
+    assert "  repo.markInactive(id);" in lines and '  String url = "http://ads";' in lines
+    assert "# jobs/sync.py" in lines and "2: def pause_campaigns(bidder):" in lines and " client.pause(bidder)" in lines
+    assert minified.original_location(lines.index("  repo.markInactive(id);") + 1) == ("BidderService.java", 17)
+    assert minified.minified_tokens < 0.7 * minified.original_tokens
+
+
+def test_workflow_minifies_code_context(monkeypatch):
+    """Verify discovery receives the minified code_context when minify_context is enabled."""
+    workflow = CodeGroundingWorkflow(use_react=False, minify_context=True)
+    _, mock_baseline, _, _ = _sample_stage_outputs()
+    seen = {}
+    _stub_stages(monkeypatch, workflow, discovery=lambda **kw: seen.update(kw) or dspy.Prediction(baseline=mock_baseline))
+
+    result = workflow(raw_question="q", code_context=SAMPLE_CODE_CONTEXT)
+    assert seen["code_context"] == result.code_context
+    assert "Soft delete" not in result.code_context and "5:  bidderRepository.markInactive(bidderId);" in result.code_context
+
+
+def test_load_test_harness_reports_and_diffs():
+    """Verify the mock-LM load test completes every inquiry and flags regressions against a baseline."""
+    report = run_load_test(inquiries=4, concurrency=2, latency=LatencyModel(distribution="fixed", median_ms=0))
+    assert report.errors == 0 and report.throughput_rps > 0
+    assert set(report.stages_ms) == {"ingress", "discovery", "adversarial", "reconcile"}
+    assert report.e2e_ms.p50 <= report.e2e_ms.p95 <= report.e2e_ms.p99
+
+    assert not any(regressed for *_, regressed in diff_reports(report, report))
+    faster = report.model_copy(update={"throughput_rps": report.throughput_rps * 2})
+    rows = {path: (change, regressed) for path, _, _, change, regressed in diff_reports(report, faster)}
+    assert rows["throughput_rps"] == (-50.0, True)